@@ -0,0 +1,887 @@
+"""
+    The pieces of the wire track and landscape generators that do not depend on what they generate, shared by both scripts.
+
+    The generator scripts import this file by its name through importlib (it starts with digits, so no import statement can name it),
+    so it has to sit in the same folder as them, or in a folder on maya's python path. Its LoadScript loads the other scripts by their paths.
+"""
+
+import numpy as np
+import hashlib
+import heapq
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+
+
+def LoadScript(fileName):
+    """ Import one of the scripts by its file name (the names start with digits, so no import statement can name them).
+        The folder of this file is searched first, then the working directory and the python path, as a script run from maya's script editor does not know its own file.
+
+        - Returns the module.
+    """
+    for folder in [os.path.dirname(os.path.abspath(__file__)), os.getcwd()] + sys.path:
+        path = os.path.join(folder, fileName)
+        if(os.path.isfile(path)):
+            spec = importlib.util.spec_from_file_location(os.path.splitext(fileName)[0].lstrip("0123456789_"), path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+    raise ImportError("%s was not found next to this script or on the python path." % fileName)
+
+
+class LazyModule():
+    """ Stands in for a module, importing it the first time one of its attributes is used, 
+        so the generators can be imported (by batch tools and tests) without loading maya.
+    """
+    def __init__(self, name):
+        """ Initialises the proxy with the full name of the module to import. """
+        self.__dict__["Name"] = name
+        self.__dict__["Module"] = None
+
+    def __getattr__(self, attribute):
+        module = self.__dict__["Module"]
+        if(module is None):
+            module = importlib.import_module(self.__dict__["Name"])
+            self.__dict__["Module"] = module
+        return getattr(module, attribute)
+
+# Maya is only imported once a build first calls into it
+cmds = LazyModule("maya.cmds")
+om = LazyModule("maya.api.OpenMaya")
+oma = LazyModule("maya.api.OpenMayaAnim")
+mayaUtils = LazyModule("maya.utils")
+
+
+class MeshBuffers():
+    """ The vertex and face buffers of a generated mesh, built without maya so they can be cached before being committed. """
+    def __init__(self, vertices, polyFaces, polygonConnects, faceMaterials=None, uValues=None, vValues=None, uvIds=None, normals=None, colours=None):
+        """ Initialises the buffers.
+
+            vertices            :    The (x, y, z) vertices.
+            polyFaces           :    The number of vertices in each face.
+            polygonConnects     :    The vertex indices of each face, in order.
+            faceMaterials       :    The material id of each face (optional).
+            uValues             :    The U coordinate of each UV (optional).
+            vValues             :    The V coordinate of each UV (optional).
+            uvIds               :    The UV index of each face vertex, in the same order as polygonConnects (optional).
+            normals             :    The (x, y, z) normal of each vertex (optional).
+            colours             :    The (r, g, b) colour of each vertex, from 0 to 1 (optional).
+        """
+        self.Vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.PolyFaces = np.asarray(polyFaces, dtype=np.int32)
+        self.PolygonConnects = np.asarray(polygonConnects, dtype=np.int32)
+        self.FaceMaterials = None if faceMaterials is None else np.asarray(faceMaterials, dtype=np.int32)
+        self.UValues = None if uValues is None else np.asarray(uValues, dtype=np.float32)
+        self.VValues = None if vValues is None else np.asarray(vValues, dtype=np.float32)
+        self.UVIds = None if uvIds is None else np.asarray(uvIds, dtype=np.int32)
+        self.Normals = None if normals is None else np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+        self.Colours = None if colours is None else np.asarray(colours, dtype=np.float32).reshape(-1, 3)
+
+    def ToArrays(self):
+        """ Return the buffers as a dictionary of named arrays, the inverse of MeshBuffers(**arrays). """
+        arrays = {"vertices" : self.Vertices, "polyFaces" : self.PolyFaces, "polygonConnects" : self.PolygonConnects}
+        for name, values in (("faceMaterials", self.FaceMaterials), ("uValues", self.UValues), ("vValues", self.VValues), ("uvIds", self.UVIds), ("normals", self.Normals), ("colours", self.Colours)):
+            if(values is not None):
+                arrays[name] = values
+        return arrays
+
+
+class MaterialRegistry():
+    """ Creates each named material and its shading group once per scene, and reuses them on every later build. """
+    def __init__(self):
+        """ Initialises the registry (does nothing, the scene itself records which materials exist). """
+        pass
+
+    def GetShadingGroup(self, name, colour, texture=None, normalMap=None):
+        """ Return the shading group of a named blinn material, creating the material only if the scene does not have it yet.
+
+            name        :    The name of the material, its shading group is named name + "SG".
+            colour      :    The (r, g, b) colour of a newly created material, multiplied into its texture if it has one.
+            texture     :    Optional image file for the colour of a newly created material, read through a file node named name + "File".
+            normalMap   :    Optional tangent space normal map image file for a newly created material, read through a file node named name + "NormalFile".
+        """
+        shadingGroup = name + "SG"
+        if(not cmds.objExists(name)):
+            cmds.shadingNode('blinn', asShader=True, name=name)
+            cmds.setAttr(name + '.color', colour[0], colour[1], colour[2])
+            if(texture is not None):
+                fileNode = cmds.shadingNode('file', asTexture=True, name=name + "File")
+                cmds.setAttr(fileNode + '.fileTextureName', texture, type="string")
+                cmds.setAttr(fileNode + '.colorGain', colour[0], colour[1], colour[2])
+                cmds.connectAttr(fileNode + '.outColor', name + '.color', force=True)
+            if(normalMap is not None):
+                # Normals are data rather than colour, so the file is read raw, through a bump node in tangent space normals mode
+                normalFile = cmds.shadingNode('file', asTexture=True, name=name + "NormalFile")
+                cmds.setAttr(normalFile + '.fileTextureName', normalMap, type="string")
+                cmds.setAttr(normalFile + '.ignoreColorSpaceFileRules', 1)
+                cmds.setAttr(normalFile + '.colorSpace', "Raw", type="string")
+                bump = cmds.shadingNode('bump2d', asUtility=True, name=name + "Bump")
+                cmds.setAttr(bump + '.bumpInterp', 1)
+                cmds.connectAttr(normalFile + '.outAlpha', bump + '.bumpValue', force=True)
+                cmds.connectAttr(bump + '.outNormal', name + '.normalCamera', force=True)
+        if(not cmds.objExists(shadingGroup)):
+            cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=shadingGroup)
+            cmds.connectAttr(name + '.outColor', shadingGroup + '.surfaceShader', force=True)
+        return shadingGroup
+
+    def Assign(self, members, name, colour, texture=None, normalMap=None):
+        """ Assign a material to a list of objects or face components in a single sets call. """
+        if(len(members) > 0):
+            cmds.sets(members, edit=True, forceElement=self.GetShadingGroup(name, colour, texture, normalMap))
+
+    def AssignFaces(self, meshName, faceMaterials, materials):
+        """ Assign a material to each face of a mesh, with one sets call per material covering all of its faces.
+
+            meshName        :    The name of the mesh.
+            faceMaterials   :    Array of the material id of each face.
+            materials       :    List of (name, colour) for each material id.
+        """
+        faceMaterials = np.asarray(faceMaterials)
+        # Runs of consecutive faces with the same material become single f[start:end] components
+        runStarts = np.flatnonzero(np.diff(faceMaterials, prepend=-1) != 0)
+        runEnds = np.append(runStarts[1:], len(faceMaterials)) - 1
+        for material, (name, colour) in enumerate(materials):
+            runs = faceMaterials[runStarts] == material
+            if(np.any(runs)):
+                components = ["%s.f[%d:%d]" % (meshName, start, end) for start, end in zip(runStarts[runs].tolist(), runEnds[runs].tolist())]
+                cmds.sets(components, edit=True, forceElement=self.GetShadingGroup(name, colour))
+
+
+class CostEstimate():
+    """ The predicted size, memory and build time of a mesh, worked out from the generator parameters without building it. """
+    def __init__(self, vertices=0, faces=0, faceVertices=0, uvs=0, colours=0, materials=0, seconds=0.0):
+        """ Initialises the estimate.
+
+            vertices        :    The number of vertices, before welding.
+            faces           :    The number of faces.
+            faceVertices    :    The length of polygonConnects, the sum of the vertices of every face.
+            uvs             :    The number of UVs.
+            colours         :    The number of vertex colours.
+            materials       :    The number of face material ids.
+            seconds         :    The predicted time to build and commit the mesh.
+        """
+        self.Vertices = int(vertices)
+        self.Faces = int(faces)
+        self.FaceVertices = int(faceVertices)
+        self.UVs = int(uvs)
+        self.Colours = int(colours)
+        self.Materials = int(materials)
+        self.Seconds = float(seconds)
+
+    def __add__(self, other):
+        return CostEstimate(self.Vertices + other.Vertices, self.Faces + other.Faces, self.FaceVertices + other.FaceVertices, self.UVs + other.UVs, self.Colours + other.Colours, 
+                            self.Materials + other.Materials, self.Seconds + other.Seconds)
+
+    def Bytes(self):
+        """ The size of the MeshBuffers: points and normals as doubles, UVs and colours as floats, and 32 bit connects, UV ids, face counts and materials. """
+        return self.Vertices * 48 + self.UVs * 8 + self.Colours * 12 + self.FaceVertices * 8 + self.Faces * 4 + self.Materials * 4
+
+    def Summary(self):
+        """ Describe the estimate in one line for the UI. """
+        return "%d vertices, %d faces, %.1f MB, about %.1f s" % (self.Vertices, self.Faces, self.Bytes() / (1024.0 * 1024.0), self.Seconds)
+
+
+class MeshDecimator():
+    """ Simplifies the MeshBuffers of either generator by quadric error edge collapse, before they reach maya.
+        The mesh is triangulated and held as array-backed half-edges (half-edge 3t+k runs from corner k of triangle t to the next corner),
+        and the cheapest half-edge collapse is taken from a heap until the face target or error limit is reached.
+        Vertices on open boundaries, UV seams, material borders and colour changes are locked, so seams keep their exact shape.
+    """
+    # Tiny extra cost per squared edge length, so flat regions collapse their shortest edges first instead of piling onto one vertex
+    LengthWeight = 1e-6
+
+    # A collapse is refused if it turns a triangle's normal further than FlipCosine (as a cosine) from its normal before the collapse,
+    # or further than DriftCosine from its normal in the input mesh, which stops small turns adding up over many collapses until the surface folds over
+    # (a landscape with no slope steeper than about 44 degrees can never fold)
+    FlipCosine = 0.2
+    DriftCosine = 0.7
+
+    def __init__(self, targetFaces=None, maxError=None, colourTolerance=0.1, progress=None):
+        """ Initialises the decimator.
+
+            targetFaces         :    Stop once the mesh has this many triangles, defaults to a quarter of the input triangles.
+            maxError            :    Stop before any collapse whose quadric error is above this (optional).
+            colourTolerance     :    Vertices whose colour differs from a neighbour's by more than this are locked.
+            progress            :    Function called as progress(fraction, status) while decimating (optional).
+        """
+        self.TargetFaces = targetFaces
+        self.MaxError = maxError
+        self.ColourTolerance = colourTolerance
+        self.Progress = progress
+
+    def Triangulate(self, buffers):
+        """ Fan triangulate every face of the buffers.
+
+            - Returns the (T, 3) corner vertices, the (T, 3) corner UV ids (or None) and the face each triangle came from.
+        """
+        counts = buffers.PolyFaces.astype(np.int64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        faceOfTriangle = np.repeat(np.arange(len(counts)), counts - 2)
+        # Triangle k of a face joins its first corner to corners k+1 and k+2
+        k = np.arange(len(faceOfTriangle)) - np.repeat(np.cumsum(counts - 2) - (counts - 2), counts - 2)
+        cornerIndices = np.stack((starts[faceOfTriangle], starts[faceOfTriangle] + k + 1, starts[faceOfTriangle] + k + 2), axis=1)
+        triangles = buffers.PolygonConnects[cornerIndices]
+        uvs = buffers.UVIds[cornerIndices] if buffers.UVIds is not None else None
+        return triangles, uvs, faceOfTriangle
+
+    def Decimate(self, buffers):
+        """ Simplify MeshBuffers.
+
+            buffers             :    The MeshBuffers to simplify, faces of any size, with face materials (wire tracks) or vertex colours (landscapes) if they have them.
+
+            - Returns new MeshBuffers of the same class, of triangles.
+        """
+        triangles, uvs, faceOfTriangle = self.Triangulate(buffers)
+        faceMaterials = buffers.FaceMaterials
+        colours = buffers.Colours
+        materials = faceMaterials[faceOfTriangle] if faceMaterials is not None else np.zeros(len(triangles), dtype=np.int32)
+        points = buffers.Vertices
+        vertexCount = len(points)
+        triangleCount = len(triangles)
+        targetFaces = self.TargetFaces if self.TargetFaces is not None else triangleCount // 4
+        maxError = self.MaxError if self.MaxError is not None else np.inf
+
+        # Half-edge arrays, next(h) = 3*(h//3) + (h+1)%3
+        origin = triangles.ravel().copy()
+        destination = triangles[:, [1, 2, 0]].ravel()
+        cornerUVs = uvs.ravel().copy() if uvs is not None else None
+        twin = np.full(len(origin), -1, dtype=np.int64)
+        edgeKeys = np.minimum(origin, destination) * vertexCount + np.maximum(origin, destination)
+        order = np.argsort(edgeKeys, kind="stable")
+        sortedKeys = edgeKeys[order]
+        keyStarts = np.flatnonzero(np.concatenate(([True], sortedKeys[1:] != sortedKeys[:-1])))
+        keyCounts = np.diff(np.concatenate((keyStarts, [len(order)])))
+        pairs = keyStarts[keyCounts == 2]
+        twin[order[pairs]] = order[pairs + 1]
+        twin[order[pairs + 1]] = order[pairs]
+
+        # Lock boundary and non-manifold edges, then seams where the two faces of an edge disagree on UVs or material, or its ends on colour
+        locked = np.zeros(vertexCount, dtype=bool)
+        open_ = keyStarts[keyCounts != 2]
+        locked[origin[order[open_]]] = True
+        locked[destination[order[open_]]] = True
+        boundary = locked.copy()
+        paired = np.flatnonzero(twin >= 0)
+        partner = twin[paired]
+        seam = materials[paired // 3] != materials[partner // 3]
+        if(cornerUVs is not None):
+            nextOfPaired = 3 * (paired // 3) + (paired + 1) % 3
+            nextOfPartner = 3 * (partner // 3) + (partner + 1) % 3
+            seam |= (cornerUVs[paired] != cornerUVs[nextOfPartner]) | (cornerUVs[nextOfPaired] != cornerUVs[partner])
+        if(colours is not None):
+            seam |= np.abs(colours[origin[paired]] - colours[destination[paired]]).max(axis=1) > self.ColourTolerance
+        locked[origin[paired[seam]]] = True
+
+        # Lock vertices whose faces do not form one fan (a fan walk from one half-edge misses some)
+        valence = np.bincount(origin, minlength=vertexCount)
+        outgoing = np.full(vertexCount, -1, dtype=np.int64)
+        outgoing[origin] = np.arange(len(origin))
+        for vertex in np.flatnonzero(~locked & (valence > 0)):
+            if(len(self.Fan(outgoing[vertex], twin)) != valence[vertex]):
+                locked[vertex] = True
+
+        # Area weighted plane quadrics summed onto each vertex
+        a, b, c = points[triangles[:, 0]], points[triangles[:, 1]], points[triangles[:, 2]]
+        normals = np.cross(b - a, c - a)
+        areas = np.linalg.norm(normals, axis=1)
+        planes = np.zeros((triangleCount, 4))
+        valid = areas > 0
+        planes[valid, :3] = normals[valid] / areas[valid, np.newaxis]
+        # The unit normal of each input triangle, zero for those with no area, which are not checked for turning
+        originalNormals = planes[:, :3].copy()
+        planes[:, 3] = -np.einsum("ij,ij->i", planes[:, :3], a)
+        faceQuadrics = planes[:, :, np.newaxis] * planes[:, np.newaxis, :] * (0.5 * areas)[:, np.newaxis, np.newaxis]
+        quadrics = np.zeros((vertexCount, 4, 4))
+        for corner in range(3):
+            np.add.at(quadrics, triangles[:, corner], faceQuadrics)
+
+        alive = np.ones(triangleCount, dtype=bool)
+        versions = np.zeros(vertexCount, dtype=np.int64)
+        stamp = 0
+        candidates = np.flatnonzero((twin >= 0) & ~locked[origin])
+        heap = [(cost, h, 0, 0) for cost, h in zip(self.Costs(candidates, origin, destination, quadrics, points).tolist(), candidates.tolist())]
+        heapq.heapify(heap)
+
+        liveFaces = triangleCount
+        while(heap and liveFaces > targetFaces):
+            cost, h, originVersion, destinationVersion = heapq.heappop(heap)
+            if(cost > maxError):
+                break
+            u, v = origin[h], destination[h]
+            if(not alive[h // 3] or versions[u] != originVersion or versions[v] != destinationVersion):
+                continue
+            if(not self.Collapse(h, origin, destination, twin, outgoing, cornerUVs, alive, points, originalNormals, boundary)):
+                continue
+            liveFaces -= 2
+            quadrics[v] += quadrics[u]
+            if(self.Progress is not None and liveFaces % 1000 < 2):
+                self.Progress((triangleCount - liveFaces) / max(triangleCount - targetFaces, 1), "Decimating")
+
+            # Only costs involving v changed, a fresh stamp drops every older heap entry for u and v
+            stamp += 1
+            versions[u] = versions[v] = stamp
+            fan = np.array(self.Fan(outgoing[v], twin))
+            halfEdges = np.concatenate((fan, twin[fan]))
+            halfEdges = halfEdges[halfEdges >= 0]
+            halfEdges = halfEdges[~locked[origin[halfEdges]]]
+            for cost, halfEdge in zip(self.Costs(halfEdges, origin, destination, quadrics, points).tolist(), halfEdges.tolist()):
+                heapq.heappush(heap, (cost, halfEdge, versions[origin[halfEdge]], versions[destination[halfEdge]]))
+
+        # Compact the surviving triangles and the vertices and UVs they use
+        liveHalfEdges = np.flatnonzero(np.repeat(alive, 3))
+        usedVertices, connects = np.unique(origin[liveHalfEdges], return_inverse=True)
+        uValues = vValues = uvIds = None
+        if(cornerUVs is not None):
+            usedUVs, uvIds = np.unique(cornerUVs[liveHalfEdges], return_inverse=True)
+            uValues, vValues = buffers.UValues[usedUVs], buffers.VValues[usedUVs]
+        arrays = {"vertices" : points[usedVertices], "polyFaces" : np.full(int(alive.sum()), 3), "polygonConnects" : connects, 
+                  "uValues" : uValues, "vValues" : vValues, "uvIds" : uvIds, "normals" : buffers.Normals[usedVertices] if buffers.Normals is not None else None}
+        if(faceMaterials is not None):
+            arrays["faceMaterials"] = materials[alive]
+        if(colours is not None):
+            arrays["colours"] = colours[usedVertices]
+        return type(buffers)(**arrays)
+
+    def Fan(self, start, twin):
+        """ Return the outgoing half-edges around a vertex, walking from one of them until the fan closes, or both ways to the boundary. """
+        fan = [start]
+        h = twin[3 * (start // 3) + (start + 2) % 3]
+        while(h >= 0 and h != start):
+            fan.append(h)
+            h = twin[3 * (h // 3) + (h + 2) % 3]
+        if(h < 0):
+            h = twin[start]
+            while(h >= 0):
+                h = 3 * (h // 3) + (h + 1) % 3
+                fan.append(h)
+                h = twin[h]
+        return fan
+
+    def Costs(self, halfEdges, origin, destination, quadrics, points):
+        """ Return the quadric error of collapsing each half-edge, moving its origin onto its destination. """
+        u, v = origin[halfEdges], destination[halfEdges]
+        homogeneous = np.hstack((points[v], np.ones((len(v), 1))))
+        costs = np.einsum("ij,ijk,ik->i", homogeneous, quadrics[u] + quadrics[v], homogeneous)
+        return costs + self.LengthWeight * np.sum((points[u] - points[v]) ** 2, axis=1)
+
+    def Collapse(self, h, origin, destination, twin, outgoing, cornerUVs, alive, points, originalNormals, boundary):
+        """ Collapse half-edge h if the result stays manifold and no triangle flips over, turns too far from its input normal, or spans an open boundary.
+
+            - Returns True if the edge was collapsed.
+        """
+        u, v = origin[h], destination[h]
+        opposite = twin[h]
+        fanU = self.Fan(outgoing[u], twin)
+        fanV = self.Fan(outgoing[v], twin)
+
+        # Link condition, u and v may only share the two vertices opposite the edge
+        if(len(set(destination[fanU].tolist()) & set(destination[fanV].tolist())) != 2):
+            return False
+
+        # Triangles that move with u must not flip, collapse to nothing, or drift too far from the way they faced in the input
+        moved = np.array([e for e in fanU if e // 3 != h // 3 and e // 3 != opposite // 3], dtype=np.int64)
+        b = points[destination[moved]]
+        c = points[destination[3 * (moved // 3) + (moved + 1) % 3]]
+        before = np.cross(b - points[u], c - points[u])
+        after = np.cross(b - points[v], c - points[v])
+        lengths = np.linalg.norm(after, axis=1)
+        if(np.any(lengths == 0) or np.any(np.einsum("ij,ij->i", before, after) <= self.FlipCosine * np.linalg.norm(before, axis=1) * lengths)):
+            return False
+        original = originalNormals[moved // 3]
+        if(np.any((np.einsum("ij,ij->i", original, after) <= self.DriftCosine * lengths) & np.any(original != 0, axis=1))):
+            return False
+        # A triangle with every corner on an open boundary would stand across it as a flap (vertical at the edge of a landscape)
+        if(boundary[v] and np.any(boundary[destination[moved]] & boundary[destination[3 * (moved // 3) + (moved + 1) % 3]])):
+            return False
+
+        # The UV of v on the side of the collapsed edge carries onto the corners that were u
+        vUV = cornerUVs[3 * (h // 3) + (h + 1) % 3] if cornerUVs is not None else None
+
+        # Stitch the outer edges of the two removed triangles together
+        for removed in (h, opposite):
+            t = removed // 3
+            nextEdge = 3 * t + (removed + 1) % 3
+            previousEdge = 3 * t + (removed + 2) % 3
+            outer1, outer2 = twin[nextEdge], twin[previousEdge]
+            if(outer1 >= 0):
+                twin[outer1] = outer2
+            if(outer2 >= 0):
+                twin[outer2] = outer1
+            # The third corner keeps an outgoing half-edge in a live triangle
+            outgoing[origin[previousEdge]] = outer1 if outer1 >= 0 else 3 * (outer2 // 3) + (outer2 + 1) % 3
+            alive[t] = False
+
+        # Every corner left on u moves onto v
+        for e in fanU:
+            if(alive[e // 3]):
+                origin[e] = v
+                previousEdge = 3 * (e // 3) + (e + 2) % 3
+                destination[previousEdge] = v
+                if(cornerUVs is not None):
+                    cornerUVs[e] = vUV
+        outgoing[v] = twin[3 * (h // 3) + (h + 2) % 3]
+        return True
+
+
+class GeometryCache():
+    """ A content-addressed on-disk cache of generated mesh buffers.
+        Entries are named by a hash of the full generator arguments and evicted least recently used first once the cache is over its size cap.
+        Several processes (a maya session and the geometry worker, say) may share one cache folder.
+    """
+    # Bump when a generator changes what it builds, so old entries are not reused
+    Version = 3
+
+    # The arrays every cached mesh has, see MeshBuffers.ToArrays
+    MeshArrays = ("vertices", "polyFaces", "polygonConnects")
+
+    def __init__(self, directory=None, maxBytes=512 * 1024 * 1024):
+        """ Initialises the cache.
+
+            directory   :    The folder to store cached buffers in, defaults to a folder in the system temp directory.
+            maxBytes    :    The size the cache is trimmed back to after each store.
+        """
+        self.Directory = directory if directory is not None else os.path.join(tempfile.gettempdir(), "BallAnimationTools_GeometryCache")
+        self.MaxBytes = maxBytes
+
+    def Key(self, generator, arguments):
+        """ Return the hash naming the buffers generated by a generator with a set of arguments. """
+        description = json.dumps({"generator" : generator, "version" : self.Version, "arguments" : arguments}, sort_keys=True, default=str)
+        return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+    def Path(self, key):
+        """ Return the file path of a cache entry. """
+        return os.path.join(self.Directory, key + ".npz")
+
+    def Load(self, key, names=MeshArrays):
+        """ Load the arrays stored under a key, marking them as recently used.
+
+            key         :    The key of the entry.
+            names       :    The arrays the entry must hold to be usable.
+
+            - Returns a dictionary of arrays, or None if there is no usable entry.
+        """
+        path = self.Path(key)
+        if(not os.path.isfile(path)):
+            return None
+        try:
+            with np.load(path) as data:
+                arrays = {name : data[name] for name in data.files}
+            if(any(name not in arrays for name in names)):
+                raise KeyError("missing arrays")
+            os.utime(path, None)
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile):
+            # Unreadable or incomplete entry, drop it and rebuild (another process may have dropped it already)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return arrays
+
+    def Store(self, key, arrays):
+        """ Store a dictionary of arrays under a key, then evict old entries if the cache is over its size cap. """
+        os.makedirs(self.Directory, exist_ok=True)
+        # Write to a temporary file of this store's own first, so a half written entry is never loaded and two processes storing the same key do not collide
+        handle, temporaryPath = tempfile.mkstemp(suffix=".tmp.npz", dir=self.Directory)
+        try:
+            with os.fdopen(handle, "wb") as temporaryFile:
+                np.savez_compressed(temporaryFile, **arrays)
+            os.replace(temporaryPath, self.Path(key))
+        except BaseException:
+            # A failed remove must not hide the error that stopped the write
+            try:
+                os.remove(temporaryPath)
+            except OSError:
+                pass
+            raise
+        self.Evict()
+
+    def Evict(self):
+        """ Delete the least recently used entries until the cache is under its size cap. """
+        entries = []
+        for name in os.listdir(self.Directory):
+            if(name.endswith(".npz") and not name.endswith(".tmp.npz")):
+                try:
+                    stat = os.stat(os.path.join(self.Directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        totalBytes = sum(entry[1] for entry in entries)
+        for modified, size, name in entries:
+            if(totalBytes <= self.MaxBytes):
+                break
+            try:
+                os.remove(os.path.join(self.Directory, name))
+            except OSError:
+                pass
+            totalBytes -= size
+
+    def Clear(self):
+        """ Delete every entry in the cache. """
+        if(os.path.isdir(self.Directory)):
+            for name in os.listdir(self.Directory):
+                if(name.endswith(".npz")):
+                    os.remove(os.path.join(self.Directory, name))
+
+
+class BuildCancelled(Exception):
+    """ Raised inside a build running on a BuildTask when the user cancels it. """
+    pass
+
+class BuildTask():
+    """ Runs the geometry work of a build on a worker thread, with its progress shown in a small window with a cancel button.
+        Maya is not thread safe, so the worker only computes buffers, and its result is committed to the scene on the main thread through maya.utils.executeDeferred.
+    """
+    def __init__(self, title, work, commit, finished=None):
+        """ Initialises the task.
+
+            title       :    The title of the progress window.
+            work        :    Function run on the worker thread, taking the task's Progress function and returning the result to commit.
+            commit      :    Function run on the main thread with the result of work, which creates the scene nodes.
+            finished    :    Function run on the main thread once the task is over, after any commit, whether it was committed, cancelled or failed (optional).
+        """
+        self.Title = title
+        self.Work = work
+        self.Commit = commit
+        self.Finished = finished
+        self.Cancelled = threading.Event()
+        self.Fraction = 0.0
+        self.Status = "Starting"
+        self.ShownFraction = -1.0
+        self.Window = None
+
+    def Start(self):
+        """ Open the progress window and start the work on a worker thread, returning straight away. """
+        self.Window = cmds.window(title=self.Title, widthHeight=(300, 90), sizeable=False)
+        cmds.columnLayout(adjustableColumn=True, rowSpacing=5)
+        self.StatusText = cmds.text(label=self.Status, align="left")
+        self.ProgressBar = cmds.progressBar(maxValue=100, width=280)
+        cmds.button(label="Cancel", command=self.Cancel)
+        cmds.showWindow(self.Window)
+        threading.Thread(target=self.Run, name=self.Title, daemon=True).start()
+
+    def Cancel(self, *_):
+        """ Ask the worker to stop at its next progress report. """
+        self.Cancelled.set()
+        cmds.text(self.StatusText, e=True, label="Cancelling...")
+
+    def Progress(self, fraction, status):
+        """ Report progress from the worker thread, raising BuildCancelled if the user has cancelled. """
+        if(self.Cancelled.is_set()):
+            raise BuildCancelled()
+        self.Fraction = fraction
+        self.Status = status
+        # Only queue a window update for every whole percent, so the main thread is not flooded
+        if(abs(fraction - self.ShownFraction) >= 0.01):
+            self.ShownFraction = fraction
+            mayaUtils.executeDeferred(self.UpdateWindow)
+
+    def UpdateWindow(self):
+        """ Show the latest progress in the window (main thread). """
+        if(self.Window is not None and cmds.window(self.Window, exists=True) and not self.Cancelled.is_set()):
+            cmds.progressBar(self.ProgressBar, e=True, progress=int(self.Fraction * 100))
+            cmds.text(self.StatusText, e=True, label=self.Status)
+
+    def Run(self):
+        """ Do the work on the worker thread, then hand the result (or failure) back to the main thread. """
+        result, error = None, None
+        try:
+            result = self.Work(self.Progress)
+        except BuildCancelled:
+            pass
+        except Exception as exception:
+            error = exception
+        mayaUtils.executeDeferred(self.Finish, result, error)
+
+    def Finish(self, result, error):
+        """ Close the window and commit the result, then report the task over (main thread), so no other build starts while the commit is still queued. """
+        try:
+            if(self.Window is not None and cmds.window(self.Window, exists=True)):
+                cmds.deleteUI(self.Window)
+            if(error is not None):
+                print("ABORT: Build failed, %s" % error)
+            elif(self.Cancelled.is_set()):
+                print("Build cancelled.")
+            else:
+                self.Commit(result)
+        finally:
+            if(self.Finished is not None):
+                self.Finished()
+
+
+class MeshGenerator():
+    """ The scene side shared by the wire track and landscape generators, which subclass it with their Calibrated flag and CalibrateCostModel. """
+    def __init__(self):
+        """ Initialises the generator, its geometry cache and material registry. """
+        self.Cache = GeometryCache()
+        self.Materials = MaterialRegistry()
+        self.Task = None
+        # The progress function of the BuildTask running on each thread, so builds on other threads never report to it
+        self.TaskProgress = threading.local()
+
+    def ReportProgress(self, fraction, status):
+        """ Report the progress of a build to the BuildTask running it on this thread, if there is one. Raises BuildCancelled if the user has cancelled it. """
+        progress = getattr(self.TaskProgress, "Progress", None)
+        if(progress is not None):
+            progress(fraction, status)
+
+    def Run(self, title, work, commit, background = False):
+        """ Run a build, either straight through or with its work on a BuildTask worker thread and only the commit on the main thread.
+
+            title           :    The title of the progress window.
+            work            :    Function building the buffers without touching maya, returning -1 if the parameters are not valid.
+            commit          :    Function creating the scene nodes from the result of work.
+            background      :    Boolean, whether to run the work on a worker thread and return straight away.
+
+            - Returns the result of commit (None when running in the background), or -1 if the build could not run.
+        """
+        # The cost model is measured on the first build of the session, with the build's own work (so on the worker thread in the background)
+        def calibratedWork():
+            if(not self.Calibrated):
+                self.CalibrateCostModel()
+            return work()
+
+        if(not background):
+            result = calibratedWork()
+            return -1 if result == -1 else commit(result)
+
+        if(self.Task is not None):
+            print("ABORT: A build is already running.")
+            return -1
+        def taskWork(progress):
+            self.TaskProgress.Progress = progress
+            try:
+                return calibratedWork()
+            finally:
+                self.TaskProgress.Progress = None
+        # The task is only over once its commit has run, so no second build starts while it is still queued
+        def taskFinished():
+            self.Task = None
+        self.Task = BuildTask(title, taskWork, lambda result: -1 if result == -1 else commit(result), taskFinished)
+        self.Task.Start()
+
+    def CreateLODGroup(self, meshNames, distances, name):
+        """ Group meshes under a maya LOD group, finest first, switching to each next mesh beyond the matching camera distance.
+
+            meshNames       :    The mesh transforms, from the most to the least detailed.
+            distances       :    The camera distances between each level, one fewer than the meshes.
+            name            :    The name of the LOD group node.
+
+            - Returns the name of the LOD group.
+        """
+        group = cmds.createNode("lodGroup", name=name)
+        for i, meshName in enumerate(meshNames):
+            child = cmds.parent(meshName, group)[0]
+            cmds.connectAttr("%s.output[%d]" % (group, i), child + ".lodVisibility", force=True)
+        for i, distance in enumerate(distances):
+            cmds.setAttr("%s.threshold[%d]" % (group, i), distance)
+        # The group measures its distance from the perspective camera
+        if(cmds.objExists("persp")):
+            cmds.connectAttr("persp.worldMatrix[0]", group + ".cameraMatrix", force=True)
+        return group
+
+
+class AnimationBaker():
+    """ Writes whole arrays of animation keys onto attributes in one MFnAnimCurve.addKeys call each. 
+        A looping motion is keyed for a single cycle and repeated by the curves' infinity, so its key count does not grow with the shot length.
+    """
+    def __init__(self):
+        """ Initialises the baker (does nothing). """
+        pass
+
+    def FramesPerSecond(self):
+        """ Return the frames per second of the current scene time unit. """
+        return om.MTime(1.0, om.MTime.kSeconds).asUnits(om.MTime.uiUnit())
+
+    def BakeAttributes(self, node, frames, attributeValues, cycle=False, tolerance=1e-6):
+        """ Key a set of attributes on a node at the given frames, replacing any keys already there.
+
+            node            :    The name of the node to key.
+            frames          :    Array of frame numbers to key at.
+            attributeValues :    Dictionary of attribute name to an array of values, one per frame (rotations in radians).
+            cycle           :    Boolean, whether the keys are one cycle of a loop to repeat before and after them. Each curve cycles if its attribute 
+                                 ends where it started, or cycles with offset if it travels on (such as the roll of the ball).
+            tolerance       :    How close the last value must be to the first for a curve to cycle without offset.
+
+            -No return
+        """
+        selection = om.MSelectionList()
+        selection.add(node)
+        nodeFn = om.MFnDependencyNode(selection.getDependNode(0))
+
+        unit = om.MTime.uiUnit()
+        times = om.MTimeArray([om.MTime(frame, unit) for frame in np.asarray(frames, dtype=np.float64).tolist()])
+
+        for attribute, values in attributeValues.items():
+            plug = nodeFn.findPlug(attribute, False)
+            curveFn = oma.MFnAnimCurve()
+            # Reuse an existing curve on the plug, otherwise make a new one
+            existing = oma.MAnimUtil.findAnimation(plug)
+            if(len(existing) > 0):
+                curveFn.setObject(existing[0])
+            else:
+                curveFn.create(plug)
+            values = np.asarray(values, dtype=np.float64)
+            curveFn.addKeys(times, values.tolist(), keepExistingKeys=False)
+
+            # Repeat the cycle either side of the keys, otherwise hold the end values as a fresh curve would
+            if(not cycle):
+                infinity = oma.MFnAnimCurve.kConstant
+            elif(abs(values[-1] - values[0]) <= tolerance):
+                infinity = oma.MFnAnimCurve.kCycle
+            else:
+                infinity = oma.MFnAnimCurve.kCycleRelative
+            curveFn.setPreInfinityType(infinity)
+            curveFn.setPostInfinityType(infinity)
+
+    def Resample(self, values, frames):
+        """ Sample per-frame values between the frames, through a Catmull-Rom spline of the four frames around each sample.
+
+            values          :    Array of shape (frames, ...) of the values on every frame.
+            frames          :    Array of the frames to sample at, counted from the first, which may be fractional.
+
+            - Returns the array of shape (len(frames), ...) of the sampled values, matching values exactly on whole frames.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        frames = np.asarray(frames, dtype=np.float64)
+        last = len(values) - 1
+        index = np.clip(np.floor(frames).astype(np.int64), 0, max(last - 1, 0))
+        t = (frames - index).reshape((-1,) + (1,) * (values.ndim - 1))
+        p0, p1, p2, p3 = [values[np.clip(index + k, 0, last)] for k in (-1, 0, 1, 2)]
+        return p1 + 0.5 * t * ((p2 - p0) + t * ((2 * p0 - 5 * p1 + 4 * p2 - p3) + t * (3 * (p1 - p2) + p3 - p0)))
+
+    def ReturnFrames(self, distances, lapLength=None):
+        """ Find when a motion first gets back to where it started, heading the same way, to a fraction of a frame.
+
+            distances       :    Array of how far the motion has travelled on every frame (such as the distance a ball has rolled), negative going backwards.
+            lapLength       :    The length of one lap of a closed track, so coming round again counts as getting back to the start.
+
+            - Returns the sorted list of the frames, counted from the first, of the first return through the start and round each whole lap.
+        """
+        travelled = np.asarray(distances, dtype=np.float64) - distances[0]
+        steps = np.diff(travelled)
+        moving = np.flatnonzero(np.abs(steps) > 1e-12)
+        if(len(moving) == 0):
+            return []
+        direction = np.sign(steps[moving[0]])
+        targets = [0.0]
+        if(lapLength):
+            targets += [direction * lap * lapLength for lap in range(1, int(np.abs(travelled).max() / lapLength) + 1)]
+
+        frames = []
+        for target in targets:
+            offset = direction * (travelled - target)
+            crossings = np.flatnonzero((offset[:-1] < 0) & (offset[1:] >= 0))
+            if(len(crossings) == 0):
+                continue
+            k = crossings[0]
+            frame = k - offset[k] / (offset[k + 1] - offset[k])
+            # Home in on the crossing along the spline, as the motion may speed up or slow down within the frame
+            for _ in range(4):
+                here, ahead = self.Resample(travelled, [frame, frame + 1e-4])
+                if(ahead == here):
+                    break
+                frame = min(max(frame - (here - target) * 1e-4 / (ahead - here), k), k + 1)
+            frames.append(float(frame))
+        return sorted(frames)
+
+    def DetectPeriod(self, values, tolerance=1e-3, maxPeriod=None, distances=None, lapLength=None):
+        """ Find the period after which a sampled motion repeats, allowing each channel to drift by a fixed amount per cycle.
+            Whole numbers of frames are tried, unless distances are given, when the periods tried are the (fractional) frames the motion gets back to its start.
+
+            values          :    Array of shape (frames, ...) of the values of each channel on every frame.
+            tolerance       :    How far a channel may stray from repeating exactly.
+            maxPeriod       :    The longest period to test, defaults to half the frames so at least two cycles are seen, or with distances to any period 
+                                 that leaves a few frames to compare.
+            distances       :    Array of how far the motion has travelled on every frame, see ReturnFrames.
+            lapLength       :    The length of one lap of a closed track, see ReturnFrames.
+
+            - Returns the period in frames, or None if the motion does not repeat.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+        if(distances is None):
+            if(maxPeriod is None):
+                maxPeriod = len(values) // 2
+            periods = range(1, min(maxPeriod, len(values) - 1) + 1)
+        else:
+            periods = [period for period in self.ReturnFrames(distances, lapLength) if maxPeriod is None or period <= maxPeriod]
+
+        for period in periods:
+            # Compare each frame with the frame one period on, as far as the spline has all four of its frames there
+            last = len(values) - 1 if period == int(period) else len(values) - 3
+            frames = np.arange(0.0, last - period + 1e-9)
+            if(len(frames) < 2):
+                break
+            drift = self.Resample(values, frames + period) - values[:len(frames)]
+            if(np.all(np.abs(drift - drift[0]) <= tolerance)):
+                return period
+        return None
+
+    def PhaseCopies(self, node, period, count):
+        """ Duplicate a node keyed with one cycle, together with its animation curves, into copies spread evenly through the cycle.
+
+            node            :    The name of the keyed node.
+            period          :    The length of the cycle in frames.
+            count           :    The number of nodes wanted in all, including the original.
+
+            - Returns the names of the copies, each running the cycle period / count frames ahead of the one before.
+        """
+        return self.KeyedCopies(node, [-float(period) * copy / count for copy in range(1, count)])
+
+    def KeyedCopies(self, node, offsets):
+        """ Duplicate a keyed node, together with its animation curves, into copies whose keys are moved in time.
+
+            node            :    The name of the keyed node.
+            offsets         :    The number of frames each copy runs behind the node (negative to run ahead), which need not be whole.
+
+            - Returns the names of the copies.
+        """
+        copies = []
+        for offset in offsets:
+            name = cmds.duplicate(node, upstreamNodes=True)[0]
+            cmds.keyframe(name, edit=True, relative=True, timeChange=float(offset))
+            copies.append(name)
+        return copies
+
+    def TimeOffsetCopies(self, node, attributes, offsets, name="Copy"):
+        """ Make instances of a keyed node that replay its animation some frames later, through frameCache nodes rather than copies of its keys.
+            Each copy shares the node's shape and costs one frameCache per attribute, whatever the number of keys.
+
+            node            :    The name of the keyed transform.
+            attributes      :    The names of the keyed attributes to replay.
+            offsets         :    The number of frames each copy runs behind the node (negative to run ahead), which need not be whole.
+            name            :    The name of the copies.
+
+            - Returns the names of the copies.
+        """
+        def CachePlug(cache, frames):
+            # The cache's value from a whole number of frames before the scene time, or after it if negative
+            return "%s.%s[%d]" % (cache, "past" if frames >= 0 else "future", abs(frames))
+
+        copies = []
+        for offset in offsets:
+            # frameCache only plays back whole frames, so a fractional offset blends the two whole frames either side of it
+            wholeFrames = int(np.floor(offset))
+            fraction = float(offset) - wholeFrames
+            copy = cmds.instance(node, n=name)[0]
+            for attribute in attributes:
+                # The cache plays the node's value back from the past (or the future) of the scene time
+                cache = cmds.createNode("frameCache", n="%s_%s_frameCache" % (copy, attribute))
+                cmds.connectAttr("%s.%s" % (node, attribute), cache + ".stream")
+                cmds.connectAttr("time1.outTime", cache + ".varyTime")
+                if(fraction < 1e-6):
+                    cmds.connectAttr(CachePlug(cache, wholeFrames), "%s.%s" % (copy, attribute))
+                else:
+                    blend = cmds.createNode("blendTwoAttr", n="%s_%s_blend" % (copy, attribute))
+                    cmds.connectAttr(CachePlug(cache, wholeFrames), blend + ".input[0]")
+                    cmds.connectAttr(CachePlug(cache, wholeFrames + 1), blend + ".input[1]")
+                    cmds.setAttr(blend + ".attributesBlender", fraction)
+                    cmds.connectAttr(blend + ".output", "%s.%s" % (copy, attribute))
+            copies.append(copy)
+        return copies
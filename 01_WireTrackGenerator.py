@@ -10,16 +10,524 @@
         annooshukla, 2017. Autodesk, Create mesh from list - Autodesk Community - Maya [Online] Available at: https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371 [Accessed 12 2021]
 """
 
-import maya.cmds as cmds
-import maya.api.OpenMaya as om
-import maya.OpenMaya as om1
 import math as maths
+import numpy as np
+import importlib
+import os
+import sys
+import time
+
+# The shared core is imported by its file name (which starts with digits, so no import statement can name it), from the folder of this script or the python path
+scriptFolder = os.path.dirname(os.path.abspath(__file__)) if "__file__" in globals() else os.getcwd()
+if(scriptFolder not in sys.path):
+    sys.path.append(scriptFolder)
+core = importlib.import_module("00_GeometryCore")
+
+# The classes shared with the other generator script
+LazyModule = core.LazyModule
+GeometryCache = core.GeometryCache
+MeshDecimator = core.MeshDecimator
+BuildCancelled = core.BuildCancelled
+BuildTask = core.BuildTask
+AnimationBaker = core.AnimationBaker
+MaterialRegistry = core.MaterialRegistry
+CostEstimate = core.CostEstimate
+MeshGenerator = core.MeshGenerator
+
+# Maya is only imported once a generator or the UI first calls into it
+cmds = LazyModule("maya.cmds")
+om = LazyModule("maya.api.OpenMaya")
+om1 = LazyModule("maya.OpenMaya")
+mayaUtils = LazyModule("maya.utils")
+
+
+class TrackPath():
+    """ The centreline of a generated track, resampled to even arc-length steps so it can be sampled by distance with a table lookup. """
+    def __init__(self, points, ups=None, closed=False, supportRadius=0.0, lookupSamples=2048):
+        """ Builds the arc-length lookup table from a dense polyline.
+
+            points          :    Array of (x, y, z) points along the centreline, in order.
+            ups             :    Array of track up vectors (from the rails towards the ball) for each point, defaults to +Y.
+            closed          :    Boolean, whether the centreline is a closed loop (distances wrap around rather than clamp).
+            supportRadius   :    The distance from the centreline to the rail surface the ball rests on.
+            lookupSamples   :    The number of evenly spaced arc-length samples to store in the lookup table.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if(ups is None):
+            ups = np.tile((0.0, 1.0, 0.0), (len(points), 1))
+        ups = np.asarray(ups, dtype=np.float64)
+        if(closed):
+            # Close the loop so the last segment returns to the start
+            points = np.vstack((points, points[:1]))
+            ups = np.vstack((ups, ups[:1]))
+
+        # Cumulative arc length of the input polyline
+        pointDistances = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+
+        self.Length = pointDistances[-1]
+        self.Closed = closed
+        self.SupportRadius = supportRadius
+
+        # Tangents and curvature (change in tangent per unit length) on the input points, before resampling flattens them
+        pointTangents = self.Derivative(points, pointDistances)
+        pointTangents /= np.linalg.norm(pointTangents, axis=1)[:, np.newaxis]
+        pointCurvatures = self.Derivative(pointTangents, pointDistances)
+
+        # Resample to an even arc-length table
+        self.Step = self.Length / (lookupSamples - 1)
+        self.Distances = np.linspace(0.0, self.Length, lookupSamples)
+        self.Points = self.Resample(points, pointDistances)
+        self.Ups = self.Resample(ups, pointDistances)
+        self.Ups /= np.linalg.norm(self.Ups, axis=1)[:, np.newaxis]
+        self.Tangents = self.Resample(pointTangents, pointDistances)
+        self.Tangents /= np.linalg.norm(self.Tangents, axis=1)[:, np.newaxis]
+        self.Curvatures = self.Resample(pointCurvatures, pointDistances)
+
+    def Derivative(self, values, distances):
+        """ Differentiate an array of per-point values with respect to arc length, wrapping around closed paths. """
+        if(not self.Closed):
+            return np.gradient(values, distances, axis=0)
+        # The last point repeats the first, so pad with the neighbours across the seam
+        paddedValues = np.vstack((values[-2:-1], values, values[1:2]))
+        paddedDistances = np.concatenate(([distances[0] - (distances[-1] - distances[-2])], distances, [distances[-1] + distances[1]]))
+        return np.gradient(paddedValues, paddedDistances, axis=0)[1:-1]
+
+    def Resample(self, values, distances):
+        """ Linearly resample per-point values onto the even arc-length table. """
+        return np.stack([np.interp(self.Distances, distances, values[:, k]) for k in range(values.shape[1])], axis=1)
+
+    def Lookup(self, distances):
+        """ Find the table index and blend factor for each distance along the path. 
+
+            - Returns the index and fraction arrays.
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        if(self.Closed):
+            distances = np.mod(distances, self.Length)
+        else:
+            distances = np.clip(distances, 0.0, self.Length)
+        f = distances / self.Step
+        index = np.minimum(f.astype(np.int64), len(self.Distances) - 2)
+        return index, (f - index)[..., np.newaxis]
 
+    def Sample(self, distances):
+        """ Sample the path at an array of arc-length distances.
 
-class Generator():
-    def __init__(self):
-        """ Initialises the generator (does nothing). """
-        pass
+            - Returns the positions, unit tangents and unit up vectors, each of shape (..., 3).
+        """
+        index, t = self.Lookup(distances)
+        positions = self.Points[index] * (1 - t) + self.Points[index + 1] * t
+        tangents = self.Tangents[index] * (1 - t) + self.Tangents[index + 1] * t
+        ups = self.Ups[index] * (1 - t) + self.Ups[index + 1] * t
+        tangents /= np.linalg.norm(tangents, axis=-1)[..., np.newaxis]
+        ups /= np.linalg.norm(ups, axis=-1)[..., np.newaxis]
+        return positions, tangents, ups
+
+    def SampleCurvature(self, distances):
+        """ Sample the curvature vector of the path at an array of arc-length distances. """
+        index, t = self.Lookup(distances)
+        return self.Curvatures[index] * (1 - t) + self.Curvatures[index + 1] * t
+
+
+class TrackSimulator():
+    """ Fixed-step simulation of balls rolling along a track centreline under gravity. 
+        All balls are held in one state array and stepped together.
+    """
+    def __init__(self, path, ballRadius=None, gravity=9.8, rollingFriction=0.01, stepsPerFrame=8):
+        """ Initialises the simulator.
+
+            path            :    The TrackPath the balls are constrained to.
+            ballRadius      :    The radius of the balls, defaults to filling the track.
+            gravity         :    The acceleration due to gravity, in maya units per second squared.
+            rollingFriction :    The rolling resistance coefficient, as a fraction of the normal force.
+            stepsPerFrame   :    The number of fixed integration steps taken each frame.
+        """
+        self.Path = path
+        self.BallRadius = ballRadius if (ballRadius is not None and ballRadius > 0) else max(path.SupportRadius, 0.5)
+        self.Gravity = gravity
+        self.RollingFriction = rollingFriction
+        self.StepsPerFrame = max(int(stepsPerFrame), 1)
+
+    def Simulate(self, startDistances, startSpeeds, frameCount, fps=24.0):
+        """ Integrate every ball from its start distance and speed along the track.
+            Balls that lose contact in a loop, or run off the end of an open track, carry on as projectiles.
+
+            startDistances  :    Array of start distances along the track, one per ball.
+            startSpeeds     :    Array of start speeds along the track, one per ball (negative to travel backwards).
+            frameCount      :    The number of frames to record.
+            fps             :    The frames per second of the scene.
+
+            - Returns the positions (frames, balls, 3), roll angles and headings in radians (frames, balls), 
+              and the frame each ball detached on (-1 if it stayed on the track).
+        """
+        path = self.Path
+        s = np.array(startDistances, dtype=np.float64).ravel()
+        v = np.broadcast_to(np.asarray(startSpeeds, dtype=np.float64), s.shape).copy()
+        ballCount = len(s)
+
+        attached = np.ones(ballCount, dtype=bool)
+        freePositions = np.zeros((ballCount, 3))
+        freeVelocities = np.zeros((ballCount, 3))
+        detachFrames = np.full(ballCount, -1, dtype=np.int64)
+        roll = np.zeros(ballCount)
+        heading = np.zeros(ballCount)
+
+        positions = np.zeros((frameCount, ballCount, 3))
+        rolls = np.zeros((frameCount, ballCount))
+        headings = np.zeros((frameCount, ballCount))
+
+        # Solid sphere rolling without slipping only takes 5/7 of the along-track force as linear acceleration
+        rollingScale = 5.0 / 7.0
+        offset = path.SupportRadius - self.BallRadius
+        dt = 1.0 / (fps * self.StepsPerFrame)
+
+        for frame in range(frameCount):
+            for step in range(self.StepsPerFrame + (1 if frame == 0 else 0)):
+                centre, tangents, ups = path.Sample(s)
+                onTrack = centre - ups * offset
+
+                # Record the state at the start of the frame
+                if(step == 0):
+                    heading = np.where(attached, np.arctan2(tangents[:, 0], tangents[:, 2]), heading)
+                    positions[frame] = np.where(attached[:, np.newaxis], onTrack, freePositions)
+                    rolls[frame] = roll
+                    headings[frame] = heading
+                    if(frame == 0):
+                        continue
+
+                # Normal force per unit mass needed to keep the ball on the track, negative means it has lost contact
+                normalForce = v * v * np.einsum("ij,ij->i", path.SampleCurvature(s), ups) + self.Gravity * ups[:, 1]
+
+                # Detach balls that lose contact, or run off the ends of an open track
+                leaving = attached & (normalForce < 0)
+                if(not path.Closed):
+                    leaving |= attached & ((s < 0) | (s > path.Length))
+                if(np.any(leaving)):
+                    freePositions[leaving] = onTrack[leaving]
+                    freeVelocities[leaving] = tangents[leaving] * v[leaving, np.newaxis]
+                    detachFrames[leaving] = frame
+                    attached &= ~leaving
+
+                # Along-track motion: gravity then rolling friction, which can slow but never reverse the ball
+                v = v + (-self.Gravity * tangents[:, 1] * rollingScale) * dt
+                friction = self.RollingFriction * np.abs(normalForce) * dt
+                v = np.sign(v) * np.maximum(np.abs(v) - friction, 0.0)
+                v = np.where(attached, v, 0.0)
+                s = s + v * dt
+                if(path.Closed):
+                    s = np.mod(s, path.Length)
+                roll = roll + v * dt / self.BallRadius
+
+                # Free flight
+                freeVelocities[~attached, 1] -= self.Gravity * dt
+                freePositions[~attached] += freeVelocities[~attached] * dt
+
+        headings = np.unwrap(headings, axis=0)
+        return positions, rolls, headings, detachFrames
+
+
+class CollisionProxy():
+    """ A track stood in for by capsules around the centrelines of its rails and connectors, so contact queries never touch its polygons. 
+        Queries are batched: every point is tested against every capsule as whole arrays, a chunk of points at a time.
+    """
+    def __init__(self, starts, ends, radii, kinds=None):
+        """ Initialises the proxy.
+
+            starts          :    Array of shape (n, 3) of the start of each capsule's centre segment.
+            ends            :    Array of shape (n, 3) of the end of each capsule's centre segment.
+            radii           :    The radius of each capsule, or one radius for them all.
+            kinds           :    Array of what each capsule belongs to, MeshBuffers.Rails or MeshBuffers.Connectors.
+        """
+        self.Starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+        self.Ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+        self.Radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), len(self.Starts)).copy()
+        self.Kinds = np.asarray(kinds, dtype=np.int32) if kinds is not None else np.full(len(self.Starts), MeshBuffers.Rails, dtype=np.int32)
+
+    def Count(self):
+        """ Return the number of capsules. """
+        return len(self.Starts)
+
+    def ClosestPoints(self, points, radius=0.0, chunkElements=1 << 20):
+        """ Find where a batch of balls comes closest to the track.
+
+            points          :    Array of shape (n, 3) of the ball centres.
+            radius          :    The radius of the balls, 0 to query points.
+            chunkElements   :    Roughly how many point and capsule pairs to work on at once, to bound the memory used.
+
+            - Returns the signed distances from each ball's surface to the track (negative where they overlap), the closest points on the track surface, 
+              the unit normals of the track there (pointing towards the balls), and the index of the closest capsule.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        axes = self.Ends - self.Starts
+        lengthsSquared = np.maximum(np.einsum("ij,ij->i", axes, axes), 1e-12)
+        startsAlong = np.einsum("ij,ij->i", self.Starts, axes)
+        startsSquared = np.einsum("ij,ij->i", self.Starts, self.Starts)
+
+        nearest = np.empty(len(points), dtype=np.int64)
+        chunk = max(chunkElements // max(self.Count(), 1), 1)
+        for first in range(0, len(points), chunk):
+            batch = points[first : first + chunk]
+            # Every pair from two matrix products, expanding |p - a - t d|^2 rather than building the (points, capsules, 3) offsets
+            along = batch @ axes.T - startsAlong
+            t = np.clip(along / lengthsSquared, 0.0, 1.0)
+            squared = np.einsum("ij,ij->i", batch, batch)[:, np.newaxis] - 2 * (batch @ self.Starts.T) + startsSquared - 2 * t * along + t * t * lengthsSquared
+            nearest[first : first + chunk] = np.argmin(np.sqrt(np.maximum(squared, 0.0)) - self.Radii, axis=1)
+
+        # Only the closest capsule of each point is worked out in full
+        axes = axes[nearest]
+        t = np.clip(np.einsum("ij,ij->i", points - self.Starts[nearest], axes) / lengthsSquared[nearest], 0.0, 1.0)
+        centres = self.Starts[nearest] + t[:, np.newaxis] * axes
+        distances = np.linalg.norm(points - centres, axis=1) - self.Radii[nearest]
+
+        # Out from the capsule axis towards the ball, any direction across the axis if the ball is centred on it
+        normals = points - centres
+        lengths = np.linalg.norm(normals, axis=1)
+        onAxis = lengths < 1e-12
+        if(np.any(onAxis)):
+            across = np.cross(self.Ends[nearest[onAxis]] - self.Starts[nearest[onAxis]], (0.0, 1.0, 0.0))
+            across[np.linalg.norm(across, axis=1) < 1e-12] = (1.0, 0.0, 0.0)
+            normals[onAxis] = across
+            lengths[onAxis] = np.linalg.norm(across, axis=1)
+        normals /= lengths[:, np.newaxis]
+        return distances - radius, centres + normals * self.Radii[nearest, np.newaxis], normals, nearest
+
+
+class MeshBuffers(core.MeshBuffers):
+    """ The buffers of a wire track mesh, every face of which has a material id. """
+    # Face material ids, in the order of TrackMaterials
+    Rails = 0
+    Connectors = 1
+
+    def __init__(self, vertices, polyFaces, polygonConnects, faceMaterials=None, uValues=None, vValues=None, uvIds=None, normals=None, colours=None):
+        """ Initialises the buffers as core.MeshBuffers does, with faceMaterials defaulting to all rails. """
+        if(faceMaterials is None):
+            faceMaterials = np.full(len(polyFaces), MeshBuffers.Rails)
+        core.MeshBuffers.__init__(self, vertices, polyFaces, polygonConnects, faceMaterials, uValues, vValues, uvIds, normals, colours)
+
+
+class Generator(MeshGenerator):
+    # Lowest each subdivision count may be halved to at the coarser levels of detail
+    LODMinimums = {"lengthSubdivisions" : 1, "circleSubdivisions" : 4, "wireSubdivisions" : 3, "connectorSubdivisions" : 2}
+
+    # (name, colour) of the track materials, indexed by the MeshBuffers face material ids
+    TrackMaterials = [("WireTrackRailBlinn", (0.7, 0.7, 0.75)), ("WireTrackConnectorBlinn", (0.9, 0.6, 0.2))]
+
+    # Seconds per vertex of each buffer builder and of the stages after it, measured on the builders and rescaled by CalibrateCostModel
+    BuildSecondsPerVertex = {"StraightWireTrack" : 7e-6, "CircularWireTrack" : 8e-6, "TrackLayout" : 0.6e-6}
+    WeldSecondsPerVertex = 1.2e-6
+    CommitSecondsPerVertex = 3e-6
+    DecimateSecondsPerTriangle = 160e-6
+
+    # Builds estimated over either budget are refused, or if BudgetAction is "Downscale", built at the first coarser level of detail that fits
+    VertexBudget = 2000000
+    MemoryBudget = 1024 * 1024 * 1024
+    BudgetAction = "Refuse"
+    # Scale from the measured timings to this machine, and whether CalibrateCostModel has measured it this session (it runs on the first build)
+    CostScale = 1.0
+    Calibrated = False
+
+    def BuildCached(self, generator, buildFunction, arguments, useCache=True, targetFaces=None, maxError=None):
+        """ Build mesh buffers, or load them from the geometry cache if they were built before with the same arguments.
+
+            generator       :    The name of the generator, part of the cache key.
+            buildFunction   :    The function that builds the MeshBuffers from the arguments.
+            arguments       :    Dictionary of every argument the buffers depend on.
+            useCache        :    Boolean, whether or not to read and write the cache.
+            targetFaces     :    If given, decimate the buffers down to this many triangles.
+            maxError        :    If given, decimate the buffers until the next collapse would add more quadric error than this.
+
+            - Returns the MeshBuffers, or -1 if the build failed.
+        """
+        decimate = targetFaces is not None or maxError is not None
+        if(useCache):
+            key = self.Cache.Key(generator, dict(arguments, targetFaces=targetFaces, maxError=maxError) if decimate else arguments)
+            arrays = self.Cache.Load(key)
+            if(arrays is not None):
+                return MeshBuffers(**arrays)
+
+        buffers = buildFunction(**arguments)
+        if(decimate and buffers != -1):
+            buffers = MeshDecimator(targetFaces if targetFaces is not None else 0, maxError, progress=self.ReportProgress).Decimate(buffers)
+        if(useCache and buffers != -1):
+            self.Cache.Store(key, buffers.ToArrays())
+        return buffers
+
+    def LevelArguments(self, arguments, level):
+        """ Return a copy of the build arguments for a coarser level of detail, halving each subdivision count per level (down to LODMinimums) 
+            and doubling the layout subdivision length.
+        """
+        levelArguments = dict(arguments)
+        if(level == 0):
+            return levelArguments
+        for name, minimum in self.LODMinimums.items():
+            if(name in levelArguments):
+                levelArguments[name] = max(minimum, levelArguments[name] >> level)
+        if("subdivisionLength" in levelArguments):
+            levelArguments["subdivisionLength"] = arguments["subdivisionLength"] * (2 ** level)
+        return levelArguments
+
+    def CountWire(self, rings, subdivisions, closed, caps):
+        """ Count the buffers of a single wire, as GenSingleWireArc and SweepTube build it.
+
+            rings           :    The number of rings of vertices along the wire.
+            subdivisions    :    The number of vertices around each ring.
+            closed          :    Boolean, whether the last ring joins back onto the first.
+            caps            :    Boolean, whether an open wire is capped.
+
+            - Returns the CostEstimate of the wire, without a time.
+        """
+        segments = rings if closed else rings - 1
+        caps = int(caps and not closed)
+        faces = segments * subdivisions + 2 * caps
+        return CostEstimate(rings * subdivisions, faces, 4 * segments * subdivisions + 2 * subdivisions * caps, (segments + 1) * (subdivisions + 1) + subdivisions * caps, materials=faces)
+
+    def CountBuffers(self, generator, arguments):
+        """ Count the buffers a generator will build from its arguments, before welding.
+
+            - Returns the CostEstimate, without a time, or None if a layout segment is not valid.
+        """
+        wireSubdivisions = arguments["wireSubdivisions"]
+        connectorSubdivisions = arguments["connectorSubdivisions"]
+        connectorClosed = arguments["trackDegrees"] >= 360
+        connectorRings = connectorSubdivisions if connectorClosed else connectorSubdivisions + 1
+        if(generator == "StraightWireTrack"):
+            rails = self.CountWire(arguments["lengthSubdivisions"] + 1, wireSubdivisions, False, arguments["wireCaps"])
+            connectorNumber = arguments["connectorNumber"] + 1
+        elif(generator == "CircularWireTrack"):
+            closed = arguments["degreesToGenerate"] >= 360
+            circleSubdivisions = arguments["circleSubdivisions"]
+            rails = self.CountWire(circleSubdivisions if closed else circleSubdivisions + 1, wireSubdivisions, closed, True)
+            connectorNumber = arguments["connectorNumber"] if closed else arguments["connectorNumber"] + 1
+        else:
+            centreline = self.LayoutCentreline(arguments["segments"], arguments["subdivisionLength"], arguments["weldTolerance"])
+            if(centreline is None):
+                return None
+            centres, closed = centreline[0], centreline[3]
+            rails = self.CountWire(len(centres), wireSubdivisions, closed, arguments["wireCaps"])
+            length = np.linalg.norm(np.diff(np.concatenate((centres, centres[:1])) if closed else centres, axis=0), axis=1).sum()
+            connectorNumber = max(int(length / arguments["connectorSpacing"]), 1) + (0 if closed else 1)
+
+        estimate = CostEstimate()
+        for _ in range(arguments["wireNumber"]):
+            estimate += rails
+        connector = self.CountWire(connectorRings, wireSubdivisions, connectorClosed, True)
+        for _ in range(connectorNumber):
+            estimate += connector
+        return estimate
+
+    def EstimateCost(self, generator, arguments, targetFaces = None, lodLevels = 1):
+        """ Predict the size and build time of every level of detail of a build, without building it.
+
+            generator       :    The name of the generator, "StraightWireTrack", "CircularWireTrack" or "TrackLayout".
+            arguments       :    Dictionary of every argument of the generator's buffer builder.
+            targetFaces     :    If given, the triangles the full detail level is decimated down to.
+            lodLevels       :    The number of levels of detail to build.
+
+            - Returns the CostEstimate summed over the levels, or None if a layout segment is not valid.
+        """
+        estimate = CostEstimate()
+        for level in range(lodLevels):
+            levelArguments = self.LevelArguments(arguments, level)
+            counts = self.CountBuffers(generator, levelArguments)
+            if(counts is None):
+                return None
+            seconds = counts.Vertices * (self.BuildSecondsPerVertex[generator] + self.CommitSecondsPerVertex + (self.WeldSecondsPerVertex if levelArguments["weldTolerance"] > 0 else 0))
+            if(targetFaces is not None):
+                # Decimation triangulates the faces, then collapses down to the target
+                seconds += max(counts.FaceVertices - 2 * counts.Faces - targetFaces // (4 ** level), 0) * self.DecimateSecondsPerTriangle
+            counts.Seconds = seconds * self.CostScale
+            estimate += counts
+        return estimate
+
+    def WithinBudget(self, estimate):
+        """ Return whether an estimate fits both VertexBudget and MemoryBudget. """
+        return estimate.Vertices <= self.VertexBudget and estimate.Bytes() <= self.MemoryBudget
+
+    def BudgetArguments(self, generator, arguments, targetFaces = None, lodLevels = 1):
+        """ Check a build against the vertex and memory budgets before starting it.
+
+            generator       :    The name of the generator.
+            arguments       :    Dictionary of every argument of the generator's buffer builder.
+            targetFaces     :    If given, the triangles the full detail level is decimated down to.
+            lodLevels       :    The number of levels of detail to build.
+
+            - Returns the arguments to build with, downscaled if it is over budget and BudgetAction is "Downscale", or -1 if it is over budget and refused.
+        """
+        estimate = self.EstimateCost(generator, arguments, targetFaces, lodLevels)
+        if(estimate is None or self.WithinBudget(estimate)):
+            return arguments
+
+        if(self.BudgetAction == "Downscale"):
+            level, vertices = 1, estimate.Vertices
+            while(True):
+                levelArguments = self.LevelArguments(arguments, level)
+                levelEstimate = self.EstimateCost(generator, levelArguments, targetFaces, lodLevels)
+                if(self.WithinBudget(levelEstimate)):
+                    print("Downscaled %s by %d levels of detail to fit the budget, %s." % (generator, level, levelEstimate.Summary()))
+                    return levelArguments
+                # Stop once halving the subdivisions no longer makes the track any smaller
+                if(levelEstimate.Vertices >= vertices):
+                    break
+                level, vertices = level + 1, levelEstimate.Vertices
+
+        print("ABORT: %s is over the budget of %d vertices and %.0f MB, %s." % (generator, self.VertexBudget, self.MemoryBudget / (1024.0 * 1024.0), estimate.Summary()))
+        return -1
+
+    def CalibrateCostModel(self, repeats = 3):
+        """ Time a small straight track build on this machine and rescale the cost model of every generator in the session to match it.
+
+            repeats         :    The number of builds to average over.
+
+            - Returns the scale applied to the measured timings.
+        """
+        arguments = {"length" : 15, "lengthSubdivisions" : 200, "wireRadius" : 0.5, "wireSubdivisions" : 12, "trackRadius" : 3.0, "trackDegrees" : 180, 
+                     "wireNumber" : 4, "connectorNumber" : 30, "connectorSubdivisions" : 20, "wireCaps" : True, "weldTolerance" : 1e-4}
+        start = time.perf_counter()
+        for _ in range(repeats):
+            self.BuildStraightWireTrackBuffers(**arguments)
+        measured = (time.perf_counter() - start) / repeats
+        predicted = self.CountBuffers("StraightWireTrack", arguments).Vertices * (self.BuildSecondsPerVertex["StraightWireTrack"] + self.WeldSecondsPerVertex)
+        type(self).CostScale = measured / predicted
+        type(self).Calibrated = True
+        return self.CostScale
+
+    def BuildLevels(self, generator, buildFunction, arguments, useCache = True, targetFaces = None, maxError = None, lodLevels = 1):
+        """ Build the buffers of every level of detail without touching the maya scene.
+
+            generator       :    The name of the generator, part of the cache key.
+            buildFunction   :    The function that builds the MeshBuffers from the arguments.
+            arguments       :    Dictionary of every argument the full detail buffers depend on.
+            useCache        :    Boolean, whether or not to read and write the cache.
+            targetFaces     :    If given, decimate the full detail level down to this many triangles, and each coarser level to a quarter of the one before.
+            maxError        :    If given, decimate each level until the next collapse would add more quadric error than this.
+            lodLevels       :    The number of levels of detail to build, 1 builds a single mesh.
+
+            - Returns the list of MeshBuffers from the most to the least detailed, or -1 if the parameters are not valid.
+        """
+        levels = []
+        for level in range(lodLevels):
+            buffers = self.BuildCached(generator, buildFunction, self.LevelArguments(arguments, level), useCache, targetFaces // (4 ** level) if targetFaces is not None else None, maxError)
+            if(buffers == -1):
+                return -1
+            levels.append(buffers)
+        return levels
+
+    def CommitLevels(self, generator, levels, lodDistances = None):
+        """ Create a mesh for each level of detail, grouped under a LOD group if there is more than one level.
+
+            generator       :    The name of the generator, the LOD group is named generator + "_LOD".
+            levels          :    The list of MeshBuffers from BuildLevels.
+            lodDistances    :    The camera distances at which each coarser level takes over, defaults to doubling multiples of the track size.
+
+            - Returns the name of the mesh or LOD group.
+        """
+        meshNames = [self.CreateMesh(buffers) for buffers in levels]
+        if(len(levels) == 1):
+            return meshNames[0]
+        if(lodDistances is None):
+            size = np.ptp(levels[0].Vertices, axis=0).max()
+            lodDistances = [float(size * (2 ** level)) for level in range(len(levels) - 1)]
+        return self.CreateLODGroup(meshNames, lodDistances, generator + "_LOD")
 
     def GenerateWireTrack(self):
         """ Find a selected curve and creates a wire track along it, possibly with ball keyframed to travel along it? """
@@ -28,7 +536,7 @@ class Generator():
             if ( cmds.objectType(selection) == "curve" ):
                 print("Yatta!")
 
-    def GenerateStraightWireTrack(self, length = 15, lengthSubdivisions = 36, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True):
+    def GenerateStraightWireTrack(self, length = 15, lengthSubdivisions = 36, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4, useCache = True, targetFaces = None, maxError = None, lodLevels = 1, lodDistances = None, collisionProxy = False, background = False):
         """ Generate a straight wire track. 
         
             length                  :    The length of track to generate.
@@ -45,7 +553,42 @@ class Generator():
             connectorNumber         :    The number of connector wires to generate evenly spaced along the wires.
             connectorSubdivisions   :    The number of subdivisions to generate for the connector wires. 
 
-            -No return
+            weldTolerance           :    Vertices closer than this are merged into one, 0 to skip welding.
+            useCache                :    Boolean, whether or not to reuse buffers built before with the same parameters.
+            targetFaces             :    If given, decimate the track down to this many triangles.
+            maxError                :    If given, decimate the track until the next collapse would add more quadric error than this.
+            lodLevels               :    The number of levels of detail to build under a LOD group, each with half the subdivisions of the one before, 1 for a single mesh.
+            lodDistances            :    The camera distances at which each coarser level takes over, defaults to multiples of the track size.
+            collisionProxy          :    Boolean, whether to also build a CollisionProxy of the track, kept as self.CollisionProxy.
+            background              :    Boolean, whether to build on a worker thread with a progress window, creating the mesh once it is done.
+
+            - Returns -1 if the parameters are not valid or the build is over budget.
+        """
+        arguments = {"length" : length, "lengthSubdivisions" : lengthSubdivisions, "wireRadius" : wireRadius, "wireSubdivisions" : wireSubdivisions, "trackRadius" : trackRadius, "trackDegrees" : trackDegrees, 
+                     "wireNumber" : wireNumber, "connectorNumber" : connectorNumber, "connectorSubdivisions" : connectorSubdivisions, "wireCaps" : wireCaps, "weldTolerance" : weldTolerance}
+
+        # Refuse (or downscale) a build that would not fit the budgets, before any work is started
+        arguments = self.BudgetArguments("StraightWireTrack", arguments, targetFaces, lodLevels)
+        if(arguments == -1):
+            return -1
+
+        def commit(levels):
+            self.CommitLevels("StraightWireTrack", levels, lodDistances)
+
+            # Centreline of the track for animation
+            self.TrackPath = TrackPath([(0, 0, 0), (0, 0, length)], supportRadius=trackRadius - wireRadius)
+
+            # Capsules around the rails and connectors, for contact queries against the track without its polygons
+            if(collisionProxy):
+                self.CollisionProxy = self.BuildCollisionProxy("StraightWireTrack", arguments)
+
+        # Build the buffers (on a worker thread in the background), then create the mesh, or one mesh per level of detail
+        return self.Run("Building Straight Wire Track", lambda: self.BuildLevels("StraightWireTrack", self.BuildStraightWireTrackBuffers, arguments, useCache, targetFaces, maxError, lodLevels), commit, background)
+
+    def BuildStraightWireTrackBuffers(self, length = 15, lengthSubdivisions = 36, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ Build the buffers of a straight wire track without touching maya, see GenerateStraightWireTrack for the parameters. 
+
+            - Returns the MeshBuffers, or -1 if the parameters are not valid.
         """
         # Information on how to create a mesh from user defined verts using openmaya MFnMesh ::
         # https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371
@@ -60,8 +603,6 @@ class Generator():
             print("ABORT: Too many wires of too wide radius, will overlap.")
             return -1 #wireRadius = (trackRadius * maths.pi * (trackDegrees / 360.0)) / wireNumber
 
-        mesh = om.MFnMesh()
-        
         # Define Vertices
         vertices = []
                     
@@ -71,9 +612,13 @@ class Generator():
         # Define Face Vertex Nos
         polyFaces = []
 
+        # Define UVs and Normals
+        uValues, vValues, uvIds, normals = [], [], [], []
+
         # Create each wire in track line
         TrackAngle = trackDegrees / (wireNumber - 1)
         for i in range(0, wireNumber):
+            self.ReportProgress(i / (wireNumber + connectorNumber + 1), "Building wires")
             vertNo = len(vertices)
         
             angle = TrackAngle * i
@@ -107,7 +652,7 @@ class Generator():
  
                         # Append point
                         #vertices.append(om.MPoint(x, y, z))
-                        vertices.append(om.MPoint(x + currentRailXY[0], y + currentRailXY[1], z))
+                        vertices.append((x + currentRailXY[0], y + currentRailXY[1], z))
 
                         # Connect the points to polygon
                         if(j > 0 and i > 0):
@@ -127,17 +672,31 @@ class Generator():
                 polyFaces.append(wireSubdivisions)
                 polyFaces.append(wireSubdivisions)
 
+            self.AppendWireUVs(uValues, vValues, uvIds, lengthSubdivisions, wireSubdivisions, wireCaps)
+            self.AppendWireNormals(normals, wireSubdivisions, lengthSubdivisions + 1)
+
+
+        railFaceCount = len(polyFaces)
 
         # Create each Wire Track Connector
         connectorDistance = length / connectorNumber
         for i in range(0, connectorNumber + 1):
+            self.ReportProgress((wireNumber + i) / (wireNumber + connectorNumber + 1), "Building connectors")
             connectorCentre = (0, 0, connectorDistance * i)
 
-            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, trackRadius +(2* wireRadius), connectorSubdivisions, trackDegrees, centre=connectorCentre, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, wireCaps=True, flipXY=True, rotation=(0,0,0))
+            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, trackRadius +(2* wireRadius), connectorSubdivisions, trackDegrees, centre=connectorCentre, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, wireCaps=True, flipXY=True, rotation=(0,0,0), uValues=uValues, vValues=vValues, uvIds=uvIds, normals=normals)
+
 
+        # Rail faces come first, then connectors
+        faceMaterials = np.full(len(polyFaces), MeshBuffers.Connectors, dtype=np.int32)
+        faceMaterials[:railFaceCount] = MeshBuffers.Rails
+        buffers = MeshBuffers(vertices, polyFaces, polygonConnects, faceMaterials, uValues, vValues, uvIds, normals)
 
-        # Create Mesh
-        mesh.create(vertices, polyFaces, polygonConnects)
+        # Merge coincident vertices where connectors touch the rails
+        if(weldTolerance > 0):
+            buffers = self.WeldVertices(buffers, weldTolerance)
+
+        return buffers
 
     def RotateXYZ(self, XYZ = (0,0,0), RotationAxis="Y", Rotation = 0):
         """ Rotate an XYZ about an axis, either X, Y, or Z, of a given rotation. 
@@ -166,7 +725,7 @@ class Generator():
 
         return X, Y, Z
 
-    def GenSingleWireArc(self, vertices, polygonConnects, polyFaces, circleRadius, circleSubdivisions, degreesToGenerate, centre=(0,0,0), wireRadius = 0.5, wireSubdivisions = 5, wireCaps = True, flipXY = False, rotation = (0,0,0)):
+    def GenSingleWireArc(self, vertices, polygonConnects, polyFaces, circleRadius, circleSubdivisions, degreesToGenerate, centre=(0,0,0), wireRadius = 0.5, wireSubdivisions = 5, wireCaps = True, flipXY = False, rotation = (0,0,0), uValues = None, vValues = None, uvIds = None, normals = None):
         """ Function to generate a single circular wire segment.
             
             vertices            :    Reference to the ongoing list of vertices
@@ -185,6 +744,11 @@ class Generator():
             wireSubdivisions    :    The number of subdivisions 
             wireCaps            :    Boolean value, whether or not to generate caps at the ends of the wire, if not generating the full circle.
 
+            uValues             :    Reference to the ongoing list of U coordinates (optional, UVs are only generated if given)
+            vValues             :    Reference to the ongoing list of V coordinates
+            uvIds               :    Reference to the ongoing list of face vertex UV indices
+            normals             :    Reference to the ongoing list of vertex normals (optional)
+
             -No return
         """
         
@@ -192,7 +756,11 @@ class Generator():
         
         subdivisionAngle = 360.0/wireSubdivisions
         circleAngle = (degreesToGenerate) / circleSubdivisions
+
+        # A full circle reuses the first ring at the seam instead of generating a duplicate
+        closed = degreesToGenerate >= 360
         for j in range(0, circleSubdivisions + 1):
+            ring = 0 if (closed and j == circleSubdivisions) else j
             for i in range(0, wireSubdivisions  + 1):
                 # Check if this is the last point in the wire going around
                 if(i == (wireSubdivisions)):
@@ -200,12 +768,22 @@ class Generator():
                     if(j > 0 and i > 0):
                         polygonConnects.append((j-1) * (wireSubdivisions) + (i-1) + vertNo)
                         polygonConnects.append((j-1) * (wireSubdivisions) + 0 + vertNo)
-                        polygonConnects.append(j  * (wireSubdivisions) + 0 + vertNo)
-                        polygonConnects.append(j * (wireSubdivisions) + (i-1) + vertNo)
+                        polygonConnects.append(ring  * (wireSubdivisions) + 0 + vertNo)
+                        polygonConnects.append(ring * (wireSubdivisions) + (i-1) + vertNo)
                         
                         polyFaces.append(4)
                 else:
-                    # If not the last point, make a new point
+                    # If not the last point, make a new point (unless this is the seam of a full circle)
+                    if(ring != j):
+                        if(i > 0):
+                            polygonConnects.append((j-1) * (wireSubdivisions) + (i-1) + vertNo)
+                            polygonConnects.append((j-1) * (wireSubdivisions) + i + vertNo)
+                            polygonConnects.append(ring  * (wireSubdivisions) + i + vertNo)
+                            polygonConnects.append(ring * (wireSubdivisions) + (i-1) + vertNo)
+                            
+                            polyFaces.append(4)
+                        continue
+
                     angle = circleAngle * j
                     angle2 = maths.radians(angle + (0.5 * (360 - degreesToGenerate)) - 90)
                     # Might want to look at taurus generation as it might simplify this a bit...
@@ -224,7 +802,8 @@ class Generator():
 
                     #z += 
 
-                    vertices.append(om.MPoint(x + centre[0], y + centre[1], z + centre[2]))
+                    vertices.append((x + centre[0], y + centre[1], z + centre[2]))
+
                     if(j > 0 and i > 0):
                         polygonConnects.append((j-1) * (wireSubdivisions) + (i-1) + vertNo)
                         polygonConnects.append((j-1) * (wireSubdivisions) + i + vertNo)
@@ -236,8 +815,8 @@ class Generator():
         # Number of vertices in object
         #polyFaces = [4] * (int(len(polygonConnects)/4))#(((wireSubdivisions) * (circleSubdivisions - 1)) + 1)
 
-        # Add Wire Caps
-        if(wireCaps and circleAngle < 360):
+        # Add Wire Caps (a full circle has no ends to cap)
+        if(wireCaps and not closed):
             for i in range(wireSubdivisions - 1, -1, -1):
                 polygonConnects.append(i + vertNo)
             for i in range(wireSubdivisions - 1, -1, -1):
@@ -245,8 +824,473 @@ class Generator():
             polyFaces.append(wireSubdivisions)
             polyFaces.append(wireSubdivisions)
 
+        if(uValues is not None):
+            self.AppendWireUVs(uValues, vValues, uvIds, circleSubdivisions, wireSubdivisions, wireCaps and not closed)
+        if(normals is not None):
+            rings = np.arange(circleSubdivisions + (0 if closed else 1))
+            self.AppendWireNormals(normals, wireSubdivisions, len(rings), np.radians(circleAngle * rings + (0.5 * (360 - degreesToGenerate)) - 90), flipXY, rotation)
+
+    def AppendWireUVs(self, uValues, vValues, uvIds, lengthSubdivisions, wireSubdivisions, wireCaps):
+        """ Append the UVs of one wire, in the same face order the wire loops generate their faces.
+            U runs along the wire and V around it, straight from the (j, i) loop indices, with an extra column and row of UVs at the seams.
+
+            uValues             :    Reference to the ongoing list of U coordinates
+            vValues             :    Reference to the ongoing list of V coordinates
+            uvIds               :    Reference to the ongoing list of face vertex UV indices
+            lengthSubdivisions  :    The number of faces along the wire.
+            wireSubdivisions    :    The number of faces around the wire.
+            wireCaps            :    Boolean, whether the wire has the two cap faces after its quads.
+
+            -No return
+        """
+        uvNo = len(uValues)
+        columns = wireSubdivisions + 1
+        u, v = np.meshgrid(np.arange(lengthSubdivisions + 1) / lengthSubdivisions, np.arange(columns) / wireSubdivisions, indexing="ij")
+        uValues.extend(u.ravel().tolist())
+        vValues.extend(v.ravel().tolist())
+
+        j = np.arange(1, lengthSubdivisions + 1)[:, np.newaxis]
+        i = np.arange(1, columns)[np.newaxis, :]
+        quads = np.stack(((j-1) * columns + (i-1), (j-1) * columns + i, j * columns + i, j * columns + (i-1)), axis=-1)
+        uvIds.extend((quads.ravel() + uvNo).tolist())
+
+        # Both caps share a disc of UVs
+        if(wireCaps):
+            capNo = len(uValues)
+            capAngles = np.radians(np.arange(wireSubdivisions) * (360.0 / wireSubdivisions))
+            uValues.extend((0.5 + 0.5 * np.cos(capAngles)).tolist())
+            vValues.extend((0.5 + 0.5 * np.sin(capAngles)).tolist())
+            uvIds.extend(range(capNo + wireSubdivisions - 1, capNo - 1, -1))
+            uvIds.extend(range(capNo, capNo + wireSubdivisions))
+
+    def AppendWireNormals(self, normals, wireSubdivisions, ringCount, ringAngles = None, flipXY = False, rotation = (0,0,0)):
+        """ Append the vertex normals of one wire, in the order the wire loops generate its points, ring by ring.
+            Each normal points out from the wire centre, turned the same way as its point.
+
+            normals             :    Reference to the ongoing list of vertex normals
+            wireSubdivisions    :    The number of points around the wire.
+            ringCount           :    The number of rings of points along the wire.
+            ringAngles          :    The angle in radians of each ring around an arc, None for a straight wire along Z.
+            flipXY              :    Boolean, whether the arc was flipped to stand vertically, as in GenSingleWireArc.
+            rotation            :    The rotation the arc was given, as in GenSingleWireArc.
+
+            -No return
+        """
+        around = np.radians(np.arange(wireSubdivisions) * (360.0 / wireSubdivisions))
+        if(ringAngles is None):
+            nx = np.tile(np.cos(around), (ringCount, 1))
+            ny = np.tile(np.sin(around), (ringCount, 1))
+            nz = np.zeros_like(nx)
+        else:
+            nx = np.outer(np.cos(ringAngles), np.cos(around))
+            ny = np.tile(np.sin(around), (ringCount, 1))
+            nz = np.outer(np.sin(ringAngles), np.cos(around))
+        if(flipXY):
+            ny, nz = -nz, ny
+        # RotateXYZ works on whole arrays of coordinates as well as single points
+        for angle in rotation:
+            nx, ny, nz = self.RotateXYZ(XYZ=(nx, ny, nz), RotationAxis="X", Rotation=angle)
+        normals.extend(np.stack((nx, ny, nz), axis=-1).reshape(-1, 3).tolist())
+
+    def LayoutSegmentPoints(self, segment, subdivisionLength):
+        """ Generate the centreline of a single layout segment in its own local frame, which starts at the origin heading along +Z with +Y up.
+
+            segment             :    A tuple of the segment type and its parameters, one of
+                                        ("straight", length)
+                                        ("arc", radius, degrees)                a flat turn, positive degrees turn towards +X
+                                        ("helix", radius, degrees, rise)        a turn that climbs by rise
+                                        ("loop", radius, sideOffset)            a vertical loop, shifted sideways by sideOffset so it clears itself
+            subdivisionLength   :    The maximum distance between generated points.
+
+            - Returns arrays of the points, tangents and ups, or None if the segment is not valid.
+        """
+        kind = segment[0]
+        if(kind == "straight" and segment[1] > 0):
+            count = max(int(np.ceil(segment[1] / subdivisionLength)), 1)
+            z = np.linspace(0, segment[1], count + 1)
+            points = np.stack((np.zeros_like(z), np.zeros_like(z), z), axis=1)
+            tangents = np.tile((0.0, 0.0, 1.0), (count + 1, 1))
+            ups = np.tile((0.0, 1.0, 0.0), (count + 1, 1))
+            return points, tangents, ups
+
+        if(kind in ("arc", "helix") and segment[1] > 0 and segment[2] != 0):
+            radius = segment[1]
+            turn = maths.radians(abs(segment[2]))
+            side = 1.0 if segment[2] > 0 else -1.0
+            rise = segment[3] if kind == "helix" else 0.0
+            count = max(int(np.ceil(np.hypot(radius * turn, rise) / subdivisionLength)), 2)
+            phi = np.linspace(0, turn, count + 1)
+            points = np.stack((side * (radius - radius * np.cos(phi)), rise * phi / turn, radius * np.sin(phi)), axis=1)
+            tangents = np.stack((side * radius * np.sin(phi), np.full_like(phi, rise / turn), radius * np.cos(phi)), axis=1)
+            ups = np.tile((0.0, 1.0, 0.0), (count + 1, 1))
+
+        elif(kind == "loop" and segment[1] > 0):
+            radius = segment[1]
+            sideOffset = segment[2] if len(segment) > 2 else 0.0
+            count = max(int(np.ceil(np.hypot(2 * maths.pi * radius, sideOffset) / subdivisionLength)), 8)
+            phi = np.linspace(0, 2 * maths.pi, count + 1)
+            points = np.stack((sideOffset * phi / (2 * maths.pi), radius - radius * np.cos(phi), radius * np.sin(phi)), axis=1)
+            tangents = np.stack((np.full_like(phi, sideOffset / (2 * maths.pi)), radius * np.sin(phi), radius * np.cos(phi)), axis=1)
+            # The ball is held against the outside of the loop, so up points to the loop centre
+            ups = np.stack((np.zeros_like(phi), np.cos(phi), -np.sin(phi)), axis=1)
+        else:
+            return None
+
+        # Keep up at right angles to the tangent
+        tangents /= np.linalg.norm(tangents, axis=1)[:, np.newaxis]
+        ups -= np.einsum("ij,ij->i", ups, tangents)[:, np.newaxis] * tangents
+        ups /= np.linalg.norm(ups, axis=1)[:, np.newaxis]
+        return points, tangents, ups
+
+    def SweepTube(self, centres, tangents, normals, radius, subdivisions, closed = False, caps = True, faceMaterial = MeshBuffers.Rails):
+        """ Sweep a ring of vertices along a centreline, building every ring, face, UV and normal as whole arrays.
+
+            centres             :    Array of (x, y, z) centreline points.
+            tangents            :    Array of unit tangents along the centreline.
+            normals             :    Array of unit vectors at right angles to the tangents, where each ring starts.
+            radius              :    The radius of the tube.
+            subdivisions        :    The number of vertices around each ring.
+            closed              :    Boolean, if true the last ring joins back onto the first.
+            caps                :    Boolean, whether or not to cap the ends of an open tube.
+            faceMaterial        :    The material id of the tube faces.
+
+            - Returns the MeshBuffers of the tube.
+        """
+        ringCount = len(centres)
+        theta = np.radians(np.arange(subdivisions) * (360.0 / subdivisions))
+        binormals = np.cross(tangents, normals)
+        vertexNormals = (np.cos(theta)[np.newaxis, :, np.newaxis] * normals[:, np.newaxis, :] + np.sin(theta)[np.newaxis, :, np.newaxis] * binormals[:, np.newaxis, :]).reshape(-1, 3)
+        vertices = np.repeat(centres, subdivisions, axis=0) + radius * vertexNormals
+
+        # Quad between ring j and the next, wrapping around the ring and (if closed) along the tube
+        j = np.arange(ringCount if closed else ringCount - 1)[:, np.newaxis]
+        i = np.arange(subdivisions)[np.newaxis, :]
+        nextJ = (j + 1) % ringCount
+        nextI = (i + 1) % subdivisions
+        quads = np.stack((j * subdivisions + i, j * subdivisions + nextI, nextJ * subdivisions + nextI, nextJ * subdivisions + i), axis=-1).reshape(-1, 4)
+
+        # UVs do not wrap, so the seams get their own row and column
+        rows = len(j) + 1
+        columns = subdivisions + 1
+        u, v = np.meshgrid(np.arange(rows) / (rows - 1), np.arange(columns) / subdivisions, indexing="ij")
+        uvQuads = np.stack((j * columns + i, j * columns + i + 1, (j + 1) * columns + i + 1, (j + 1) * columns + i), axis=-1).reshape(-1, 4)
+
+        polyFaces = [np.full(len(quads), 4)]
+        polygonConnects = [quads.ravel()]
+        uValues = [u.ravel()]
+        vValues = [v.ravel()]
+        uvIds = [uvQuads.ravel()]
+        if(caps and not closed):
+            polyFaces.append(np.full(2, subdivisions))
+            polygonConnects.append(np.arange(subdivisions - 1, -1, -1))
+            polygonConnects.append(np.arange(subdivisions) + (ringCount - 1) * subdivisions)
+            # Both caps share a disc of UVs
+            uValues.append(0.5 + 0.5 * np.cos(theta))
+            vValues.append(0.5 + 0.5 * np.sin(theta))
+            uvIds.append(np.arange(subdivisions - 1, -1, -1) + rows * columns)
+            uvIds.append(np.arange(subdivisions) + rows * columns)
+
+        polyFaces = np.concatenate(polyFaces)
+        vertexNormals /= np.linalg.norm(vertexNormals, axis=1)[:, np.newaxis]
+        return MeshBuffers(vertices, polyFaces, np.concatenate(polygonConnects), np.full(len(polyFaces), faceMaterial), np.concatenate(uValues), np.concatenate(vValues), np.concatenate(uvIds), vertexNormals)
+
+    def CombineBuffers(self, parts):
+        """ Join a list of MeshBuffers into one, offsetting each part's vertex and UV indices past the parts before it.
+
+            - Returns the combined MeshBuffers.
+        """
+        vertexOffsets = np.cumsum([0] + [len(part.Vertices) for part in parts])
+        polygonConnects = np.concatenate([part.PolygonConnects + offset for part, offset in zip(parts, vertexOffsets)])
+        combined = MeshBuffers(np.concatenate([part.Vertices for part in parts]), np.concatenate([part.PolyFaces for part in parts]), polygonConnects, np.concatenate([part.FaceMaterials for part in parts]))
+        if(all(part.UVIds is not None for part in parts)):
+            uvOffsets = np.cumsum([0] + [len(part.UValues) for part in parts])
+            combined.UValues = np.concatenate([part.UValues for part in parts])
+            combined.VValues = np.concatenate([part.VValues for part in parts])
+            combined.UVIds = np.concatenate([part.UVIds + offset for part, offset in zip(parts, uvOffsets)]).astype(np.int32)
+        if(all(part.Normals is not None for part in parts)):
+            combined.Normals = np.concatenate([part.Normals for part in parts])
+        return combined
+
+    def GenerateTrackLayout(self, segments, subdivisionLength = 0.5, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorSpacing = 2.0, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4, useCache = True, targetFaces = None, maxError = None, lodLevels = 1, lodDistances = None, collisionProxy = False, background = False):
+        """ Generate a whole track layout of chained straights, arcs, helixes and loops as a single mesh.
+            Each segment starts where the last one ended, and the rails are swept along the whole layout in one go so segments share their boundary rings.
+
+            segments                :    List of segment tuples, see LayoutSegmentPoints, e.g. [("straight", 10), ("arc", 8, 90), ("loop", 6, 3)].
+            subdivisionLength       :    The maximum distance between rings along the rails.
+
+            wireRadius              :    The radius of the individual wires that make up the track
+            wireSubdivisions        :    The number of subdivisions around each wire
+            wireNumber              :    The number of wires to generate around the track circle.
+            wireCaps                :    Boolean value, whether or not to generate caps at the ends of the wires, if the layout is not a closed loop.
+
+            trackRadius             :    The radius of the track circle the wires generate around.
+            trackDegrees            :    The number of degrees to generate of the track circle. 
+
+            connectorSpacing        :    The distance along the layout between connector wires.
+            connectorSubdivisions   :    The number of subdivisions to generate for the connector wires. 
+
+            weldTolerance           :    Vertices closer than this are merged into one, 0 to skip welding.
+            useCache                :    Boolean, whether or not to reuse buffers built before with the same parameters.
+            targetFaces             :    If given, decimate the track down to this many triangles.
+            maxError                :    If given, decimate the track until the next collapse would add more quadric error than this.
+            lodLevels               :    The number of levels of detail to build under a LOD group, each with half the subdivisions of the one before, 1 for a single mesh.
+            lodDistances            :    The camera distances at which each coarser level takes over, defaults to multiples of the track size.
+            collisionProxy          :    Boolean, whether to also build a CollisionProxy of the track, kept as self.CollisionProxy.
+            background              :    Boolean, whether to build on a worker thread with a progress window, creating the mesh once it is done.
+
+            - Returns -1 if the parameters are not valid or the build is over budget.
+        """
+        arguments = {"segments" : [list(segment) for segment in segments], "subdivisionLength" : subdivisionLength, "wireRadius" : wireRadius, "wireSubdivisions" : wireSubdivisions, "trackRadius" : trackRadius, "trackDegrees" : trackDegrees, 
+                     "wireNumber" : wireNumber, "connectorSpacing" : connectorSpacing, "connectorSubdivisions" : connectorSubdivisions, "wireCaps" : wireCaps, "weldTolerance" : weldTolerance}
+
+        # Refuse (or downscale) a build that would not fit the budgets, before any work is started
+        arguments = self.BudgetArguments("TrackLayout", arguments, targetFaces, lodLevels)
+        if(arguments == -1):
+            return -1
+
+        def commit(levels):
+            self.CommitLevels("TrackLayout", levels, lodDistances)
+
+            # Centreline of the track for animation
+            centres, tangents, ups, closed = self.LayoutCentreline(segments, subdivisionLength, weldTolerance)
+            self.TrackPath = TrackPath(centres, ups, closed=closed, supportRadius=trackRadius - wireRadius)
+
+            # Capsules around the rails and connectors, for contact queries against the track without its polygons
+            if(collisionProxy):
+                self.CollisionProxy = self.BuildCollisionProxy("TrackLayout", arguments)
+
+        # Build the buffers (on a worker thread in the background), then create the mesh, or one mesh per level of detail
+        return self.Run("Building Track Layout", lambda: self.BuildLevels("TrackLayout", self.BuildTrackLayoutBuffers, arguments, useCache, targetFaces, maxError, lodLevels), commit, background)
 
-    def GenerateWireTrack_Circular(self, circleRadius = 15, circleSubdivisions = 36, degreesToGenerate = 15, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True):
+    def LayoutCentreline(self, segments, subdivisionLength, weldTolerance = 1e-4):
+        """ Chain the segments of a layout, carrying the end frame of each into the start of the next.
+
+            - Returns arrays of the centreline points, tangents and ups, and whether the layout is a closed loop, or None if a segment is not valid.
+        """
+        position = np.zeros(3)
+        frame = np.eye(3)
+        centreParts, tangentParts, upParts = [], [], []
+        for segment in segments:
+            local = self.LayoutSegmentPoints(segment, subdivisionLength)
+            if(local is None):
+                print("ABORT: Layout segment %s not recognised." % (segment,))
+                return None
+            points, tangents, ups = local
+            # Local axes X (side), Y (up), Z (forward) are the rows of the frame
+            points = points @ frame + position
+            tangents = tangents @ frame
+            ups = ups @ frame
+            # The first point of each segment is the last point of the one before, so it is shared rather than repeated
+            first = 1 if len(centreParts) > 0 else 0
+            centreParts.append(points[first:])
+            tangentParts.append(tangents[first:])
+            upParts.append(ups[first:])
+            position = points[-1]
+            frame = np.stack((np.cross(ups[-1], tangents[-1]), ups[-1], tangents[-1]))
+
+        centres = np.concatenate(centreParts)
+        tangents = np.concatenate(tangentParts)
+        ups = np.concatenate(upParts)
+
+        # A layout that ends where it started, facing the same way, is joined into a closed loop
+        closed = bool((np.linalg.norm(centres[-1] - centres[0]) < weldTolerance + 1e-6) and (np.dot(tangents[-1], tangents[0]) > 0.999))
+        if(closed):
+            centres, tangents, ups = centres[:-1], tangents[:-1], ups[:-1]
+        return centres, tangents, ups, closed
+
+    def BuildTrackLayoutBuffers(self, segments, subdivisionLength = 0.5, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorSpacing = 2.0, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ Build the buffers of a track layout without touching maya, see GenerateTrackLayout for the parameters. 
+
+            - Returns the MeshBuffers, or -1 if the parameters are not valid.
+        """
+        # Boundary Checks
+        if((wireSubdivisions < 3) or (subdivisionLength <= 0) or (wireRadius <= 0) or (trackRadius < 0) or (connectorSpacing <= 0) or (len(segments) == 0)):
+            print("ABORT: Radius or Subdivisions too low.")
+            return -1
+        if((wireNumber * wireRadius) > (trackRadius * maths.pi * (trackDegrees / 360.0))):
+            print("ABORT: Too many wires of too wide radius, will overlap.")
+            return -1
+
+        centreline = self.LayoutCentreline(segments, subdivisionLength, weldTolerance)
+        if(centreline is None):
+            return -1
+        centres, tangents, ups, closed = centreline
+        sides = np.cross(ups, tangents)
+
+        parts = []
+
+        # Rails, each swept along the whole layout
+        TrackAngle = trackDegrees / max(wireNumber - 1, 1)
+        for i in range(0, wireNumber):
+            self.ReportProgress(0.5 * i / wireNumber, "Building wires")
+            angle2 = maths.radians(TrackAngle * i + (0.5 * (360 - trackDegrees)) - 90)
+            railCentres = centres + trackRadius * (maths.cos(angle2) * sides - maths.sin(angle2) * ups)
+            parts.append(self.SweepTube(railCentres, tangents, sides, wireRadius, wireSubdivisions, closed=closed, caps=wireCaps, faceMaterial=MeshBuffers.Rails))
+
+        # Connectors, evenly spaced along the layout, each an arc across the track
+        path = TrackPath(centres, ups, closed=closed)
+        connectorNumber = max(int(path.Length / connectorSpacing), 1)
+        connectorDistances = np.linspace(0, path.Length, connectorNumber, endpoint=False) if closed else np.linspace(0, path.Length, connectorNumber + 1)
+        connectorCentres, connectorTangents, connectorUps = path.Sample(connectorDistances)
+        connectorSides = np.cross(connectorUps, connectorTangents)
+        arcAngles = np.radians(np.linspace(0, trackDegrees, connectorSubdivisions + 1) + (0.5 * (360 - trackDegrees)) - 90)
+        connectorRadius = trackRadius + (2 * wireRadius)
+        for i, (centre, tangent, up, side) in enumerate(zip(connectorCentres, connectorTangents, connectorUps, connectorSides)):
+            self.ReportProgress(0.5 + 0.5 * i / len(connectorCentres), "Building connectors")
+            radial = np.outer(np.cos(arcAngles), side) - np.outer(np.sin(arcAngles), up)
+            arcTangents = np.cross(tangent, radial)
+            parts.append(self.SweepTube(centre + connectorRadius * radial, arcTangents, radial, wireRadius, wireSubdivisions, caps=True, faceMaterial=MeshBuffers.Connectors))
+
+        buffers = self.CombineBuffers(parts)
+
+        # Merge coincident vertices where connectors touch the rails
+        if(weldTolerance > 0):
+            buffers = self.WeldVertices(buffers, weldTolerance)
+
+        return buffers
+
+    def WeldVertices(self, buffers, tolerance = 1e-4):
+        """ Merge vertices closer than a tolerance, then tidy the faces that used them.
+            Each vertex is put in a grid cell at least the tolerance across, and only vertices in the same or neighbouring cells are compared.
+
+            buffers             :    The MeshBuffers to weld.
+            tolerance           :    The distance within which vertices are merged.
+
+            - Returns the welded MeshBuffers.
+        """
+        points = buffers.Vertices
+        vertexCount = len(points)
+        if(vertexCount == 0):
+            return buffers
+
+        # Cells at least the tolerance across (larger for huge meshes, so the cell keys fit in 64 bits), numbered along x, then y, then z
+        lowest = points.min(axis=0)
+        cellSize = np.maximum(tolerance, (points.max(axis=0) - lowest) / (1 << 20))
+        cells = np.floor((points - lowest) / cellSize).astype(np.int64) + 1
+        sizes = cells.max(axis=0) + 2
+        keys = (cells[:, 0] * sizes[1] + cells[:, 1]) * sizes[2] + cells[:, 2]
+        order = np.argsort(keys, kind="stable")
+        sortedKeys = keys[order]
+        runStarts = np.flatnonzero(np.concatenate(([True], sortedKeys[1:] != sortedKeys[:-1])))
+        runEnds = np.append(runStarts[1:], vertexCount)
+        cellKeys = sortedKeys[runStarts]
+
+        # Pairs of vertices within the tolerance, in the same cell or a neighbour ahead of it, so each pair is found once.
+        # Shifting the sorted keys by a neighbour's offset keeps them sorted, which keeps the searches fast
+        firsts, seconds = [], []
+        for dx, dy, dz in [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) >= (0, 0, 0)]:
+            if((dx, dy, dz) == (0, 0, 0)):
+                # Later vertices in the same cell
+                starts = np.arange(vertexCount) + 1
+                counts = np.repeat(runEnds, runEnds - runStarts) - starts
+            else:
+                shifted = sortedKeys + (dx * sizes[1] + dy) * sizes[2] + dz
+                cell = np.minimum(np.searchsorted(cellKeys, shifted), len(cellKeys) - 1)
+                starts = runStarts[cell]
+                counts = np.where(cellKeys[cell] == shifted, runEnds[cell] - starts, 0)
+            first = order[np.repeat(np.arange(vertexCount), counts)]
+            second = order[np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)]
+            near = np.sum((points[first] - points[second]) ** 2, axis=1) <= tolerance * tolerance
+            firsts.append(first[near])
+            seconds.append(second[near])
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        if(len(first) == 0):
+            return buffers
+
+        # Vertices are taken in index order, each kept unless it is within the tolerance of an earlier kept vertex, and then merged into the first of those.
+        # Merging only into kept vertices stops a chain of points each just under the tolerance apart collapsing into one.
+        # A vertex is settled once every earlier vertex it is near is, so each pass settles at least the lowest vertex left
+        lower, higher = np.minimum(first, second), np.maximum(first, second)
+        keep = np.zeros(vertexCount, dtype=bool)
+        settled = np.zeros(vertexCount, dtype=bool)
+        while(not settled.all()):
+            nearKept = np.zeros(vertexCount, dtype=bool)
+            nearKept[higher[keep[lower]]] = True
+            unsettledBelow = np.bincount(higher[~settled[lower]], minlength=vertexCount)
+            keep |= ~settled & ~nearKept & (unsettledBelow == 0)
+            settled |= keep | nearKept
+        # Each vertex not kept takes the lowest kept vertex it is near
+        labels = np.where(keep, np.arange(vertexCount), vertexCount)
+        toKept = keep[lower]
+        np.minimum.at(labels, higher[toKept], lower[toKept])
+        remap = (np.cumsum(keep) - 1)[labels]
+
+        # Reindex faces, dropping corners repeating the corner before them (cyclically) along with their UVs
+        counts = buffers.PolyFaces.astype(np.int64)
+        faceOfCorner = np.repeat(np.arange(len(counts)), counts)
+        faceStarts = np.cumsum(counts) - counts
+        connects = remap[buffers.PolygonConnects]
+        previous = np.arange(len(connects)) - 1
+        previous[faceStarts] = faceStarts + counts - 1
+        corners = connects != connects[previous]
+        faceUVs = buffers.UVIds
+
+        # A face is kept as it is if at least three distinct corners are left and none repeats further apart, otherwise it is split below
+        sortedCorners = np.lexsort((connects, faceOfCorner))
+        sortedCorners = sortedCorners[corners[sortedCorners]]
+        repeated = np.zeros(len(counts), dtype=bool)
+        repeats = (faceOfCorner[sortedCorners[1:]] == faceOfCorner[sortedCorners[:-1]]) & (connects[sortedCorners[1:]] == connects[sortedCorners[:-1]])
+        repeated[faceOfCorner[sortedCorners[1:]][repeats]] = True
+        cornerCounts = np.bincount(faceOfCorner[corners], minlength=len(counts))
+        whole = ~repeated & (cornerCounts >= 3)
+        wholeCorners = corners & whole[faceOfCorner]
+
+        weldedFaces = [cornerCounts[whole]]
+        weldedConnects = [connects[wholeCorners]]
+        weldedUVs = [faceUVs[wholeCorners]] if faceUVs is not None else None
+        faceMaterials = [buffers.FaceMaterials[whole]]
+
+        # Faces pinched at a repeated vertex are split into the loops between the repeats, and loops of fewer than three corners dropped
+        for face in np.flatnonzero(repeated).tolist():
+            loop = []
+            for corner in np.flatnonzero(corners[faceStarts[face]:faceStarts[face] + counts[face]]) + faceStarts[face]:
+                vertices = [connects[c] for c in loop]
+                if(connects[corner] in vertices):
+                    split = vertices.index(connects[corner])
+                    pieces, loop = loop[split:], loop[:split]
+                    if(len(pieces) >= 3):
+                        weldedFaces.append([len(pieces)])
+                        weldedConnects.append(connects[pieces])
+                        if(faceUVs is not None):
+                            weldedUVs.append(faceUVs[pieces])
+                        faceMaterials.append(buffers.FaceMaterials[[face]])
+                loop.append(corner)
+            if(len(loop) >= 3):
+                weldedFaces.append([len(loop)])
+                weldedConnects.append(connects[loop])
+                if(faceUVs is not None):
+                    weldedUVs.append(faceUVs[loop])
+                faceMaterials.append(buffers.FaceMaterials[[face]])
+
+        return MeshBuffers(points[keep], np.concatenate(weldedFaces), np.concatenate(weldedConnects), np.concatenate(faceMaterials), buffers.UValues, buffers.VValues, 
+                           np.concatenate(weldedUVs) if faceUVs is not None else None, buffers.Normals[keep] if buffers.Normals is not None else None)
+
+    def CreateMesh(self, buffers):
+        """ Commit generated MeshBuffers to a new maya mesh, with the rail and connector materials assigned. 
+
+            - Returns the name of the new mesh transform.
+        """
+        # Information on how to create a mesh from user defined verts using openmaya MFnMesh ::
+        # https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371
+        mesh = om.MFnMesh()
+        points = om.MPointArray(buffers.Vertices.tolist())
+        polyFaces = buffers.PolyFaces.tolist()
+        if(buffers.UVIds is not None):
+            # UVs and normals come with the buffers, so maya does not need its own UV or normal passes
+            meshObject = mesh.create(points, polyFaces, buffers.PolygonConnects.tolist(), buffers.UValues.tolist(), buffers.VValues.tolist())
+            mesh.assignUVs(polyFaces, buffers.UVIds.tolist())
+        else:
+            meshObject = mesh.create(points, polyFaces, buffers.PolygonConnects.tolist())
+        if(buffers.Normals is not None):
+            # Unlocked once set, so later edits to the mesh still reshade it
+            vertexIds = list(range(len(buffers.Normals)))
+            mesh.setVertexNormals(om.MVectorArray(buffers.Normals.tolist()), vertexIds)
+            mesh.unlockVertexNormals(vertexIds)
+        meshName = om.MFnDagNode(meshObject).fullPathName()
+        self.Materials.AssignFaces(meshName, buffers.FaceMaterials, self.TrackMaterials)
+        return meshName
+
+    def GenerateWireTrack_Circular(self, circleRadius = 15, circleSubdivisions = 36, degreesToGenerate = 15, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4, useCache = True, targetFaces = None, maxError = None, lodLevels = 1, lodDistances = None, collisionProxy = False, background = False):
         """
             Function to generate a circular or segment wire track.
             
@@ -265,9 +1309,47 @@ class Generator():
             connectorNumber         :    The number of connector wires to generate evenly spaced along the wires.
             connectorSubdivisions   :    The number of subdivisions to generate for the connector wires. 
 
-            - no return
+            weldTolerance           :    Vertices closer than this are merged into one, 0 to skip welding.
+            useCache                :    Boolean, whether or not to reuse buffers built before with the same parameters.
+            targetFaces             :    If given, decimate the track down to this many triangles.
+            maxError                :    If given, decimate the track until the next collapse would add more quadric error than this.
+            lodLevels               :    The number of levels of detail to build under a LOD group, each with half the subdivisions of the one before, 1 for a single mesh.
+            lodDistances            :    The camera distances at which each coarser level takes over, defaults to multiples of the track size.
+            collisionProxy          :    Boolean, whether to also build a CollisionProxy of the track, kept as self.CollisionProxy.
+            background              :    Boolean, whether to build on a worker thread with a progress window, creating the mesh once it is done.
+
+            - Returns -1 if the parameters are not valid or the build is over budget.
         """
         
+        arguments = {"circleRadius" : circleRadius, "circleSubdivisions" : circleSubdivisions, "degreesToGenerate" : degreesToGenerate, "wireRadius" : wireRadius, "wireSubdivisions" : wireSubdivisions, "trackRadius" : trackRadius, 
+                     "trackDegrees" : trackDegrees, "wireNumber" : wireNumber, "connectorNumber" : connectorNumber, "connectorSubdivisions" : connectorSubdivisions, "wireCaps" : wireCaps, "weldTolerance" : weldTolerance}
+
+        # Refuse (or downscale) a build that would not fit the budgets, before any work is started
+        arguments = self.BudgetArguments("CircularWireTrack", arguments, targetFaces, lodLevels)
+        if(arguments == -1):
+            return -1
+
+        def commit(levels):
+            self.CommitLevels("CircularWireTrack", levels, lodDistances)
+
+            # Centreline of the track for animation, sampled densely around the circle
+            closed = degreesToGenerate >= 360
+            pathAngles = np.radians(np.linspace(0, degreesToGenerate, max(circleSubdivisions * 8, 256), endpoint=not closed) + (0.5 * (360 - degreesToGenerate)) - 90)
+            pathPoints = np.stack((circleRadius * np.cos(pathAngles), np.zeros_like(pathAngles), circleRadius * np.sin(pathAngles)), axis=1)
+            self.TrackPath = TrackPath(pathPoints, closed=closed, supportRadius=trackRadius - wireRadius)
+
+            # Capsules around the rails and connectors, for contact queries against the track without its polygons
+            if(collisionProxy):
+                self.CollisionProxy = self.BuildCollisionProxy("CircularWireTrack", arguments)
+
+        # Build the buffers (on a worker thread in the background), then create the mesh, or one mesh per level of detail
+        return self.Run("Building Circular Wire Track", lambda: self.BuildLevels("CircularWireTrack", self.BuildCircularWireTrackBuffers, arguments, useCache, targetFaces, maxError, lodLevels), commit, background)
+
+    def BuildCircularWireTrackBuffers(self, circleRadius = 15, circleSubdivisions = 36, degreesToGenerate = 15, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ Build the buffers of a circular wire track without touching maya, see GenerateWireTrack_Circular for the parameters. 
+
+            - Returns the MeshBuffers, or -1 if the parameters are not valid.
+        """
         # Information on how to create a mesh from user defined verts using openmaya MFnMesh ::
         # https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371
         
@@ -281,8 +1363,6 @@ class Generator():
             print("ABORT: Too many wires of too wide radius, will overlap.")
             return -1 #wireRadius = (trackRadius * maths.pi * (trackDegrees / 360.0)) / wireNumber
 
-        mesh = om.MFnMesh()
-        
         # Define Vertices
         vertices = []
                     
@@ -292,17 +1372,25 @@ class Generator():
         # Define Face Vertex Nos
         polyFaces = []
 
+        # Define UVs and Normals
+        uValues, vValues, uvIds, normals = [], [], [], []
+
         # Create each wire in track circle
         TrackAngle = trackDegrees / (wireNumber - 1)
         for i in range(0, wireNumber):
+            self.ReportProgress(i / (wireNumber + connectorNumber + 1), "Building wires")
             angle = TrackAngle * i
             angle2 = maths.radians(angle + (0.5 * (360 - trackDegrees)) - 90)
             currentRailXY = (trackRadius * maths.cos(angle2)  + circleRadius, -trackRadius * maths.sin(angle2))
-            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, currentRailXY[0], circleSubdivisions, degreesToGenerate, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, centre=(0,currentRailXY[1],0))
+            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, currentRailXY[0], circleSubdivisions, degreesToGenerate, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, centre=(0,currentRailXY[1],0), uValues=uValues, vValues=vValues, uvIds=uvIds, normals=normals)
         
-        # Create each Wire Track Connector
+        railFaceCount = len(polyFaces)
+
+        # Create each Wire Track Connector (the last connector of a full circle would sit on the first)
         connectorAngle = degreesToGenerate / connectorNumber
-        for i in range(0, connectorNumber + 1):
+        closed = degreesToGenerate >= 360
+        for i in range(0, connectorNumber if closed else connectorNumber + 1):
+            self.ReportProgress((wireNumber + i) / (wireNumber + connectorNumber + 1), "Building connectors")
             # Add in rotation to angle gap down z-axis
             angle = connectorAngle * i
             angle2 = angle + (0.5 * (360 - degreesToGenerate)) - 90
@@ -311,7 +1399,7 @@ class Generator():
             connectorCentre = (circleRadius * maths.cos(angle2rad), 0, circleRadius * maths.sin(angle2rad))
 
             angle3 = 360 - angle2
-            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, trackRadius +(2* wireRadius), connectorSubdivisions, trackDegrees, centre=connectorCentre, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, wireCaps=True, flipXY=True, rotation=(0,angle3,0))
+            self.GenSingleWireArc(vertices, polygonConnects, polyFaces, trackRadius +(2* wireRadius), connectorSubdivisions, trackDegrees, centre=connectorCentre, wireRadius=wireRadius, wireSubdivisions=wireSubdivisions, wireCaps=True, flipXY=True, rotation=(0,angle3,0), uValues=uValues, vValues=vValues, uvIds=uvIds, normals=normals)
         
        
         '''print(len(vertices))
@@ -322,8 +1410,330 @@ class Generator():
         print(polyFaces)
         print(polygonConnects)'''
 
-        # Create Mesh
-        mesh.create(vertices, polyFaces, polygonConnects)
+        # Rail faces come first, then connectors
+        faceMaterials = np.full(len(polyFaces), MeshBuffers.Connectors, dtype=np.int32)
+        faceMaterials[:railFaceCount] = MeshBuffers.Rails
+        buffers = MeshBuffers(vertices, polyFaces, polygonConnects, faceMaterials, uValues, vValues, uvIds, normals)
+
+        # Merge coincident vertices where connectors touch the rails
+        if(weldTolerance > 0):
+            buffers = self.WeldVertices(buffers, weldTolerance)
+
+        return buffers
+
+    def BuildCollisionProxy(self, generator, arguments, tolerance = None):
+        """ Build the capsule collision proxy of a track from the centrelines of its rails and connectors, one capsule per straight enough run of each.
+
+            generator               :    The name of the track generator, "CircularWireTrack", "StraightWireTrack" or "TrackLayout".
+            arguments               :    The build arguments of the track, as passed to its Build...Buffers function.
+            tolerance               :    How far the capsules may stray from the curved centrelines, defaults to a tenth of the wire radius.
+
+            - Returns the CollisionProxy, or -1 if the parameters are not valid.
+        """
+        centrelines = {"CircularWireTrack" : self.CircularWireTrackCentrelines, "StraightWireTrack" : self.StraightWireTrackCentrelines, "TrackLayout" : self.TrackLayoutCentrelines}[generator](**arguments)
+        if(centrelines == -1):
+            return -1
+        wireRadius = arguments["wireRadius"]
+        if(tolerance is None):
+            tolerance = 0.1 * wireRadius
+
+        starts, ends, kinds = [], [], []
+        for points, closed, kind in centrelines:
+            if(closed):
+                points = np.vstack((points, points[:1]))
+            points = self.SimplifyPolyline(points, tolerance)
+            starts.append(points[:-1])
+            ends.append(points[1:])
+            kinds.append(np.full(len(points) - 1, kind, dtype=np.int32))
+        return CollisionProxy(np.concatenate(starts), np.concatenate(ends), wireRadius, np.concatenate(kinds))
+
+    def SimplifyPolyline(self, points, tolerance):
+        """ Drop the points of a polyline that lie within tolerance of the line between the points kept either side of them (Douglas-Peucker).
+
+            points                  :    Array of shape (n, 3) of the polyline points, in order.
+            tolerance               :    The furthest a dropped point may be from the simplified polyline.
+
+            - Returns the array of kept points, always including both ends.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        keep = np.zeros(len(points), dtype=bool)
+        keep[[0, -1]] = True
+        spans = [(0, len(points) - 1)]
+        while(spans):
+            first, last = spans.pop()
+            if(last - first < 2):
+                continue
+            inner = points[first + 1 : last]
+            axis = points[last] - points[first]
+            t = np.clip((inner - points[first]) @ axis / max(axis @ axis, 1e-12), 0.0, 1.0)
+            gaps = np.linalg.norm(inner - (points[first] + t[:, np.newaxis] * axis), axis=1)
+            worst = int(np.argmax(gaps))
+            if(gaps[worst] > tolerance):
+                split = first + 1 + worst
+                keep[split] = True
+                spans += [(first, split), (split, last)]
+        return points[keep]
+
+    def ArcCentreline(self, circleRadius, circleSubdivisions, degreesToGenerate, centre = (0,0,0), flipXY = False, rotation = (0,0,0)):
+        """ The centreline of a wire built by GenSingleWireArc with the same parameters, as the centre of each of its rings.
+
+            - Returns the array of shape (circleSubdivisions + 1, 3) of points, without the repeated seam point of a full circle.
+        """
+        angles = np.radians(np.linspace(0, degreesToGenerate, circleSubdivisions + 1) + (0.5 * (360 - degreesToGenerate)) - 90)
+        x = circleRadius * np.cos(angles)
+        y = np.zeros_like(angles)
+        z = circleRadius * np.sin(angles)
+        if(flipXY):
+            y, z = -z, y
+        # Each of the rotations is applied about the Y-Axis, as in GenSingleWireArc
+        theta = np.radians(sum(rotation))
+        x, z = x * np.cos(theta) + z * np.sin(theta), -x * np.sin(theta) + z * np.cos(theta)
+        points = np.stack((x, y, z), axis=1) + centre
+        return points[:-1] if degreesToGenerate >= 360 else points
+
+    def CircularWireTrackCentrelines(self, circleRadius = 15, circleSubdivisions = 36, degreesToGenerate = 15, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ The centrelines of the wires of a circular wire track, laid out as BuildCircularWireTrackBuffers builds them.
+
+            - Returns a list of (points, closed, kind) tuples, kind being MeshBuffers.Rails or MeshBuffers.Connectors.
+        """
+        closed = degreesToGenerate >= 360
+        TrackAngle = trackDegrees / max(wireNumber - 1, 1)
+        centrelines = []
+        for i in range(0, wireNumber):
+            angle2 = maths.radians(TrackAngle * i + (0.5 * (360 - trackDegrees)) - 90)
+            centrelines.append((self.ArcCentreline(trackRadius * maths.cos(angle2) + circleRadius, circleSubdivisions, degreesToGenerate, centre=(0, -trackRadius * maths.sin(angle2), 0)), closed, MeshBuffers.Rails))
+
+        connectorAngle = degreesToGenerate / connectorNumber
+        for i in range(0, connectorNumber if closed else connectorNumber + 1):
+            angle2 = connectorAngle * i + (0.5 * (360 - degreesToGenerate)) - 90
+            connectorCentre = (circleRadius * maths.cos(maths.radians(angle2)), 0, circleRadius * maths.sin(maths.radians(angle2)))
+            centrelines.append((self.ArcCentreline(trackRadius + (2 * wireRadius), connectorSubdivisions, trackDegrees, centre=connectorCentre, flipXY=True, rotation=(0, 360 - angle2, 0)), trackDegrees >= 360, MeshBuffers.Connectors))
+        return centrelines
+
+    def StraightWireTrackCentrelines(self, length = 15, lengthSubdivisions = 36, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorNumber = 15, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ The centrelines of the wires of a straight wire track, laid out as BuildStraightWireTrackBuffers builds them.
+
+            - Returns a list of (points, closed, kind) tuples, kind being MeshBuffers.Rails or MeshBuffers.Connectors.
+        """
+        TrackAngle = trackDegrees / max(wireNumber - 1, 1)
+        centrelines = []
+        for i in range(0, wireNumber):
+            angle2 = maths.radians(TrackAngle * i + (0.5 * (360 - trackDegrees)) - 90)
+            railXY = (trackRadius * maths.cos(angle2), -trackRadius * maths.sin(angle2))
+            centrelines.append((np.array([(railXY[0], railXY[1], 0), (railXY[0], railXY[1], length)]), False, MeshBuffers.Rails))
+
+        connectorDistance = length / connectorNumber
+        for i in range(0, connectorNumber + 1):
+            centrelines.append((self.ArcCentreline(trackRadius + (2 * wireRadius), connectorSubdivisions, trackDegrees, centre=(0, 0, connectorDistance * i), flipXY=True), trackDegrees >= 360, MeshBuffers.Connectors))
+        return centrelines
+
+    def TrackLayoutCentrelines(self, segments, subdivisionLength = 0.5, wireRadius = 0.5, wireSubdivisions = 5, trackRadius=3.0, trackDegrees=180, wireNumber = 4, connectorSpacing = 2.0, connectorSubdivisions = 20, wireCaps = True, weldTolerance = 1e-4):
+        """ The centrelines of the wires of a track layout, laid out as BuildTrackLayoutBuffers builds them.
+
+            - Returns a list of (points, closed, kind) tuples, kind being MeshBuffers.Rails or MeshBuffers.Connectors, or -1 if a segment is not valid.
+        """
+        centreline = self.LayoutCentreline(segments, subdivisionLength, weldTolerance)
+        if(centreline is None):
+            return -1
+        centres, tangents, ups, closed = centreline
+        sides = np.cross(ups, tangents)
+
+        TrackAngle = trackDegrees / max(wireNumber - 1, 1)
+        centrelines = []
+        for i in range(0, wireNumber):
+            angle2 = maths.radians(TrackAngle * i + (0.5 * (360 - trackDegrees)) - 90)
+            centrelines.append((centres + trackRadius * (maths.cos(angle2) * sides - maths.sin(angle2) * ups), closed, MeshBuffers.Rails))
+
+        path = TrackPath(centres, ups, closed=closed)
+        connectorNumber = max(int(path.Length / connectorSpacing), 1)
+        connectorDistances = np.linspace(0, path.Length, connectorNumber, endpoint=False) if closed else np.linspace(0, path.Length, connectorNumber + 1)
+        connectorCentres, connectorTangents, connectorUps = path.Sample(connectorDistances)
+        arcAngles = np.radians(np.linspace(0, trackDegrees, connectorSubdivisions + 1) + (0.5 * (360 - trackDegrees)) - 90)
+        for centre, up, side in zip(connectorCentres, connectorUps, np.cross(connectorUps, connectorTangents)):
+            radial = np.outer(np.cos(arcAngles), side) - np.outer(np.sin(arcAngles), up)
+            centrelines.append((centre + (trackRadius + (2 * wireRadius)) * radial, False, MeshBuffers.Connectors))
+        return centrelines
+
+    def AnimateBallAlongTrack(self, path=None, ballName=None, ballRadius=None, speed=5.0, startFrame=1, endFrame=250):
+        """ Keys a ball rolling at a constant speed along a generated track, writing every frame in one bulk operation.
+
+            path        :    The TrackPath to follow, defaults to the path of the last generated track.
+            ballName    :    The name of the ball to animate, a new sphere is created if not given.
+            ballRadius  :    The radius of the ball, defaults to filling the track so its centre follows the centreline.
+            speed       :    The speed of the ball, in maya units per second.
+            startFrame  :    The first frame to key.
+            endFrame    :    The last frame to key.
+
+            - Returns the name of the animated ball, or -1 if there is no track to follow.
+        """
+        if(path is None):
+            path = getattr(self, "TrackPath", None)
+        if(path is None or path.Length <= 0):
+            print("ABORT: No track has been generated to animate along.")
+            return -1
+        if(ballRadius is None or ballRadius <= 0):
+            ballRadius = path.SupportRadius if path.SupportRadius > 0 else 0.5
+        if(ballName is None or not cmds.objExists(ballName)):
+            ballName = cmds.polySphere(n="Ball", r=ballRadius)[0]
+
+        baker = AnimationBaker()
+        frames = np.arange(startFrame, endFrame + 1, dtype=np.float64)
+        distances = speed * (frames - startFrame) / baker.FramesPerSecond()
+        baker.BakeAttributes(ballName, frames, self.BallChannels(path, ballRadius, distances))
+        return ballName
+
+    def AnimateBallLoop(self, path=None, ballName=None, ballRadius=None, speed=5.0, startFrame=1, period=None, ballCount=1):
+        """ Keys a ball rolling at a constant speed around a track for exactly one cycle, repeated for the rest of the shot by the curves' infinity, 
+            and duplicates it into balls spread evenly around the cycle. The key count stays the same whatever the shot length.
+
+            path        :    The TrackPath to follow, defaults to the path of the last generated track.
+            ballName    :    The name of the ball to animate, a new sphere is created if not given.
+            ballRadius  :    The radius of the ball, defaults to filling the track.
+            speed       :    The speed of the ball, in maya units per second.
+            startFrame  :    The frame the keyed cycle starts on.
+            period      :    The length of the cycle in frames, defaults to one lap of a closed track. On an open track the ball travels on 
+                             from where each cycle ends (cycle with offset), like the track repeated end to end.
+            ballCount   :    The number of balls around the cycle, including the keyed one.
+
+            - Returns the list of ball names, or -1 if there is no track to follow or no period for an open track.
+        """
+        if(path is None):
+            path = getattr(self, "TrackPath", None)
+        if(path is None or path.Length <= 0):
+            print("ABORT: No track has been generated to animate along.")
+            return -1
+        if(ballRadius is None or ballRadius <= 0):
+            ballRadius = path.SupportRadius if path.SupportRadius > 0 else 0.5
+
+        baker = AnimationBaker()
+        if(period is None):
+            if(not path.Closed):
+                print("ABORT: The track is not a closed loop, so the cycle length must be given.")
+                return -1
+            period = path.Length / speed * baker.FramesPerSecond()
+        if(ballName is None or not cmds.objExists(ballName)):
+            ballName = cmds.polySphere(n="Ball", r=ballRadius)[0]
+
+        # Every frame of the cycle, with the last key exactly one period on from the first so the cycle closes
+        frames = startFrame + np.append(np.arange(0.0, period - 1e-6), period)
+        distances = speed * (frames - startFrame) / baker.FramesPerSecond()
+        baker.BakeAttributes(ballName, frames, self.BallChannels(path, ballRadius, distances), cycle=True)
+        return [ballName] + baker.PhaseCopies(ballName, period, ballCount)
+
+    def AnimateBallCrowd(self, path=None, ballCount=10, spacing=None, ballRadius=None, speed=5.0, startFrame=1, endFrame=250, loop=False, copyKeys=False):
+        """ Fills a track with balls following one another, keying a single master ball and driving the rest from its curves with time offsets, 
+            so each extra ball adds a shape instance and a few frameCache nodes rather than a full set of keys.
+
+            path        :    The TrackPath to follow, defaults to the path of the last generated track.
+            ballCount   :    The number of balls, including the master.
+            spacing     :    The frames between one ball and the next, defaults to spreading the balls evenly around a loop, or to half a second.
+            ballRadius  :    The radius of the balls, defaults to filling the track.
+            speed       :    The speed of the balls, in maya units per second.
+            startFrame  :    The first frame of the shot.
+            endFrame    :    The last frame of the shot.
+            loop        :    Boolean, whether the master keys one lap of a closed track (see AnimateBallLoop) rather than the whole shot.
+            copyKeys    :    Boolean, whether each extra ball is a copy of the master with its own keys, moved in time, rather than replaying the master's.
+
+            - Returns the list of ball names, master first, or -1 if there is no track to follow.
+        """
+        if(path is None):
+            path = getattr(self, "TrackPath", None)
+        if(path is None or path.Length <= 0):
+            print("ABORT: No track has been generated to animate along.")
+            return -1
+
+        fps = AnimationBaker().FramesPerSecond()
+        if(loop):
+            master = self.AnimateBallLoop(path, ballRadius=ballRadius, speed=speed, startFrame=startFrame)
+            if(master == -1):
+                return -1
+            master = master[0]
+            if(spacing is None):
+                spacing = path.Length / speed * fps / ballCount
+        else:
+            if(spacing is None):
+                spacing = fps / 2
+            # The master runs ahead by the whole queue, so the last ball is already moving on the first frame
+            master = self.AnimateBallAlongTrack(path, ballRadius=ballRadius, speed=speed, startFrame=startFrame - int(np.ceil(spacing * (ballCount - 1))), endFrame=endFrame)
+
+        offsets = [spacing * ball for ball in range(1, ballCount)]
+        if(copyKeys):
+            return [master] + AnimationBaker().KeyedCopies(master, offsets)
+        attributes = ["translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ"]
+        return [master] + AnimationBaker().TimeOffsetCopies(master, attributes, offsets, name="CrowdBall")
+
+    def BallChannels(self, path, ballRadius, distances):
+        """ Work out the transform channels of a ball rolling along a track.
+
+            path        :    The TrackPath to follow.
+            ballRadius  :    The radius of the ball.
+            distances   :    Array of the distances along the track to place the ball at.
+
+            - Returns a dictionary of attribute name to an array of values, one per distance, ready for AnimationBaker.BakeAttributes.
+        """
+        # Ball rests on the rails, below the centreline when smaller than the track
+        positions, tangents, ups = path.Sample(distances)
+        positions = positions - ups * (path.SupportRadius - ballRadius)
+
+        # Rolling: spin about the local X axis by distance / radius, then turn to face along the track
+        roll = distances / ballRadius
+        heading = np.unwrap(np.arctan2(tangents[:, 0], tangents[:, 2]))
+
+        return {"translateX" : positions[:, 0], "translateY" : positions[:, 1], "translateZ" : positions[:, 2], 
+                "rotateX" : roll, "rotateY" : heading, "rotateZ" : np.zeros_like(roll)}
+
+    def SimulateBallsOnTrack(self, path=None, startDistances=(0.0,), startSpeeds=(0.0,), ballRadius=None, startFrame=1, endFrame=250, gravity=9.8, rollingFriction=0.01, stepsPerFrame=8, loop=False, ballCount=None):
+        """ Simulates balls rolling under gravity along a generated track and bakes every ball's trajectory to keys.
+
+            path            :    The TrackPath to follow, defaults to the path of the last generated track.
+            startDistances  :    The start distance of each ball along the track.
+            startSpeeds     :    The start speed of each ball along the track (a single value is shared by every ball).
+            ballRadius      :    The radius of the balls, defaults to filling the track.
+            startFrame      :    The first frame to key.
+            endFrame        :    The last frame to key.
+            gravity         :    The acceleration due to gravity, in maya units per second squared.
+            rollingFriction :    The rolling resistance coefficient.
+            stepsPerFrame   :    The number of fixed integration steps taken each frame.
+            loop            :    Boolean, whether to look for a ball's motion repeating (such as a frictionless ball circling a closed track) 
+                                 and key only its first cycle, repeated by the curves' infinity.
+            ballCount       :    The number of balls to start spread evenly along the track, in place of startDistances (optional).
+
+            - Returns a list of the animated ball names, or -1 if there is no track to follow.
+        """
+        if(path is None):
+            path = getattr(self, "TrackPath", None)
+        if(path is None or path.Length <= 0):
+            print("ABORT: No track has been generated to simulate on.")
+            return -1
+        if(ballCount is not None):
+            startDistances = path.Length * np.arange(ballCount) / ballCount
+
+        baker = AnimationBaker()
+        simulator = TrackSimulator(path, ballRadius=ballRadius, gravity=gravity, rollingFriction=rollingFriction, stepsPerFrame=stepsPerFrame)
+        frames = np.arange(startFrame, endFrame + 1, dtype=np.float64)
+        positions, rolls, headings, detachFrames = simulator.Simulate(startDistances, startSpeeds, len(frames), fps=baker.FramesPerSecond())
+
+        for ball in np.flatnonzero(detachFrames >= 0):
+            print("Ball %d left the track at frame %d." % (ball, frames[detachFrames[ball]]))
+
+        ballNames = []
+        for ball in range(positions.shape[1]):
+            ballName = cmds.polySphere(n="Ball", r=simulator.BallRadius)[0]
+            channels = {"translateX" : positions[:, ball, 0], "translateY" : positions[:, ball, 1], "translateZ" : positions[:, ball, 2], 
+                        "rotateX" : rolls[:, ball], "rotateY" : headings[:, ball], "rotateZ" : np.zeros(len(frames))}
+            # The distance rolled tells when the ball gets back to its start, which is rarely on a whole frame
+            period = baker.DetectPeriod(np.stack(list(channels.values()), axis=-1), distances=rolls[:, ball] * simulator.BallRadius, lapLength=path.Length if path.Closed else None) if loop else None
+            if(period is not None):
+                # Every frame of the cycle, with the last key exactly one period on from the first so the cycle closes
+                cycleFrames = np.append(np.arange(0.0, period - 1e-6), period)
+                cycleValues = baker.Resample(np.stack(list(channels.values()), axis=-1), cycleFrames)
+                baker.BakeAttributes(ballName, startFrame + cycleFrames, {attribute : cycleValues[:, i] for i, attribute in enumerate(channels)}, cycle=True, tolerance=1e-3)
+            else:
+                if(loop):
+                    print("Ball %d does not settle into a loop, keying every frame." % ball)
+                baker.BakeAttributes(ballName, frames, channels)
+            ballNames.append(ballName)
+        return ballNames
 
 
 class MainWindow():
@@ -366,22 +1776,43 @@ class MainWindow():
         self.CW_WireNumber_Val = 4
         self.CW_ConnectorNumber_val = 15
         self.CW_ConnectorDivisions_val = 15
+        self.CW_LODLevels_val = 1
+        self.CW_VertexBudget_val = Generator.VertexBudget
+        self.CW_BallRadius_val = 2.5
+        self.CW_BallSpeed_val = 5.0
+        self.CW_StartFrame_val = 1
+        self.CW_EndFrame_val = 250
+        self.CW_BallCount_val = 1
 
         shelf3 = cmds.rowColumnLayout()#"Circle Wire Track Generator")
         self.CW_TrackType = cmds.radioButtonGrp(label='Track Type', labelArray2=['Circular','Straight'], numberOfRadioButtons=2, sl=1, cc=self.RadioButtonUpdate_CW_TrackType)
-        self.CW_TrackLength = cmds.floatSliderGrp(label='Track Length',  field=True, min=0.1, max = 1000.0, value=self.CW_TrackLength_val, step=0.1, dc=self.SliderUpdate_CW_CircleRadius)
-        self.CW_TrackSubdivisions = cmds.intSliderGrp(label='Track Subdivisions', field=True, min=5, max = 360, value=self.CW_TrackSubdivisions_val, step=1, dc=self.SliderUpdate_CW_CircleDivisions)
-        self.CW_WireRadius = cmds.floatSliderGrp(label='Wire Radius',  field=True, min=0.1, max = 90.0, value=self.CW_WireRadius_Val, step=0.1, dc=self.SliderUpdate_CW_WireRadius)
-        self.CW_WireDivisions = cmds.intSliderGrp(label='Wire Subdivisions', field=True, min=3, max = 50, value=self.CW_WireDivisions_Val, step=1, dc=self.SliderUpdate_CW_WireDivisions)
-        self.CW_CircleRadius = cmds.floatSliderGrp(label='Circle Radius',  field=True, min=0.1, max = 90.0, value=self.CW_CircleRadius_val, step=0.1, dc=self.SliderUpdate_CW_CircleRadius)
-        self.CW_CircleCompletionAngle = cmds.floatSliderGrp(label='Circle Completion Angle',  field=True, min=5.0, max = 360.0, value=self.CW_CircleCompletionAngle_val, step=0.1, dc=self.SliderUpdate_CW_CircleCompletionAngle)
-        self.CW_CircleDivisions = cmds.intSliderGrp(label='Circle Subdivisions', field=True, min=5, max = 360, value=self.CW_CircleDivisions_val, step=1, dc=self.SliderUpdate_CW_CircleDivisions)
-        self.CW_TrackRadius = cmds.floatSliderGrp(label='Track Circle Radius',  field=True, min=0.1, max = 90.0, value=self.CW_TrackRadius_val, step=0.1, dc=self.SliderUpdate_CW_TrackRadius)
-        self.CW_TrackCompletionAngle = cmds.floatSliderGrp(label='Track Circle Completion Angle',  field=True, min=5.0, max = 360.0, value=self.CW_TrackCompletionAngle_val, step=0.1, dc=self.SliderUpdate_CW_TrackCompletionAngle)
-        self.CW_WireNumber = cmds.intSliderGrp(label='No of Wires', field=True, min=1, max = 50, value=self.CW_WireNumber_Val, step=1, dc=self.SliderUpdate_CW_WireNumber)
-        self.CW_ConnectorNumber = cmds.intSliderGrp(label='No of Connectors', field=True, min=1, max = 50, value=self.CW_ConnectorNumber_val, step=1, dc=self.SliderUpdate_CW_ConnectorNumber)
-        self.CW_ConnectorDivisions = cmds.intSliderGrp(label='Connector Subdivisions', field=True, min=3, max = 50, value=self.CW_ConnectorDivisions_val, step=1, dc=self.SliderUpdate_CW_ConnectorDivisions)
+        self.CW_TrackLength = cmds.floatSliderGrp(label='Track Length',  field=True, min=0.1, max = 1000.0, value=self.CW_TrackLength_val, step=0.1, cc=self.SliderUpdate_CW_TrackLength)
+        self.CW_TrackSubdivisions = cmds.intSliderGrp(label='Track Subdivisions', field=True, min=5, max = 360, value=self.CW_TrackSubdivisions_val, step=1, cc=self.SliderUpdate_CW_TrackSubdivisions)
+        self.CW_WireRadius = cmds.floatSliderGrp(label='Wire Radius',  field=True, min=0.1, max = 90.0, value=self.CW_WireRadius_Val, step=0.1, cc=self.SliderUpdate_CW_WireRadius)
+        self.CW_WireDivisions = cmds.intSliderGrp(label='Wire Subdivisions', field=True, min=3, max = 50, value=self.CW_WireDivisions_Val, step=1, cc=self.SliderUpdate_CW_WireDivisions)
+        self.CW_CircleRadius = cmds.floatSliderGrp(label='Circle Radius',  field=True, min=0.1, max = 90.0, value=self.CW_CircleRadius_val, step=0.1, cc=self.SliderUpdate_CW_CircleRadius)
+        self.CW_CircleCompletionAngle = cmds.floatSliderGrp(label='Circle Completion Angle',  field=True, min=5.0, max = 360.0, value=self.CW_CircleCompletionAngle_val, step=0.1, cc=self.SliderUpdate_CW_CircleCompletionAngle)
+        self.CW_CircleDivisions = cmds.intSliderGrp(label='Circle Subdivisions', field=True, min=5, max = 360, value=self.CW_CircleDivisions_val, step=1, cc=self.SliderUpdate_CW_CircleDivisions)
+        self.CW_TrackRadius = cmds.floatSliderGrp(label='Track Circle Radius',  field=True, min=0.1, max = 90.0, value=self.CW_TrackRadius_val, step=0.1, cc=self.SliderUpdate_CW_TrackRadius)
+        self.CW_TrackCompletionAngle = cmds.floatSliderGrp(label='Track Circle Completion Angle',  field=True, min=5.0, max = 360.0, value=self.CW_TrackCompletionAngle_val, step=0.1, cc=self.SliderUpdate_CW_TrackCompletionAngle)
+        self.CW_WireNumber = cmds.intSliderGrp(label='No of Wires', field=True, min=1, max = 50, value=self.CW_WireNumber_Val, step=1, cc=self.SliderUpdate_CW_WireNumber)
+        self.CW_ConnectorNumber = cmds.intSliderGrp(label='No of Connectors', field=True, min=1, max = 50, value=self.CW_ConnectorNumber_val, step=1, cc=self.SliderUpdate_CW_ConnectorNumber)
+        self.CW_ConnectorDivisions = cmds.intSliderGrp(label='Connector Subdivisions', field=True, min=3, max = 50, value=self.CW_ConnectorDivisions_val, step=1, cc=self.SliderUpdate_CW_ConnectorDivisions)
+        self.CW_LODLevels = cmds.intSliderGrp(label='LOD Levels', field=True, min=1, max = 4, value=self.CW_LODLevels_val, step=1, cc=self.SliderUpdate_CW_LODLevels)
+        self.CW_VertexBudget = cmds.intFieldGrp(label='Vertex Budget', numberOfFields=1, value1=self.CW_VertexBudget_val, cc=self.FieldUpdate_CW_VertexBudget)
+        self.CW_OverBudget = cmds.radioButtonGrp(label='Over Budget', labelArray2=['Refuse','Downscale'], numberOfRadioButtons=2, sl=1, cc=self.RadioButtonUpdate_CW_OverBudget)
+        self.CW_CollisionProxy = cmds.checkBoxGrp(label='Collision Proxy', label1='Build Capsules', numberOfCheckBoxes=1, value1=False)
+        self.CW_Estimate = cmds.text(label='', align='left')
         cmds.button(label='Build Circular Wire Track', c= self.BuildCircularWireTrack, width=200)
+        cmds.separator(style='shelf')
+        self.CW_BallRadius = cmds.floatSliderGrp(label='Ball Radius',  field=True, min=0.1, max = 90.0, value=self.CW_BallRadius_val, step=0.1, dc=self.SliderUpdate_CW_BallRadius)
+        self.CW_BallSpeed = cmds.floatSliderGrp(label='Ball Speed',  field=True, min=0.1, max = 100.0, value=self.CW_BallSpeed_val, step=0.1, dc=self.SliderUpdate_CW_BallSpeed)
+        self.CW_FrameRange = cmds.intFieldGrp(label='Frame Range', numberOfFields=2, value1=self.CW_StartFrame_val, value2=self.CW_EndFrame_val, cc=self.FieldUpdate_CW_FrameRange)
+        self.CW_BallMotion = cmds.radioButtonGrp(label='Ball Motion', labelArray2=['Constant Speed','Gravity'], numberOfRadioButtons=2, sl=1)
+        self.CW_Loop = cmds.checkBoxGrp(label='Loop', label1='Key One Cycle', numberOfCheckBoxes=1, value1=False)
+        self.CW_BallCount = cmds.intSliderGrp(label='No of Balls', field=True, min=1, max = 50, value=self.CW_BallCount_val, step=1, dc=self.SliderUpdate_CW_BallCount)
+        self.CW_ExtraBalls = cmds.radioButtonGrp(label='Extra Balls', labelArray2=['Copy Keys','Time Offset'], numberOfRadioButtons=2, sl=2)
+        cmds.button(label='Animate Ball Along Track', c= self.AnimateBall, width=200)
         # Cancel Button
         cmds.button(label='cancel', command="cmds.deleteUI('%s')" % self.Window, width=200)
 
@@ -417,55 +1848,135 @@ class MainWindow():
             cmds.floatSliderGrp(self.CW_CircleRadius, e=True, enable=False)
             cmds.floatSliderGrp(self.CW_CircleCompletionAngle, e=True, enable=False)
             cmds.intSliderGrp(self.CW_CircleDivisions, e=True, enable=False)
+        self.UpdateEstimate()
 
 
     def SliderUpdate_CW_WireRadius(self, *_):
         """ Updates the Circle Wire Wire Radius variable with the value from the associated slider. """
         self.CW_WireRadius_Val = cmds.floatSliderGrp(self.CW_WireRadius, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_WireDivisions(self, *_):
         """ Updates the Circle Wire Wire Subdivisions variable with the value from the associated slider. """
         self.CW_WireDivisions_Val = cmds.intSliderGrp(self.CW_WireDivisions, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_TrackLength(self, *_):
         """ Updates the Circle Wire Straight Track Length variable with the value from the associated slider. """
         self.CW_TrackLength_val = cmds.floatSliderGrp(self.CW_TrackLength, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_TrackSubdivisions(self, *_):
         """ Updates the Circle Wire Straight Track Subdivisions variable with the value from the associated slider. """
         self.CW_TrackSubdivisions_val = cmds.intSliderGrp(self.CW_TrackSubdivisions, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_CircleRadius(self, *_):
         """ Updates the Circle Wire Circle Radius variable with the value from the associated slider. """
         self.CW_CircleRadius_val = cmds.floatSliderGrp(self.CW_CircleRadius, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_CircleCompletionAngle(self, *_):
         """ Updates the Circle Wire Circle Completion Angle variable with the value from the associated slider. """
         self.CW_CircleCompletionAngle_val = cmds.floatSliderGrp(self.CW_CircleCompletionAngle, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_CircleDivisions(self, *_):
         """ Updates the Circle Wire Circle Subdivisions variable with the value from the associated slider. """
         self.CW_CircleDivisions_val = cmds.intSliderGrp(self.CW_CircleDivisions, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_TrackRadius(self, *_):
         """ Updates the Circle Wire Track Radius variable with the value from the associated slider. """
         self.CW_TrackRadius_val = cmds.floatSliderGrp(self.CW_TrackRadius, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_TrackCompletionAngle(self, *_):
         """ Updates the Circle Wire Track Completion Angle with the value from the associated slider. """
         self.CW_TrackCompletionAngle_val = cmds.floatSliderGrp(self.CW_TrackCompletionAngle, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_WireNumber(self, *_):
         """ Updates the Circle Wire Number of Wires variable with the value from the associated slider. """
         self.CW_WireNumber_Val = cmds.intSliderGrp(self.CW_WireNumber, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_ConnectorNumber(self, *_):
         """ Updates the Circle Wire Number of Connectors variable with the value from the associated slider. """
         self.CW_ConnectorNumber_val = cmds.intSliderGrp(self.CW_ConnectorNumber, q=True, v=True)
+        self.UpdateEstimate()
 
     def SliderUpdate_CW_ConnectorDivisions(self, *_):
         """ Updates the Circle Wire Connector Subdivisions variable with the value from the associated slider. """
         self.CW_ConnectorDivisions_val = cmds.intSliderGrp(self.CW_ConnectorDivisions, q=True, v=True)
+        self.UpdateEstimate()
+
+    def SliderUpdate_CW_BallRadius(self, *_):
+        """ Updates the Ball Radius variable with the value from the associated slider. """
+        self.CW_BallRadius_val = cmds.floatSliderGrp(self.CW_BallRadius, q=True, v=True)
+
+    def SliderUpdate_CW_BallSpeed(self, *_):
+        """ Updates the Ball Speed variable with the value from the associated slider. """
+        self.CW_BallSpeed_val = cmds.floatSliderGrp(self.CW_BallSpeed, q=True, v=True)
+
+    def SliderUpdate_CW_BallCount(self, *_):
+        """ Updates the number of looping balls with the value from the associated slider. """
+        self.CW_BallCount_val = cmds.intSliderGrp(self.CW_BallCount, q=True, v=True)
+
+    def FieldUpdate_CW_FrameRange(self, *_):
+        """ Updates the animation Start and End Frame variables with the values from the associated fields. """
+        self.CW_StartFrame_val = cmds.intFieldGrp(self.CW_FrameRange, q=True, value1=True)
+        self.CW_EndFrame_val = cmds.intFieldGrp(self.CW_FrameRange, q=True, value2=True)
+
+    def AnimateBall(self, *_):
+        """ Keys a ball along the last built track, at constant speed or simulated under gravity. """
+        self.SliderUpdate_CW_BallRadius()
+        self.SliderUpdate_CW_BallSpeed()
+        self.FieldUpdate_CW_FrameRange()
+        self.SliderUpdate_CW_BallCount()
+        loop = cmds.checkBoxGrp(self.CW_Loop, q=True, value1=True)
+        copyKeys = cmds.radioButtonGrp(self.CW_ExtraBalls, q=True, sl=True) == 1
+        if (cmds.radioButtonGrp(self.CW_BallMotion, q=True, sl=True) == 1):
+            if(self.CW_BallCount_val > 1 and not (copyKeys and loop)):
+                self.NewGenerator.AnimateBallCrowd(ballCount=self.CW_BallCount_val, ballRadius=self.CW_BallRadius_val, speed=self.CW_BallSpeed_val, startFrame=self.CW_StartFrame_val, endFrame=self.CW_EndFrame_val, loop=loop, copyKeys=copyKeys)
+            elif(loop):
+                self.NewGenerator.AnimateBallLoop(ballRadius=self.CW_BallRadius_val, speed=self.CW_BallSpeed_val, startFrame=self.CW_StartFrame_val, ballCount=self.CW_BallCount_val)
+            else:
+                self.NewGenerator.AnimateBallAlongTrack(ballRadius=self.CW_BallRadius_val, speed=self.CW_BallSpeed_val, startFrame=self.CW_StartFrame_val, endFrame=self.CW_EndFrame_val)
+        else:
+            # Ball speed is used as the start speed of every ball when simulating, the balls spread evenly along the track
+            self.NewGenerator.SimulateBallsOnTrack(ballRadius=self.CW_BallRadius_val, startSpeeds=(self.CW_BallSpeed_val,), startFrame=self.CW_StartFrame_val, endFrame=self.CW_EndFrame_val, loop=loop, ballCount=self.CW_BallCount_val)
+
+    def SliderUpdate_CW_LODLevels(self, *_):
+        """ Updates the CW_LODLevels_val variable with the value from the associated slider. """
+        self.CW_LODLevels_val = cmds.intSliderGrp(self.CW_LODLevels, q=True, v=True)
+        self.UpdateEstimate()
+
+    def FieldUpdate_CW_VertexBudget(self, *_):
+        """ Updates the generator vertex budget with the value from the associated field. """
+        self.CW_VertexBudget_val = cmds.intFieldGrp(self.CW_VertexBudget, q=True, value1=True)
+        self.NewGenerator.VertexBudget = self.CW_VertexBudget_val
+        self.UpdateEstimate()
+
+    def RadioButtonUpdate_CW_OverBudget(self, *_):
+        """ Updates whether the generator refuses or downscales a build over budget, from the associated radio buttons. """
+        self.NewGenerator.BudgetAction = "Refuse" if cmds.radioButtonGrp(self.CW_OverBudget, q=True, sl=True) == 1 else "Downscale"
+        self.UpdateEstimate()
+
+    def UpdateEstimate(self, *_):
+        """ Shows the predicted size, memory and build time of the track with the current settings, without building it. """
+        arguments = {"wireRadius" : self.CW_WireRadius_Val, "wireSubdivisions" : self.CW_WireDivisions_Val, "trackRadius" : self.CW_TrackRadius_val, "trackDegrees" : self.CW_TrackCompletionAngle_val, 
+                     "wireNumber" : self.CW_WireNumber_Val, "connectorNumber" : self.CW_ConnectorNumber_val, "connectorSubdivisions" : self.CW_ConnectorDivisions_val, "wireCaps" : True, "weldTolerance" : 1e-4}
+        if (cmds.radioButtonGrp(self.CW_TrackType, q=True, sl=True) == 1):
+            generator = "CircularWireTrack"
+            arguments.update({"circleRadius" : self.CW_CircleRadius_val, "circleSubdivisions" : self.CW_CircleDivisions_val, "degreesToGenerate" : self.CW_CircleCompletionAngle_val})
+        else:
+            generator = "StraightWireTrack"
+            arguments.update({"length" : self.CW_TrackLength_val, "lengthSubdivisions" : self.CW_TrackSubdivisions_val})
+
+        estimate = self.NewGenerator.EstimateCost(generator, arguments, lodLevels=self.CW_LODLevels_val)
+        overBudget = "" if self.NewGenerator.WithinBudget(estimate) else " (over budget)"
+        cmds.text(self.CW_Estimate, e=True, label="Estimate: " + estimate.Summary() + overBudget)
 
     def BuildCircularWireTrack(self, *_):
         """ Starts the building of the circular wire track. """
@@ -482,13 +1993,23 @@ class MainWindow():
         self.SliderUpdate_CW_WireNumber()
         self.SliderUpdate_CW_ConnectorNumber()
         self.SliderUpdate_CW_ConnectorDivisions()
+        self.SliderUpdate_CW_LODLevels()
+        self.FieldUpdate_CW_VertexBudget()
+        self.RadioButtonUpdate_CW_OverBudget()
 
         # Then call the generator
         if (cmds.radioButtonGrp(self.CW_TrackType, q=True, sl=True) == 1):
-            self.NewGenerator.GenerateWireTrack_Circular(circleRadius=self.CW_CircleRadius_val, circleSubdivisions=self.CW_CircleDivisions_val, degreesToGenerate=self.CW_CircleCompletionAngle_val, wireRadius=self.CW_WireRadius_Val, wireSubdivisions=self.CW_WireDivisions_Val, connectorNumber=self.CW_ConnectorNumber_val, trackRadius=self.CW_TrackRadius_val, trackDegrees=self.CW_TrackCompletionAngle_val, wireNumber=self.CW_WireNumber_Val, connectorSubdivisions=self.CW_ConnectorDivisions_val)
+            self.NewGenerator.GenerateWireTrack_Circular(circleRadius=self.CW_CircleRadius_val, circleSubdivisions=self.CW_CircleDivisions_val, degreesToGenerate=self.CW_CircleCompletionAngle_val, wireRadius=self.CW_WireRadius_Val, wireSubdivisions=self.CW_WireDivisions_Val, connectorNumber=self.CW_ConnectorNumber_val, trackRadius=self.CW_TrackRadius_val, trackDegrees=self.CW_TrackCompletionAngle_val, wireNumber=self.CW_WireNumber_Val, connectorSubdivisions=self.CW_ConnectorDivisions_val, lodLevels=self.CW_LODLevels_val, collisionProxy=cmds.checkBoxGrp(self.CW_CollisionProxy, q=True, value1=True), background=True)
         else:
-            self.NewGenerator.GenerateStraightWireTrack(length=self.CW_TrackLength_val, lengthSubdivisions=self.CW_TrackSubdivisions_val, wireRadius=self.CW_WireRadius_Val, wireSubdivisions=self.CW_WireDivisions_Val, connectorNumber=self.CW_ConnectorNumber_val, trackRadius=self.CW_TrackRadius_val, trackDegrees=self.CW_TrackCompletionAngle_val, wireNumber=self.CW_WireNumber_Val, connectorSubdivisions=self.CW_ConnectorDivisions_val)
+            self.NewGenerator.GenerateStraightWireTrack(length=self.CW_TrackLength_val, lengthSubdivisions=self.CW_TrackSubdivisions_val, wireRadius=self.CW_WireRadius_Val, wireSubdivisions=self.CW_WireDivisions_Val, connectorNumber=self.CW_ConnectorNumber_val, trackRadius=self.CW_TrackRadius_val, trackDegrees=self.CW_TrackCompletionAngle_val, wireNumber=self.CW_WireNumber_Val, connectorSubdivisions=self.CW_ConnectorDivisions_val, lodLevels=self.CW_LODLevels_val, collisionProxy=cmds.checkBoxGrp(self.CW_CollisionProxy, q=True, value1=True), background=True)
             
+def main():
+    """ Opens the Wire Track Generator window, the entry point when the script is run in maya (importing the module does not open it). 
+
+        - Returns the MainWindow.
+    """
+    return MainWindow()
+
 # start the main program
 if __name__=="__main__":
-    main = MainWindow()
\ No newline at end of file
+    mainWindow = main()
\ No newline at end of file
@@ -16,9 +16,43 @@
                 日本テレビ, 1997. マジカル頭脳パワー Available at: https://www.bilibili.com/video/BV1Ga411w7Xs/?p=10&spm_id_from=pageDriver [Accessed 12 2021]
 """
 
-import maya.cmds as cmds
-import maya.api.OpenMaya as om
-import maya.OpenMaya as om1
+import numpy as np
+import ctypes
+import hashlib
+import importlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# The shared core is imported by its file name (which starts with digits, so no import statement can name it), from the folder of this script or the python path
+scriptFolder = os.path.dirname(os.path.abspath(__file__)) if "__file__" in globals() else os.getcwd()
+if(scriptFolder not in sys.path):
+    sys.path.append(scriptFolder)
+core = importlib.import_module("00_GeometryCore")
+
+# The classes shared with the other generator script
+LazyModule = core.LazyModule
+GeometryCache = core.GeometryCache
+MeshDecimator = core.MeshDecimator
+BuildCancelled = core.BuildCancelled
+BuildTask = core.BuildTask
+MeshBuffers = core.MeshBuffers
+AnimationBaker = core.AnimationBaker
+MaterialRegistry = core.MaterialRegistry
+CostEstimate = core.CostEstimate
+MeshGenerator = core.MeshGenerator
+
+# Maya is only imported once a generator or the UI first calls into it
+cmds = LazyModule("maya.cmds")
+om = LazyModule("maya.api.OpenMaya")
+om1 = LazyModule("maya.OpenMaya")
+mayaUtils = LazyModule("maya.utils")
+
 
 # Class referenced & adapted from:
 # http://jonmacey.blogspot.com/2011/04/using-maya-mscriptutil-class-in-python.html 
@@ -27,6 +61,8 @@ class Imager():
     """ The wrapper class for the OpenMaya MImage class with a getPixel function. """
     def __init__(self, fileName):
         """ Initialises the Imager variables by opening file of input fileName. """
+        self.fileName = fileName
+
         # Create MImage and Load File
         self.image = om1.MImage()
         self.image.readFromFile(fileName)
@@ -94,13 +130,657 @@ class Imager():
         return self.height
 ## END REFERENCE
 
-class Generator():
+    def Pixels(self, Progress=None):
+        """ Return every pixel as one (width, height, 4) array of rgba values, indexed [x, y] like the landscape vertices. 
+            The whole MImage buffer is copied in one go, rather than a pixel at a time through MScriptUtil.
+            Progress is an optional function called as Progress(fraction, status) before the pixels are read.
+        """
+        if(Progress is not None):
+            Progress(0.0, "Reading height map")
+        # The api1 pointer converts to the address of the buffer, which holds height rows of width rgba pixels (as GetPixel indexes it)
+        address = int(self.image.pixels())
+        buffer = np.ctypeslib.as_array(ctypes.cast(address, ctypes.POINTER(ctypes.c_ubyte)), shape=(self.height, self.width, 4))
+        return buffer.transpose(1, 0, 2).copy()
+
+    def Digest(self):
+        """ Return a hash of the image file contents, so cached geometry is rebuilt when the file changes. """
+        fileHash = hashlib.sha1()
+        with open(self.fileName, "rb") as imageFile:
+            for chunk in iter(lambda: imageFile.read(1024 * 1024), b""):
+                fileHash.update(chunk)
+        return fileHash.hexdigest()
+
+class HeightField():
+    """ A queryable heightfield of a generated landscape, holding the height grid and its mapping into maya units. 
+        All queries take arrays of world X Z points and are evaluated together with bilinear interpolation.
+    """
+    def __init__(self, Heights, XStep, YStep, XHalf, YHalf):
+        """ Initialises the heightfield.
+
+            Heights     :   2D array of vertex heights, indexed [x, y] in the same order as the landscape vertices.
+            XStep       :   The distance between vertices along the X-Axis.
+            YStep       :   The distance between vertices along the Y-Axis (maya Z).
+            XHalf       :   The offset of the landscape along the X-Axis, vertex x is placed at (x * XStep) - XHalf.
+            YHalf       :   The offset of the landscape along the Y-Axis (maya Z).
+        """
+        self.Heights = np.asarray(Heights, dtype=np.float64)
+        self.XStep = XStep
+        self.YStep = YStep
+        self.XHalf = XHalf
+        self.YHalf = YHalf
+
+    def Width(self):
+        """ Return the number of vertices along the X-Axis. """
+        return self.Heights.shape[0]
+
+    def Depth(self):
+        """ Return the number of vertices along the Y-Axis (maya Z). """
+        return self.Heights.shape[1]
+
+    def GridCoordinates(self, X, Z):
+        """ Convert world X Z points to cell indices and the fractional position within each cell. 
+            Points outside the landscape are clamped to its edge.
+
+            - Returns the x index, y index, x fraction and y fraction arrays.
+        """
+        fx = np.clip((np.asarray(X, dtype=np.float64) + self.XHalf) / self.XStep, 0, self.Width() - 1)
+        fy = np.clip((np.asarray(Z, dtype=np.float64) + self.YHalf) / self.YStep, 0, self.Depth() - 1)
+        ix = np.minimum(fx.astype(np.int64), self.Width() - 2)
+        iy = np.minimum(fy.astype(np.int64), self.Depth() - 2)
+        return ix, iy, fx - ix, fy - iy
+
+    def Contains(self, X, Z):
+        """ Return a boolean array of whether each world X Z point lies over the landscape. """
+        fx = (np.asarray(X, dtype=np.float64) + self.XHalf) / self.XStep
+        fy = (np.asarray(Z, dtype=np.float64) + self.YHalf) / self.YStep
+        return (fx >= 0) & (fx <= self.Width() - 1) & (fy >= 0) & (fy <= self.Depth() - 1)
+
+    def CellCorners(self, ix, iy):
+        """ Return the four corner heights of the cells at ix, iy. """
+        return (self.Heights[ix, iy], self.Heights[ix + 1, iy], self.Heights[ix, iy + 1], self.Heights[ix + 1, iy + 1])
+
+    def GetHeight(self, X, Z):
+        """ Return the bilinear landscape height at each world X Z point. """
+        ix, iy, tx, ty = self.GridCoordinates(X, Z)
+        h00, h10, h01, h11 = self.CellCorners(ix, iy)
+        return (h00 * (1 - tx) + h10 * tx) * (1 - ty) + (h01 * (1 - tx) + h11 * tx) * ty
+
+    def GetGradient(self, X, Z):
+        """ Return the height gradient (dh/dx, dh/dz) of the bilinear surface at each world X Z point. 
+            Points outside the landscape see the flat continuation of its edge.
+        """
+        ix, iy, tx, ty = self.GridCoordinates(X, Z)
+        h00, h10, h01, h11 = self.CellCorners(ix, iy)
+        inside = self.Contains(X, Z)
+        dx = np.where(inside, ((h10 - h00) * (1 - ty) + (h11 - h01) * ty) / self.XStep, 0.0)
+        dz = np.where(inside, ((h01 - h00) * (1 - tx) + (h11 - h10) * tx) / self.YStep, 0.0)
+        return dx, dz
+
+    def GetNormal(self, X, Z):
+        """ Return the unit surface normal at each world X Z point, as an array of shape (..., 3). """
+        dx, dz = self.GetGradient(X, Z)
+        normals = np.stack((-dx, np.ones_like(dx), -dz), axis=-1)
+        return normals / np.linalg.norm(normals, axis=-1)[..., np.newaxis]
+
+    def GetSlope(self, X, Z):
+        """ Return the slope, in degrees from horizontal, at each world X Z point. """
+        dx, dz = self.GetGradient(X, Z)
+        return np.degrees(np.arctan(np.hypot(dx, dz)))
+
+class HeightFilter():
+    """ Filters a grid of heights before it is meshed, to smooth out the steps of 8 bit height maps, remove noise or cut terraces.
+        Every filter works on whole arrays, and the neighbourhood filters run over tiles of TileSize cells so their window arrays stay small on large images.
+    """
+    # Filter names, as used in the filter tuples, and the methods that apply them
+    Kinds = {"gaussian" : "Gaussian", "median" : "Median", "bilateral" : "Bilateral", "terrace" : "Terrace"}
+    TileSize = 256
+
+    def __init__(self, Filters, Progress=None):
+        """ Initialises the filter chain.
+
+            Filters     :   A list of filters, applied in order, each a tuple of the filter name and its parameters, one of
+                                ("gaussian", sigma)                         blur with a gaussian of sigma cells
+                                ("median", radius)                          replace each height with the median of the square of cells radius around it
+                                ("bilateral", sigma, rangeSigma)            blur with a gaussian of sigma cells, ignoring neighbours more than about rangeSigma higher or lower
+                                ("terrace", steps, smoothness)              flatten the heights into steps levels, ramping up over the last smoothness fraction of each step
+            Progress    :   Optional function called as Progress(fraction, status) after each tile.
+        """
+        self.Filters = [tuple(Filter) for Filter in Filters]
+        self.Progress = Progress
+        self.Index = 0
+
+    def Recognised(self):
+        """ Return whether every filter in the chain has a known name, printing the first that does not. """
+        for Filter in self.Filters:
+            if(Filter[0] not in self.Kinds):
+                print("ABORT: Height filter %s not recognised." % (Filter,))
+                return False
+        return True
+
+    def Apply(self, Heights):
+        """ Run the filter chain over a 2D array of heights.
+
+            - Returns the filtered heights, as a new array.
+        """
+        Heights = np.asarray(Heights, dtype=np.float64)
+        for Index, Filter in enumerate(self.Filters):
+            # Tiled reports progress within the current filter
+            self.Index = Index
+            Heights = getattr(self, self.Kinds[Filter[0]])(Heights, *Filter[1:])
+        return Heights
+
+    def Reach(self):
+        """ Return how many cells away a changed height can move a filtered one, over the whole chain (the sum of the radii the filters read). """
+        radii = {"gaussian" : lambda Sigma: max(int(np.ceil(3 * Sigma)), 1), "median" : lambda Radius: max(int(Radius), 1), 
+                 "bilateral" : lambda Sigma, RangeSigma: max(int(np.ceil(2 * Sigma)), 1), "terrace" : lambda *_: 0}
+        return sum(radii[Filter[0]](*Filter[1:]) for Filter in self.Filters)
+
+    def Tiled(self, Heights, Radius, Function):
+        """ Run a neighbourhood filter tile by tile, each tile padded with Radius cells of its neighbours (the edge cells repeat past the border).
+
+            Heights     :   2D array of heights.
+            Radius      :   The number of neighbouring cells the filter reads on each side.
+            Function    :   Function taking a padded tile and returning the filtered tile without its padding.
+
+            - Returns the filtered heights.
+        """
+        padded = np.pad(Heights, Radius, mode="edge")
+        filtered = np.empty_like(Heights)
+        width, depth = Heights.shape
+        tiles = [(x, y) for x in range(0, width, self.TileSize) for y in range(0, depth, self.TileSize)]
+        for i, (x, y) in enumerate(tiles):
+            if(self.Progress is not None):
+                self.Progress((self.Index + i / len(tiles)) / len(self.Filters), "Filtering heights")
+            filtered[x : x + self.TileSize, y : y + self.TileSize] = Function(padded[x : x + self.TileSize + 2 * Radius, y : y + self.TileSize + 2 * Radius])
+        return filtered
+
+    def Gaussian(self, Heights, Sigma):
+        """ Blur the heights with a separable gaussian of Sigma cells, one pass along each axis. """
+        Radius = max(int(np.ceil(3 * Sigma)), 1)
+        weights = np.exp(-0.5 * (np.arange(-Radius, Radius + 1) / Sigma) ** 2)
+        weights /= weights.sum()
+        def Blur(Tile):
+            width, depth = Tile.shape[0] - 2 * Radius, Tile.shape[1] - 2 * Radius
+            rows = sum(weight * Tile[k : k + width, :] for k, weight in enumerate(weights))
+            return sum(weight * rows[:, k : k + depth] for k, weight in enumerate(weights))
+        return self.Tiled(Heights, Radius, Blur)
+
+    def Median(self, Heights, Radius):
+        """ Replace each height with the median of the square of cells Radius around it, removing speckle noise while keeping edges. """
+        Radius = max(int(Radius), 1)
+        return self.Tiled(Heights, Radius, lambda Tile: np.median(np.lib.stride_tricks.sliding_window_view(Tile, (2 * Radius + 1, 2 * Radius + 1)), axis=(-2, -1)))
+
+    def Bilateral(self, Heights, Sigma, RangeSigma):
+        """ Blur the heights with a gaussian of Sigma cells, weighting each neighbour down by how far its height is from the centre, so cliffs and ridges stay sharp. """
+        Radius = max(int(np.ceil(2 * Sigma)), 1)
+        def Smooth(Tile):
+            width, depth = Tile.shape[0] - 2 * Radius, Tile.shape[1] - 2 * Radius
+            centre = Tile[Radius : Radius + width, Radius : Radius + depth]
+            total = np.zeros_like(centre)
+            weights = np.zeros_like(centre)
+            for dx in range(-Radius, Radius + 1):
+                for dy in range(-Radius, Radius + 1):
+                    neighbour = Tile[Radius + dx : Radius + dx + width, Radius + dy : Radius + dy + depth]
+                    weight = np.exp(-0.5 * ((dx * dx + dy * dy) / (Sigma * Sigma) + ((neighbour - centre) / RangeSigma) ** 2))
+                    total += weight * neighbour
+                    weights += weight
+            return total / weights
+        return self.Tiled(Heights, Radius, Smooth)
+
+    def Terrace(self, Heights, Steps, Smoothness=0.0):
+        """ Flatten the heights (from 0 to 1) into Steps levels, each ramping up to the next over the last Smoothness fraction of the step, 0 for sharp cliffs. """
+        scaled = np.clip(Heights, 0, 1) * Steps
+        level = np.minimum(np.floor(scaled), Steps - 1)
+        fraction = scaled - level
+        if(Smoothness > 0):
+            ramp = np.clip((fraction - (1 - Smoothness)) / Smoothness, 0, 1)
+            ramp = ramp * ramp * (3 - 2 * ramp)
+        else:
+            ramp = (fraction >= 1).astype(np.float64)
+        return (level + ramp) / Steps
+
+class TerrainBaker():
+    """ Bakes a tangent space normal map and a horizon based ambient occlusion map from a full resolution height grid, 
+        so a coarse landscape mesh can still show the detail of the full grid.
+        Both maps are worked out as whole arrays over tiles, with the tiles shared between a pool of worker threads (numpy releases the GIL for the array work).
+    """
+    TileSize = 256
+
+    def __init__(self, Heights, XStep, YStep, Workers=None, Progress=None):
+        """ Initialises the baker.
+
+            Heights     :   2D array of heights, indexed [x, y] like the landscape vertices.
+            XStep       :   The distance between heights along the X-Axis.
+            YStep       :   The distance between heights along the Y-Axis (maya Z).
+            Workers     :   The number of worker threads, defaults to one per core.
+            Progress    :   Optional function called as Progress(fraction, status) after each tile, on the calling thread.
+        """
+        self.Heights = np.asarray(Heights, dtype=np.float64)
+        self.XStep = XStep
+        self.YStep = YStep
+        self.Workers = Workers if Workers is not None else (os.cpu_count() or 1)
+        self.Progress = Progress
+
+    def Tiled(self, Radius, Function, Status):
+        """ Run a function over the height grid tile by tile on the worker threads, each tile padded with Radius cells of its neighbours (the edge cells repeat past the border).
+
+            Radius      :   The number of neighbouring cells the function reads on each side.
+            Function    :   Function taking a padded tile of heights and returning the result for the tile without its padding.
+            Status      :   The status reported with the progress.
+
+            - Returns the results of the tiles, joined back into one array.
+        """
+        padded = np.pad(self.Heights, Radius, mode="edge")
+        width, depth = self.Heights.shape
+        tiles = [(x, y) for x in range(0, width, self.TileSize) for y in range(0, depth, self.TileSize)]
+        def RunTile(Tile):
+            x, y = Tile
+            return x, y, Function(padded[x : x + self.TileSize + 2 * Radius, y : y + self.TileSize + 2 * Radius])
+
+        result = None
+        with ThreadPoolExecutor(max_workers=self.Workers) as pool:
+            futures = [pool.submit(RunTile, Tile) for Tile in tiles]
+            try:
+                for i, future in enumerate(as_completed(futures)):
+                    x, y, tile = future.result()
+                    if(result is None):
+                        result = np.empty(self.Heights.shape + tile.shape[2:], dtype=tile.dtype)
+                    result[x : x + tile.shape[0], y : y + tile.shape[1]] = tile
+                    if(self.Progress is not None):
+                        self.Progress((i + 1) / len(tiles), Status)
+            except BaseException:
+                # Drop the tiles not started yet, so a cancelled bake stops quickly
+                for future in futures:
+                    future.cancel()
+                raise
+        return result
+
+    def NormalMap(self):
+        """ Work out the tangent space normal of every height, with U along the X-Axis and V along the Y-Axis (maya Z), from central differences.
+
+            - Returns the (width, depth, 3) uint8 array of normals, packed from -1..1 into 0..255.
+        """
+        def Normals(Tile):
+            gradientX = (Tile[2:, 1:-1] - Tile[:-2, 1:-1]) / (2 * self.XStep)
+            gradientY = (Tile[1:-1, 2:] - Tile[1:-1, :-2]) / (2 * self.YStep)
+            normals = np.stack((-gradientX, -gradientY, np.ones_like(gradientX)), axis=-1)
+            normals /= np.linalg.norm(normals, axis=-1)[..., np.newaxis]
+            return ((normals * 0.5 + 0.5) * 255 + 0.5).astype(np.uint8)
+        return self.Tiled(1, Normals, "Baking normal map")
+
+    def AmbientOcclusion(self, Directions=8, Radius=32, Strength=1.0):
+        """ Work out horizon based ambient occlusion: how high the horizon rises around each height, marched out along a number of directions.
+
+            Directions  :   The number of directions to march in, evenly spread around the circle.
+            Radius      :   How far to march, in cells, with the steps spaced further apart the further out they are.
+            Strength    :   How dark fully occluded heights are, from 0 to 1.
+
+            - Returns the (width, depth) uint8 array of how open each height is, 255 for fully open.
+        """
+        steps = np.unique(np.round(np.geomspace(1, max(Radius, 1), 8)).astype(int))
+        angles = np.arange(Directions) * (2 * np.pi / Directions)
+        Radius = int(steps[-1])
+        def Occlusion(Tile):
+            width, depth = Tile.shape[0] - 2 * Radius, Tile.shape[1] - 2 * Radius
+            centre = Tile[Radius : Radius + width, Radius : Radius + depth]
+            occlusion = np.zeros_like(centre)
+            for angle in angles:
+                # Steepest rise towards the horizon in this direction, as a tangent
+                horizon = np.zeros_like(centre)
+                for step in steps:
+                    dx, dy = int(round(step * np.cos(angle))), int(round(step * np.sin(angle)))
+                    distance = np.hypot(dx * self.XStep, dy * self.YStep)
+                    if(distance > 0):
+                        horizon = np.maximum(horizon, (Tile[Radius + dx : Radius + dx + width, Radius + dy : Radius + dy + depth] - centre) / distance)
+                # sin of the horizon angle
+                occlusion += horizon / np.sqrt(1 + horizon * horizon)
+            return ((1 - Strength * occlusion / len(angles)) * 255 + 0.5).astype(np.uint8)
+        return self.Tiled(Radius, Occlusion, "Baking ambient occlusion")
+
+class CameraView():
+    """ What a fixed render camera sees, as its world to clip space matrix and the image resolution, 
+        so a landscape can be cut down to the geometry that lands on screen without asking maya on the worker thread.
+    """
+
+    def __init__(self, Matrix, Width, Height, Margin=0.1, PixelsPerCell=4.0):
+        """ Initialises the view.
+
+            Matrix      :   The 4x4 world to clip space matrix, for row vectors (the world inverse matrix of the camera times its projection matrix).
+            Width       :   The width of the rendered image in pixels.
+            Height      :   The height of the rendered image in pixels.
+            Margin      :   How far past the edges of the view geometry is still kept, as a fraction of the view's half width and height.
+            PixelsPerCell : How many pixels across a grid cell may cover on screen before a finer grid is used.
+        """
+        self.Matrix = np.asarray(Matrix, dtype=np.float64).reshape(4, 4)
+        self.Width = Width
+        self.Height = Height
+        self.Margin = Margin
+        self.PixelsPerCell = PixelsPerCell
+
+    def Description(self):
+        """ Return the view as plain values, for the geometry cache key. """
+        return {"Matrix" : np.round(self.Matrix, 6).ravel().tolist(), "Width" : self.Width, "Height" : self.Height, "Margin" : self.Margin, "PixelsPerCell" : self.PixelsPerCell}
+
+    def Clip(self, Points):
+        """ Return the clip space coordinates (x, y, z, w) of an array of points with shape (..., 3). """
+        Points = np.asarray(Points, dtype=np.float64)
+        return np.concatenate((Points, np.ones(Points.shape[:-1] + (1,))), axis=-1) @ self.Matrix
+
+    def Visible(self, Corners):
+        """ Test boxes against the view frustum, widened by Margin, a box being hidden when all its corners lie outside the same plane.
+
+            Corners     :   Array of shape (..., 8, 3) of the corners of each box.
+
+            - Returns the boolean array of whether each box may be seen.
+        """
+        x, y, z, w = np.moveaxis(self.Clip(Corners), -1, 0)
+        limit = w * (1 + self.Margin)
+        outside = [x > limit, x < -limit, y > limit, y < -limit, z < -w, z > w]
+        return ~np.any([side.all(axis=-1) for side in outside], axis=0)
+
+    def PixelSize(self, Corners):
+        """ Work out how many pixels across boxes cover on screen, from the projected extent of their corners.
+
+            Corners     :   Array of shape (..., 8, 3) of the corners of each box.
+
+            - Returns the array of the larger of each box's width and height on screen in pixels, infinite for a box reaching behind the camera.
+        """
+        clip = self.Clip(Corners)
+        w = clip[..., 3]
+        inFront = (w > 1e-9).all(axis=-1)
+        screen = clip[..., :2] / np.where(w > 1e-9, w, 1.0)[..., np.newaxis] * (0.5 * self.Width, 0.5 * self.Height)
+        extent = (screen.max(axis=-2) - screen.min(axis=-2)).max(axis=-1)
+        return np.where(inFront, extent, np.inf)
+
+class TerrainSimulator():
+    """ Fixed-step simulation of balls bouncing and rolling over a landscape heightfield.
+        Collisions are tested directly against the height grid, with all balls stepped together as arrays.
+    """
+    def __init__(self, Field, BallRadius=0.1, Gravity=9.8, Restitution=0.6, Friction=0.3, RollingFriction=0.02, StepsPerFrame=8):
+        """ Initialises the simulator.
+
+            Field           :   The HeightField the balls collide with.
+            BallRadius      :   The radius of the balls.
+            Gravity         :   The acceleration due to gravity, in maya units per second squared.
+            Restitution     :   The fraction of the impact speed kept when a ball bounces.
+            Friction        :   The sliding friction coefficient applied to the tangential speed on impact.
+            RollingFriction :   The rolling resistance coefficient while a ball is in contact.
+            StepsPerFrame   :   The number of fixed integration steps taken each frame.
+        """
+        self.Field = Field
+        self.BallRadius = BallRadius
+        self.Gravity = Gravity
+        self.Restitution = Restitution
+        self.Friction = Friction
+        self.RollingFriction = RollingFriction
+        self.StepsPerFrame = max(int(StepsPerFrame), 1)
+        # Impacts slower than this settle into rolling rather than bouncing forever
+        self.RestSpeed = 0.5
+
+    def Simulate(self, StartPositions, StartVelocities, FrameCount, FPS=24.0):
+        """ Integrate every ball from its start position and velocity.
+
+            StartPositions  :   Array of (x, y, z) start positions, one per ball.
+            StartVelocities :   Array of (x, y, z) start velocities, one per ball.
+            FrameCount      :   The number of frames to record.
+            FPS             :   The frames per second of the scene.
+
+            - Returns the positions (frames, balls, 3) and XYZ euler rotations in radians (frames, balls, 3).
+        """
+        position = np.array(StartPositions, dtype=np.float64).reshape(-1, 3)
+        velocity = np.broadcast_to(np.asarray(StartVelocities, dtype=np.float64), position.shape).copy()
+        ballCount = len(position)
+
+        orientation = np.tile(np.eye(3), (ballCount, 1, 1))
+        spin = np.zeros((ballCount, 3))
+        gravity = np.array((0.0, -self.Gravity, 0.0))
+
+        positions = np.zeros((FrameCount, ballCount, 3))
+        rotations = np.zeros((FrameCount, ballCount, 3))
+        dt = 1.0 / (FPS * self.StepsPerFrame)
+
+        for frame in range(FrameCount):
+            positions[frame] = position
+            rotations[frame] = self.EulerXYZ(orientation)
+
+            for step in range(self.StepsPerFrame):
+                velocity += gravity * dt
+                position += velocity * dt
+
+                # Grid lookup of the ground under every ball
+                normal = self.Field.GetNormal(position[:, 0], position[:, 2])
+                restHeight = self.Field.GetHeight(position[:, 0], position[:, 2]) + self.BallRadius / normal[:, 1]
+                contact = position[:, 1] <= restHeight
+
+                if(np.any(contact)):
+                    n = normal[contact]
+                    v = velocity[contact]
+                    position[contact, 1] = restHeight[contact]
+
+                    normalSpeed = np.einsum("ij,ij->i", v, n)
+                    tangential = v - normalSpeed[:, np.newaxis] * n
+                    approaching = normalSpeed < 0
+                    bouncing = approaching & (-normalSpeed > self.RestSpeed)
+
+                    # Bounce fast impacts, cancel the approach of slow ones so they roll
+                    newNormalSpeed = np.where(bouncing, -self.Restitution * normalSpeed, np.where(approaching, 0.0, normalSpeed))
+
+                    # Impact friction, then rolling: a rolling solid sphere only takes 5/7 of the downhill pull, and rolling resistance
+                    tangentialSpeed = np.linalg.norm(tangential, axis=1)
+                    slowdown = self.Friction * (1 + self.Restitution) * np.where(bouncing, -normalSpeed, 0.0)
+                    downhill = gravity - np.outer(n @ gravity, np.ones(3)) * n
+                    tangential -= (2.0 / 7.0) * downhill * dt
+                    slowdown += self.RollingFriction * self.Gravity * n[:, 1] * dt
+                    tangentialSpeed = np.linalg.norm(tangential, axis=1)
+                    scale = np.maximum(tangentialSpeed - slowdown, 0.0) / np.maximum(tangentialSpeed, 1e-12)
+                    tangential *= scale[:, np.newaxis]
+
+                    velocity[contact] = tangential + newNormalSpeed[:, np.newaxis] * n
+                    # Rolling without slipping sets the spin from the ground speed
+                    spin[contact] = np.cross(n, tangential) / self.BallRadius
+
+                orientation = np.matmul(self.AxisAngleMatrices(spin * dt), orientation)
+
+        rotations = np.unwrap(rotations, axis=0)
+        return positions, rotations
+
+    def AxisAngleMatrices(self, rotationVectors):
+        """ Convert an array of rotation vectors (axis * angle) to rotation matrices. """
+        angles = np.linalg.norm(rotationVectors, axis=1)
+        axes = rotationVectors / np.maximum(angles, 1e-12)[:, np.newaxis]
+        x, y, z = axes[:, 0], axes[:, 1], axes[:, 2]
+        zero = np.zeros_like(x)
+        cross = np.stack((zero, -z, y, z, zero, -x, -y, x, zero), axis=1).reshape(-1, 3, 3)
+        sin = np.sin(angles)[:, np.newaxis, np.newaxis]
+        cos = np.cos(angles)[:, np.newaxis, np.newaxis]
+        return np.eye(3) + sin * cross + (1 - cos) * np.matmul(cross, cross)
+
+    def EulerXYZ(self, matrices):
+        """ Convert an array of rotation matrices to maya XYZ rotate order euler angles, in radians. """
+        rx = np.arctan2(matrices[:, 2, 1], matrices[:, 2, 2])
+        ry = np.arcsin(np.clip(-matrices[:, 2, 0], -1.0, 1.0))
+        rz = np.arctan2(matrices[:, 1, 0], matrices[:, 0, 0])
+        return np.stack((rx, ry, rz), axis=1)
+
+class LandscapeWatcher():
+    """ Keeps a landscape mesh in step with its height map file while it is being painted, moving only the vertices under the changed pixels.
+        The file is polled and its new pixels read and diffed against the last ones on a worker thread, 
+        then the mesh is updated on the main thread through maya.utils.executeDeferred, its points in one setPoints call.
+    """
+    def __init__(self, Generator, FileName, MeshName, Heights, XStep, YStep, Height, Filters=None, VertexColours=None, Pixels=None, Interval=1.0):
+        """ Initialises the watcher.
+
+            Generator   :   The Generator that built the landscape, whose height, normal and colour functions are reused.
+            FileName    :   The height map file to watch.
+            MeshName    :   The landscape mesh to update, a single full resolution grid.
+            Heights     :   The 2D array of the landscape's heights, indexed [x, y] like the vertices.
+            XStep       :   The distance between vertices along the X-Axis.
+            YStep       :   The distance between vertices along the Y-Axis (maya Z).
+            Height      :   The height scalar the landscape was built with.
+            Filters     :   The HeightFilter tuples the landscape was built with.
+            VertexColours : The vertex colouring mode the landscape was built with, see GenerateLandscapeFromImage.
+            Pixels      :   The pixels the landscape was built from, read from the file when the watcher starts if not given.
+            Interval    :   The seconds between checks of the file.
+        """
+        self.Generator = Generator
+        self.FileName = FileName
+        self.MeshName = MeshName
+        self.Heights = np.array(Heights, dtype=np.float64)
+        self.XStep = XStep
+        self.YStep = YStep
+        self.Height = Height
+        self.Filters = Filters
+        self.VertexColours = VertexColours
+        self.Pixels = Pixels
+        self.Interval = Interval
+        self.Reach = HeightFilter(Filters).Reach() if Filters else 0
+        self.Normals = Generator.GridNormals(self.Heights, XStep, YStep)
+        self.Bounds = (self.Heights.min(), self.Heights.max())
+        self.Modified = os.path.getmtime(FileName)
+        self.Stopped = threading.Event()
+        self.Points = None
+
+    def Start(self):
+        """ Start polling the file on a worker thread, returning straight away. """
+        threading.Thread(target=self.Poll, name="Watching " + self.FileName, daemon=True).start()
+
+    def Stop(self):
+        """ Stop polling the file. """
+        self.Stopped.set()
+
+    def Poll(self):
+        """ Check the file every Interval seconds until stopped, queuing an update of the mesh whenever its pixels change (worker thread). """
+        if(self.Pixels is None):
+            self.Pixels = Imager(self.FileName).Pixels()
+        while(not self.Stopped.wait(self.Interval)):
+            try:
+                modified = os.path.getmtime(self.FileName)
+            except OSError:
+                # The file is being replaced, look again next time
+                continue
+            if(modified == self.Modified):
+                continue
+            self.Modified = modified
+            try:
+                update = self.Diff(Imager(self.FileName).Pixels())
+            except Exception as exception:
+                print("Could not update the landscape from %s: %s" % (self.FileName, exception))
+                continue
+            if(update is not None):
+                mayaUtils.executeDeferred(self.Apply, update)
+
+    def Diff(self, Pixels):
+        """ Work out the landscape under the pixels that differ from the last ones, padded by how far the filters spread a change, and keep the new pixels.
+
+            Pixels      :   The new (width, height, 4) array of pixels, indexed [x, y] like the vertices.
+
+            - Returns the update for Apply, as the ids of the moved vertices and their heights, then the ids of the reshaded vertices with their normals and colours (None without vertex colours), 
+              or None if no pixel changed or the image changed size.
+        """
+        if(Pixels.shape != self.Pixels.shape):
+            print("The height map %s changed size, rebuild the landscape to pick it up." % self.FileName)
+            self.Pixels = Pixels
+            return None
+        changed = np.any(Pixels != self.Pixels, axis=-1)
+        if(not changed.any()):
+            return None
+        width, depth = changed.shape
+        xs = np.flatnonzero(changed.any(axis=1))
+        ys = np.flatnonzero(changed.any(axis=0))
+        def Window(First, Last, Margin, Size):
+            return max(First - Margin, 0), min(Last + 1 + Margin, Size)
+
+        # Heights within reach of a changed pixel, filtered from the pixels within reach of those
+        hx0, hx1 = Window(xs[0], xs[-1], self.Reach, width)
+        hy0, hy1 = Window(ys[0], ys[-1], self.Reach, depth)
+        fx0, fx1 = Window(xs[0], xs[-1], 2 * self.Reach, width)
+        fy0, fy1 = Window(ys[0], ys[-1], 2 * self.Reach, depth)
+        self.Heights[hx0:hx1, hy0:hy1] = self.Generator.ImageHeights(Pixels[fx0:fx1, fy0:fy1], self.Height, self.Filters)[hx0 - fx0 : hx1 - fx0, hy0 - fy0 : hy1 - fy0]
+
+        # Normals (and colours) one vertex further out, from the central differences of the heights around them
+        nx0, nx1 = Window(hx0, hx1 - 1, 1, width)
+        ny0, ny1 = Window(hy0, hy1 - 1, 1, depth)
+        gx0, gx1 = Window(nx0, nx1 - 1, 1, width)
+        gy0, gy1 = Window(ny0, ny1 - 1, 1, depth)
+        self.Normals[nx0:nx1, ny0:ny1] = self.Generator.GridNormals(self.Heights[gx0:gx1, gy0:gy1], self.XStep, self.YStep)[nx0 - gx0 : nx1 - gx0, ny0 - gy0 : ny1 - gy0]
+
+        colours = None
+        if(self.VertexColours is not None):
+            # The height ramp spans the lowest to highest height, so moving either end recolours everything
+            bounds = (self.Heights.min(), self.Heights.max())
+            if(self.VertexColours == "HeightRamp" and bounds != self.Bounds):
+                nx0, nx1, ny0, ny1 = 0, width, 0, depth
+            self.Bounds = bounds
+            if(self.VertexColours == "HeightRamp"):
+                colours = self.Generator.HeightRampColours(self.Heights[nx0:nx1, ny0:ny1].ravel(), self.Normals[nx0:nx1, ny0:ny1].reshape(-1, 3), bounds)
+            else:
+                colours = (Pixels[nx0:nx1, ny0:ny1, :3] / 255).reshape(-1, 3)
+        self.Pixels = Pixels
+
+        heightIds = (np.arange(hx0, hx1)[:, np.newaxis] * depth + np.arange(hy0, hy1)).ravel()
+        shadeIds = (np.arange(nx0, nx1)[:, np.newaxis] * depth + np.arange(ny0, ny1)).ravel()
+        return heightIds, self.Heights[hx0:hx1, hy0:hy1].ravel(), shadeIds, self.Normals[nx0:nx1, ny0:ny1].reshape(-1, 3), colours
+
+    def Apply(self, Update):
+        """ Move the changed vertices of the mesh, and reshade them, from an update worked out by Diff (main thread). """
+        if(not cmds.objExists(self.MeshName)):
+            print("The watched landscape %s is gone, no longer watching %s." % (self.MeshName, self.FileName))
+            self.Stop()
+            return
+        heightIds, heights, shadeIds, normals, colours = Update
+        selection = om.MSelectionList()
+        selection.add(self.MeshName)
+        mesh = om.MFnMesh(selection.getDagPath(0))
+
+        # The points are fetched once and kept as an (n, 4) array, so each update writes the moved heights in one assignment before setting them all back in one call
+        if(self.Points is None):
+            self.Points = np.array(mesh.getPoints(), dtype=np.float64).reshape(-1, 4)
+        self.Points[heightIds, 1] = heights
+        mesh.setPoints(om.MPointArray(self.Points.tolist()))
+        # Unlocked once set, so later edits to the mesh still reshade it
+        mesh.setVertexNormals(om.MVectorArray(normals.tolist()), shadeIds.tolist())
+        mesh.unlockVertexNormals(shadeIds.tolist())
+        if(colours is not None):
+            mesh.setVertexColors(om.MColorArray(colours.tolist()), shadeIds.tolist())
+
+        # Keep the heightfield the balls are dropped onto in step
+        field = getattr(self.Generator, "LandscapeHeightField", None)
+        if(field is not None and field.Heights.shape == self.Heights.shape):
+            field.Heights.flat[heightIds] = heights
+
+class Generator(MeshGenerator):
     """ Controls the generation of landscapes. """
-    def __init__(self):
-        """ Initialise the generator (blank). """
-        pass
+    # Names and colours of the shared landscape materials
+    GroundMaterial = ("LandscapeGroundBlinn", (1, 1, 0.5))
+    WaterMaterial = ("LandscapeWaterBlinn", (0.3, 0.5, 1))
+
+    # Vertex colour ramp over the normalised landscape height, as (height, (r, g, b)) stops
+    HeightRamp = [(0.0, (0.76, 0.7, 0.5)), (0.15, (0.3, 0.55, 0.2)), (0.6, (0.2, 0.4, 0.15)), (0.85, (0.5, 0.45, 0.4)), (1.0, (0.95, 0.95, 0.95))]
+    # Colour of steep ground, blended in between the two slopes (in degrees)
+    RockColour = (0.45, 0.42, 0.4)
+    RockSlopes = (30.0, 50.0)
+
+    # Colours of the two alternating wall decor squares, and of the grout between them
+    WallColours = ((0.85, 0.5, 0.15), (0.5, 0.25, 0.08))
+    GroutColour = (0.3, 0.15, 0.05)
+
+    # Seconds per height map pixel read and per vertex of the later stages, measured on the builders and re-measured by CalibrateCostModel
+    ReadSecondsPerPixel = 0.01e-6
+    BuildSecondsPerVertex = 0.2e-6
+    ColourSecondsPerVertex = {"HeightRamp" : 0.13e-6, "Image" : 0.05e-6}
+    CommitSecondsPerVertex = 3e-6
+    DecimateSecondsPerTriangle = 160e-6
+    # Whether CalibrateCostModel has measured the timings this session, it runs on the first build
+    Calibrated = False
+
+    # Builds estimated over either budget are refused, or if BudgetAction is "Downscale", built from the first coarser level of detail that fits
+    VertexBudget = 4000000
+    MemoryBudget = 1024 * 1024 * 1024
+    BudgetAction = "Refuse"
+
+    # Grid cells along each side of the tiles a camera view is culled and sized over
+    CameraTileSize = 32
 
-        
     def GenerateEnvironment(self):
         """ Generate scattered environment, using premade meshes? or also generated basic meshes?"""
         # User selects meshes to scatter on landscape
@@ -108,9 +788,171 @@ class Generator():
         # Would need a scattering algorithm...
         pass
 
-    def GenerateSquareWallDecor(self):
-        """ Generate the Sonic Emerald Hill Zone style square wall paterns.  """
-        pass
+    def GenerateSquareWallDecor(self, Columns=16, Rows=8, SquareSize=1.0, Depth=0.2, Gap=0.08, Mode="LOD", SwitchDistance=None, Camera="persp", Position=(0, 0, 0), RotateY=0, Resolution=32, Bevel=0.12):
+        """ Generate the Sonic Emerald Hill Zone style square wall paterns, a wall of chequered squares, either as real blocks or baked into a texture.
+
+            Columns     :   The number of squares across the wall.
+            Rows        :   The number of squares up the wall.
+            SquareSize  :   The size of each square, in maya units.
+            Depth       :   How far the instanced blocks stand out from the wall.
+            Gap         :   The fraction of each square left as grout between the blocks.
+            Mode        :   "Instanced" for one block mesh instanced over the grid, "Baked" for a single quad with the pattern baked into a texture, 
+                            "Auto" to pick one from the current distance of Camera, or "LOD" for both under a LOD group switching at SwitchDistance.
+            SwitchDistance : The camera distance beyond which the baked wall is used, defaults to 4 times the width of the wall.
+            Camera      :   The camera "Auto" measures its distance from.
+            Position    :   The (x, y, z) point at the bottom centre of the wall, which faces +Z before it is rotated.
+            RotateY     :   The rotation of the wall around the Y-Axis, in degrees.
+            Resolution  :   The number of texture pixels along each square of the baked texture.
+            Bevel       :   The fraction of each block face shaded as a bevel in the baked texture.
+
+            - Returns the name of the wall's top node, or -1 if the parameters are not valid.
+        """
+        if((Columns < 1) or (Rows < 1) or (SquareSize <= 0) or (Gap < 0) or (Gap >= 1) or (Resolution < 2)):
+            print("ABORT: Wall decor size, gap or resolution not valid.")
+            return -1
+        if(Mode not in ("Instanced", "Baked", "Auto", "LOD")):
+            print("ABORT: Wall decor mode %s not recognised." % Mode)
+            return -1
+        if(SwitchDistance is None):
+            SwitchDistance = 4 * Columns * SquareSize
+
+        # Auto picks once from where the camera is now, LOD keeps both and lets maya switch as the camera moves
+        if(Mode == "Auto"):
+            distance = 0.0
+            if(cmds.objExists(Camera)):
+                centre = np.array(Position, dtype=np.float64) + (0, Rows * SquareSize / 2, 0)
+                distance = np.linalg.norm(np.array(cmds.xform(Camera, q=True, ws=True, t=True)) - centre)
+            Mode = "Baked" if distance > SwitchDistance else "Instanced"
+
+        walls = []
+        if(Mode in ("Instanced", "LOD")):
+            walls.append(self.InstancedWall(Columns, Rows, SquareSize, Depth, Gap))
+        if(Mode in ("Baked", "LOD")):
+            walls.append(self.BakedWall(Columns, Rows, SquareSize, Gap, Resolution, Bevel))
+        wall = self.CreateLODGroup(walls, [SwitchDistance], "SquareWallDecor_LOD") if len(walls) > 1 else walls[0]
+
+        cmds.xform(wall, ws=True, t=Position, ro=(0, RotateY, 0))
+        return wall
+
+    def InstancedWall(self, Columns, Rows, SquareSize, Depth, Gap):
+        """ Build the wall decor as a grout backing quad and two block meshes (one per colour) instanced over the grid by a single instancer node, 
+            see GenerateSquareWallDecor for the parameters.
+
+            - Returns the name of the group holding the wall.
+        """
+        width, height = Columns * SquareSize, Rows * SquareSize
+        backing = cmds.polyPlane(name="WallDecorBacking", w=width, h=height, sx=1, sy=1, axis=(0, 0, 1))[0]
+        cmds.move(0, height / 2, 0, backing)
+        self.Materials.Assign([backing], "WallDecorGroutBlinn", self.GroutColour)
+
+        # One prototype block per colour, hidden, as only its instances are drawn
+        blockSize = SquareSize * (1 - Gap)
+        prototypes = []
+        for i, Colour in enumerate(self.WallColours):
+            block = cmds.polyCube(name="WallDecorBlock%d" % i, w=blockSize, h=blockSize, d=Depth)[0]
+            self.Materials.Assign([block], "WallDecorBlock%dBlinn" % i, Colour)
+            cmds.setAttr(block + ".visibility", 0)
+            prototypes.append(block)
+
+        # Block centres, standing out from the wall, chequered between the two prototypes
+        column, row = np.meshgrid(np.arange(Columns), np.arange(Rows), indexing="ij")
+        positions = np.stack(((column.ravel() + 0.5) * SquareSize - width / 2, (row.ravel() + 0.5) * SquareSize, np.full(column.size, Depth / 2)), axis=-1)
+        instancer = self.InstanceMeshes(prototypes, positions, ((column + row) % 2).ravel(), "WallDecorInstancer")
+
+        return cmds.group([backing, instancer] + prototypes, name="SquareWallDecor_Instanced")
+
+    def InstanceMeshes(self, Prototypes, Positions, ObjectIndices, Name):
+        """ Instance prototype meshes at many positions with one maya instancer node, rather than a transform node per copy.
+
+            Prototypes  :   The transforms of the meshes to instance.
+            Positions   :   Array of the (x, y, z) position of each instance.
+            ObjectIndices : The index into Prototypes of each instance.
+            Name        :   The name of the instancer node.
+
+            - Returns the name of the instancer.
+        """
+        instancer = cmds.createNode("instancer", name=Name)
+        for i, Prototype in enumerate(Prototypes):
+            cmds.connectAttr(Prototype + ".matrix", "%s.inputHierarchy[%d]" % (instancer, i), force=True)
+
+        # Per instance transforms are handed over in one array attribute, as the particle instancer takes them
+        arrayData = om.MFnArrayAttrsData()
+        arrayObject = arrayData.create()
+        positions = arrayData.vectorArray("position")
+        for Point in np.asarray(Positions, dtype=np.float64).tolist():
+            positions.append(om.MVector(Point))
+        indices = arrayData.doubleArray("objectIndex")
+        for Index in np.asarray(ObjectIndices, dtype=np.float64).tolist():
+            indices.append(Index)
+        selection = om.MSelectionList()
+        selection.add(instancer + ".inputPoints")
+        selection.getPlug(0).setMObject(arrayObject)
+        return instancer
+
+    def BakedWall(self, Columns, Rows, SquareSize, Gap, Resolution, Bevel):
+        """ Build the wall decor as a single quad with the chequer pattern baked into a texture file, see GenerateSquareWallDecor for the parameters.
+
+            - Returns the name of the wall transform.
+        """
+        arguments = {"Columns" : Columns, "Rows" : Rows, "Gap" : Gap, "Resolution" : Resolution, "Bevel" : Bevel, "WallColours" : self.WallColours, "GroutColour" : self.GroutColour}
+        key = self.Cache.Key("SquareWallDecorTexture", arguments)
+        texture = os.path.join(self.TextureDirectory(), "SquareWallDecor_%s.tga" % key[:12])
+        # The same pattern is only baked once
+        if(not os.path.isfile(texture)):
+            self.WriteTGA(texture, self.BakeWallTexture(Columns, Rows, Gap, Resolution, Bevel))
+
+        width, height = Columns * SquareSize, Rows * SquareSize
+        wall = cmds.polyPlane(name="SquareWallDecor_Baked", w=width, h=height, sx=1, sy=1, axis=(0, 0, 1))[0]
+        cmds.move(0, height / 2, 0, wall)
+        self.Materials.Assign([wall], "WallDecorBaked%sBlinn" % key[:12], (1, 1, 1), texture)
+        return wall
+
+    def BakeWallTexture(self, Columns, Rows, Gap, Resolution, Bevel):
+        """ Paint the chequered wall pattern, with the grout and a bevel lit from the top left, as whole arrays.
+
+            - Returns the (width, height, 3) uint8 array of pixels, indexed [x, y] from the top left.
+        """
+        x, y = np.meshgrid(np.arange(Columns * Resolution), np.arange(Rows * Resolution), indexing="ij")
+        # Rows count up the wall, as the instanced blocks do, while pixel rows count down the image
+        column, row = x // Resolution, (Rows - 1) - (y // Resolution)
+        colours = np.array(self.WallColours)[(column + row) % 2]
+
+        # Position within the block face, from 0 to 1 across and down, outside it is grout
+        across = ((x % Resolution + 0.5) / Resolution - Gap / 2) / (1 - Gap)
+        down = ((y % Resolution + 0.5) / Resolution - Gap / 2) / (1 - Gap)
+        inBlock = (across > 0) & (across < 1) & (down > 0) & (down < 1)
+
+        # The bevel is lightened on the top and left edges, and darkened on the bottom and right
+        edges = np.stack((across, down, 1 - across, 1 - down))
+        nearest = np.argmin(edges, axis=0)
+        onBevel = edges.min(axis=0) < Bevel
+        shade = np.where(onBevel, np.where(nearest < 2, 1.3, 0.65), 1.0)
+
+        pixels = np.where(inBlock[..., np.newaxis], colours * shade[..., np.newaxis], np.array(self.GroutColour))
+        return (np.clip(pixels, 0, 1) * 255).astype(np.uint8)
+
+    def TextureDirectory(self):
+        """ Return the directory baked textures are written to, the sourceimages folder of the maya project, or the geometry cache directory without one. """
+        directory = os.path.join(cmds.workspace(q=True, rootDirectory=True), cmds.workspace(fileRuleEntry="sourceImages") or "sourceimages")
+        if(not os.path.isdir(directory)):
+            directory = self.Cache.Directory
+            os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def WriteTGA(self, FileName, Pixels):
+        """ Write an uncompressed TGA image, which maya reads without any extra libraries.
+
+            FileName    :   The path of the image file.
+            Pixels      :   The (width, height, 3 or 4) uint8 array of RGB or RGBA pixels, indexed [x, y] from the top left.
+        """
+        width, height, channels = Pixels.shape
+        # Image type 2 is uncompressed true colour, descriptor bit 5 puts the first row at the top, the low bits count the alpha bits
+        header = struct.pack("<BBBHHBHHHHBB", 0, 0, 2, 0, 0, 0, 0, 0, width, height, channels * 8, 0x20 | (8 if channels == 4 else 0))
+        # TGA stores each row in turn, as BGR(A)
+        rows = np.ascontiguousarray(Pixels.transpose(1, 0, 2)[:, :, [2, 1, 0, 3][:channels]])
+        with open(FileName, "wb") as imageFile:
+            imageFile.write(header)
+            imageFile.write(rows.tobytes())
 
         
     def GenerateLandscapeFromScratch(self, XScale=1, YScale=1, XSubdiv=100, YSubdiv=100, Height=5, WaterPlane=True):
@@ -128,7 +970,7 @@ class Generator():
 
         pass
 
-    def GenerateLandscapeFromImage(self, SourceImage,  XScale=1, YScale=1, XSubdiv=100, YSubdiv=100, Height=5, WaterPlane=True) :
+    def GenerateLandscapeFromImage(self, SourceImage,  XScale=1, YScale=1, XSubdiv=100, YSubdiv=100, Height=5, WaterPlane=True, UseCache=True, VertexColours=None, TargetFaces=None, MaxError=None, LODLevels=1, LODDistances=None, Filters=None, WaterCulling=None, WaterMargin=0.0, BakeMaps=False, Camera=None, CameraMargin=0.1, PixelsPerCell=4.0, Watch=False, Background=False) :
         """ Generates a background landscape from an input SourceImage.
 
             SourceImage :   The source image to generate the landscape from. Generates height using the Red channel value. 
@@ -138,68 +980,584 @@ class Generator():
             YSubdiv     :   The subdivisions of the landscape to generate along the Y-Axis.
             Height      :   The height scalar of the landscape, landscape generates from y=0 to y=height. 
             WaterPlane  :   A boolean for whether or not to add a waterplane at half height. 
+            UseCache    :   A boolean for whether or not to reuse buffers built before from the same image file and parameters.
+            VertexColours : How to colour the vertices, None for no colours, "HeightRamp" for the height and slope ramp, or "Image" for the image RGB.
+            TargetFaces :   If given, decimate the landscape down to this many triangles (each coarser level of detail to a quarter of the one before).
+            MaxError    :   If given, decimate the landscape until the next collapse would add more quadric error than this.
+            LODLevels   :   The number of levels of detail to build under a LOD group, each on a grid with half the cells of the one before, 1 for a single mesh.
+            LODDistances :  The camera distances at which each coarser level takes over, defaults to multiples of the landscape size.
+            Filters     :   A list of HeightFilter tuples to run over the image heights before meshing, such as [("median", 1), ("gaussian", 1.5)].
+            WaterCulling :  What to do with the faces hidden under the water plane, None to keep them, "Drop" to remove them, or "Coarse" to also cover large hidden areas with a few coarse quads.
+            WaterMargin :   How far below the water plane a face must lie to be culled.
+            BakeMaps    :   A boolean for whether to bake normal and ambient occlusion maps from the full resolution heights into the landscape material, 
+                            so coarse (decimated or LOD) meshes keep the detail of the full grid.
+            Camera      :   The name of a fixed render camera to build the landscape for, None to build all of it. Only the terrain in its view is built, 
+                            each region with a grid just fine enough for its size on screen, as a single mesh (LODLevels is ignored).
+            CameraMargin :  How far past the edges of the camera view terrain is still built, as a fraction of the view's half width and height.
+            PixelsPerCell : How many pixels across a grid cell may cover in the camera view before a finer grid is used.
+            Watch       :   A boolean for whether to keep watching the image file once built, moving the vertices under any pixels that change when it is saved again 
+                            (see LandscapeWatcher). Only a single full resolution mesh can be watched, so not with LOD levels, decimation, water culling or a camera.
+            Background  :   A boolean for whether to build on a worker thread with a progress window, creating the meshes once it is done.
+
+            - Returns the HeightField of the generated landscape (also kept as self.LandscapeHeightField), None when building in the background, 
+              or -1 if a filter is not recognised, the camera does not exist, the build is over budget or cannot be watched.
+        """
+        if(Filters and not HeightFilter(Filters).Recognised()):
+            return -1
+        if(Watch and (LODLevels > 1 or TargetFaces is not None or MaxError is not None or (WaterPlane and WaterCulling) or Camera is not None)):
+            print("ABORT: Only a single full resolution landscape mesh can be watched.")
+            return -1
+
+        # The camera is read here on the main thread, the build only needs its matrices
+        View = None
+        if(Camera is not None):
+            View = self.QueryCameraView(Camera, CameraMargin, PixelsPerCell)
+            if(View is None):
+                return -1
+            LODLevels = 1
+
+        # Refuse (or downscale) a build that would not fit the budgets, before the image is read
+        BaseLevel = self.BudgetLevel(SourceImage.width, SourceImage.height, VertexColours, TargetFaces, LODLevels)
+        if(BaseLevel == -1 or (Watch and BaseLevel > 0)):
+            if(BaseLevel > 0):
+                print("ABORT: A landscape downscaled to fit the budget cannot be watched.")
+            return -1
+
+        # Maya is only asked where to write the maps here on the main thread
+        MapDirectory = self.TextureDirectory() if BakeMaps else None
+
+        def Work():
+            levels, heights = self.BuildLandscapeLevels(SourceImage, XScale, YScale, XSubdiv, YSubdiv, Height, UseCache, VertexColours, TargetFaces, MaxError, LODLevels, BaseLevel, Filters, WaterCulling if WaterPlane else None, (Height / 2) - WaterMargin, View)
+            maps = self.BakeLandscapeMaps(heights, XScale/XSubdiv, YScale/YSubdiv, Directory=MapDirectory) if BakeMaps else None
+            return levels, heights, maps
+
+        def Commit(Result):
+            levels, heights, maps = Result
+
+            # Create Mesh, or one mesh per level of detail under a LOD group
+            landNames = [self.CreateMesh(buffers) for buffers in levels]
+            if(len(levels) > 1):
+                Distances = LODDistances if LODDistances is not None else [float(max(XScale, YScale) * (2 ** Level)) for Level in range(len(levels) - 1)]
+                self.LandscapeLOD = self.CreateLODGroup(landNames, Distances, "Landscape_LOD")
+
+            # Keep the height grid and its mapping so the landscape can be queried without ray casts
+            self.LandscapeHeightField = HeightField(heights, XScale/XSubdiv, YScale/YSubdiv, XScale / 2, YScale / 2)
+
+            # Follow later saves of the image, replacing any landscape watched before
+            if(getattr(self, "LandscapeWatcher", None) is not None):
+                self.LandscapeWatcher.Stop()
+                self.LandscapeWatcher = None
+            if(Watch):
+                self.LandscapeWatcher = LandscapeWatcher(self, SourceImage.fileName, landNames[0], heights, XScale/XSubdiv, YScale/YSubdiv, Height, Filters, VertexColours)
+                self.LandscapeWatcher.Start()
+
+            # Create Water Plane
+            if(WaterPlane):
+                self.WaterPlane = cmds.polyPlane(n="Water Plane", w=XScale, h=YScale)
+                cmds.move(self.WaterPlane, y=(Height/2))
+
+            # Colour
+            # assign the land and water materials, which are created once and shared by every landscape in the scene
+            self.GroundBlinn = self.GroundMaterial[0]
+            self.WaterBlinn = self.WaterMaterial[0]
+            if(maps is not None):
+                # A material of its own, the ground colour shaded by the baked occlusion and normals
+                self.Materials.Assign(landNames, "LandscapeBaked%sBlinn" % self.Cache.Key("LandscapeMaps", maps)[:12], self.GroundMaterial[1], maps[1], maps[0])
+            else:
+                self.Materials.Assign(landNames, *self.GroundMaterial)
+            if(WaterPlane):
+                self.Materials.Assign([self.WaterPlane[0]], *self.WaterMaterial)
+
+            return self.LandscapeHeightField
+
+        # Build the buffers (on a worker thread in the background), then create the meshes
+        return self.Run("Building Landscape", Work, Commit, Background)
+
+    def EstimateCost(self, Width, Depth, VertexColours=None, TargetFaces=None, LODLevels=1, BaseLevel=0):
+        """ Predicts the size and build time of every level of detail of a landscape, without reading the image.
+
+            Width       :   The width of the height map in pixels.
+            Depth       :   The height of the height map in pixels.
+            VertexColours : The vertex colouring mode, see GenerateLandscapeFromImage.
+            TargetFaces :   If given, the triangles the most detailed level is decimated down to.
+            LODLevels   :   The number of levels of detail to build.
+            BaseLevel   :   The level of detail of the most detailed mesh, above 0 when the build is downscaled.
+
+            - Returns the CostEstimate summed over the levels.
+        """
+        estimate = CostEstimate(seconds=Width * Depth * self.ReadSecondsPerPixel)
+        for Level in range(LODLevels):
+            # Grid size after ResampleGrid
+            width = max((Width - 1) >> (BaseLevel + Level), 1) + 1 if BaseLevel + Level > 0 else Width
+            depth = max((Depth - 1) >> (BaseLevel + Level), 1) + 1 if BaseLevel + Level > 0 else Depth
+            vertices = width * depth
+            faces = (width - 1) * (depth - 1)
+            seconds = vertices * (self.BuildSecondsPerVertex + self.ColourSecondsPerVertex.get(VertexColours, 0) + self.CommitSecondsPerVertex)
+            if(TargetFaces is not None):
+                # Decimation splits each quad in two, then collapses down to the target
+                seconds += max(2 * faces - TargetFaces // (4 ** Level), 0) * self.DecimateSecondsPerTriangle
+            estimate += CostEstimate(vertices, faces, 4 * faces, vertices, vertices if VertexColours is not None else 0, seconds=seconds)
+        return estimate
+
+    def WithinBudget(self, Estimate):
+        """ Return whether an estimate fits both VertexBudget and MemoryBudget. """
+        return Estimate.Vertices <= self.VertexBudget and Estimate.Bytes() <= self.MemoryBudget
+
+    def BudgetLevel(self, Width, Depth, VertexColours=None, TargetFaces=None, LODLevels=1):
+        """ Checks a landscape build against the vertex and memory budgets before starting it, see EstimateCost for the parameters.
+
+            - Returns the level of detail to build the most detailed mesh at, above 0 if it is over budget and BudgetAction is "Downscale", or -1 if it is over budget and refused.
+        """
+        estimate = self.EstimateCost(Width, Depth, VertexColours, TargetFaces, LODLevels)
+        if(self.WithinBudget(estimate)):
+            return 0
+
+        if(self.BudgetAction == "Downscale"):
+            Level = 1
+            # Stop once the grid is down to a single cell
+            while(((Width - 1) >> (Level - 1)) > 1 or ((Depth - 1) >> (Level - 1)) > 1):
+                levelEstimate = self.EstimateCost(Width, Depth, VertexColours, TargetFaces, LODLevels, Level)
+                if(self.WithinBudget(levelEstimate)):
+                    print("Downscaled the landscape by %d levels of detail to fit the budget, %s." % (Level, levelEstimate.Summary()))
+                    return Level
+                Level += 1
+
+        print("ABORT: The landscape is over the budget of %d vertices and %.0f MB, %s." % (self.VertexBudget, self.MemoryBudget / (1024.0 * 1024.0), estimate.Summary()))
+        return -1
+
+    def CalibrateCostModel(self, SourceImage=None):
+        """ Times a small landscape build, and reading SourceImage's pixels if given, on this machine, replacing the measured timings of every generator in the session.
+
+            SourceImage :   The height map to time the pixel reads on, None to keep ReadSecondsPerPixel.
 
             - no return
         """
+        if(SourceImage is not None):
+            start = time.perf_counter()
+            SourceImage.Pixels()
+            type(self).ReadSecondsPerPixel = (time.perf_counter() - start) / (SourceImage.width * SourceImage.height)
 
-        # Information on how to create a mesh from user defined verts using openmaya MFnMesh ::
-        # https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371
-        
-        # Initialise the procedural mesh
-        landscapeMesh = om.MFnMesh()
+        # Build from made up pixels, so the timing does not depend on reading an image (only its size is used)
+        random = np.random.default_rng(0)
+        Pixels = random.integers(0, 256, (256, 256, 4)).astype(np.uint8)
+        start = time.perf_counter()
+        self.BuildLandscapeBuffers(types.SimpleNamespace(width=256, height=256), Pixels=Pixels)
+        type(self).BuildSecondsPerVertex = (time.perf_counter() - start) / Pixels[:, :, 0].size
+        type(self).Calibrated = True
+
+    def BakeLandscapeMaps(self, Heights, XStep, YStep, Name="Landscape", Directory=None, AODirections=8, AORadius=32, AOStrength=1.0, Workers=None):
+        """ Bakes the tangent space normal map and ambient occlusion map of a landscape's full resolution heights into TGA files, see TerrainBaker.
+
+            Heights     :   2D array of the full resolution heights, indexed [x, y] like the landscape vertices.
+            XStep       :   The distance between heights along the X-Axis.
+            YStep       :   The distance between heights along the Y-Axis (maya Z).
+            Name        :   The start of the map file names.
+            Directory   :   The directory to write the maps to, defaults to TextureDirectory (which has to ask maya, so pass it in from a worker thread).
+            AODirections :  The number of directions the ambient occlusion marches in.
+            AORadius    :   How far the ambient occlusion marches, in cells.
+            AOStrength  :   How dark fully occluded heights are, from 0 to 1.
+            Workers     :   The number of worker threads to bake the tiles on, defaults to one per core.
+
+            - Returns the paths of the normal map and the ambient occlusion map.
+        """
+        # Named by the heights and settings, so maps that have already been baked are reused
+        digest = hashlib.sha1(np.ascontiguousarray(Heights, dtype=np.float64).tobytes())
+        digest.update(json.dumps([XStep, YStep, AODirections, AORadius, AOStrength]).encode("utf-8"))
+        key = digest.hexdigest()[:12]
+        Directory = Directory if Directory is not None else self.TextureDirectory()
+        normalPath = os.path.join(Directory, "%s_Normal_%s.tga" % (Name, key))
+        occlusionPath = os.path.join(Directory, "%s_AO_%s.tga" % (Name, key))
+
+        baker = TerrainBaker(Heights, XStep, YStep, Workers, Progress=self.ReportProgress)
+        # V runs up the image while TGA rows are written from the top down, so the maps are flipped along y
+        if(not os.path.isfile(normalPath)):
+            self.WriteTGA(normalPath, baker.NormalMap()[:, ::-1])
+        if(not os.path.isfile(occlusionPath)):
+            self.WriteTGA(occlusionPath, np.repeat(baker.AmbientOcclusion(AODirections, AORadius, AOStrength)[:, ::-1, np.newaxis], 3, axis=-1))
+        return normalPath, occlusionPath
+
+    def BuildLandscapeLevels(self, SourceImage, XScale=1, YScale=1, XSubdiv=100, YSubdiv=100, Height=5, UseCache=True, VertexColours=None, TargetFaces=None, MaxError=None, LODLevels=1, BaseLevel=0, Filters=None, WaterCulling=None, WaterLevel=0.0, View=None):
+        """ Builds the buffers of every level of detail of a landscape without touching the maya scene, see GenerateLandscapeFromImage for the parameters.
+
+            BaseLevel   :   The level of detail of the most detailed mesh, above 0 when the build has been downscaled to fit the budget.
+            WaterLevel  :   The height below which faces are culled, if WaterCulling is set.
+            View        :   The CameraView to build the landscape for, None to build all of it.
+
+            - Returns the list of MeshBuffers from the most to the least detailed, and the full 2D array of pixel heights.
+        """
+        levels = []
+        heights = None
+        pixels = None
+        digest = SourceImage.Digest() if UseCache else None
+        for Level in range(LODLevels):
+            # Reuse the buffers of an identical earlier build, keyed on the image file contents as well as the parameters
+            arrays = None
+            if(UseCache):
+                key = self.Cache.Key("LandscapeFromImage", {"Image" : digest, "Width" : SourceImage.width, "Height" : SourceImage.height, 
+                                                            "XScale" : XScale, "YScale" : YScale, "XSubdiv" : XSubdiv, "YSubdiv" : YSubdiv, "HeightScale" : Height, 
+                                                            "VertexColours" : VertexColours, "TargetFaces" : TargetFaces, "MaxError" : MaxError, "LODLevel" : BaseLevel + Level, "Filters" : Filters, 
+                                                            "WaterCulling" : WaterCulling, "WaterLevel" : WaterLevel if WaterCulling else None, 
+                                                            "Camera" : View.Description() if View is not None else None})
+                arrays = self.Cache.Load(key)
+                # The most detailed mesh also needs the full height grid, which a coarser level cached by another build did not store
+                if(arrays is not None and Level == 0 and "heights" not in arrays):
+                    arrays = None
+            if(arrays is None):
+                # The image is only read and filtered once, however many levels have to be built from it
+                if(pixels is None):
+                    pixels = SourceImage.Pixels(Progress=self.ReportProgress)
+                    imageHeights = self.ImageHeights(pixels, Height, Filters)
+                self.ReportProgress(Level / LODLevels, "Building level %d of %d" % (Level + 1, LODLevels))
+                buffers, levelHeights = self.BuildLandscapeBuffers(SourceImage, XScale=XScale, YScale=YScale, XSubdiv=XSubdiv, YSubdiv=YSubdiv, Height=Height, VertexColours=VertexColours, LODLevel=BaseLevel + Level, Pixels=pixels, Heights=imageHeights, WaterCulling=WaterCulling, WaterLevel=WaterLevel, View=View)
+                if(TargetFaces is not None or MaxError is not None):
+                    buffers = MeshDecimator(TargetFaces // (4 ** Level) if TargetFaces is not None else 0, MaxError, progress=self.ReportProgress).Decimate(buffers)
+                if(UseCache):
+                    arrays = buffers.ToArrays()
+                    if(Level == 0):
+                        arrays["heights"] = levelHeights
+                    self.Cache.Store(key, arrays)
+            else:
+                levelHeights = arrays.pop("heights", None)
+                buffers = MeshBuffers(**arrays)
+            if(Level == 0):
+                heights = levelHeights
+            levels.append(buffers)
+
+        return levels, heights
+
+    def BuildLandscapeBuffers(self, SourceImage, XScale=1, YScale=1, XSubdiv=100, YSubdiv=100, Height=5, VertexColours=None, LODLevel=0, Pixels=None, Filters=None, Heights=None, WaterCulling=None, WaterLevel=0.0, View=None):
+        """ Builds the buffers of a landscape from an input SourceImage without touching the maya scene, see GenerateLandscapeFromImage for the parameters.
+
+            LODLevel    :   The level of detail to build, the pixel grid is resampled to half as many cells along each axis per level.
+            Pixels      :   The pixels of SourceImage if they have already been read, shared between the levels of detail.
+            Heights     :   The filtered pixel heights if they have already been worked out with ImageHeights, shared between the levels of detail.
+            WaterLevel  :   The height below which faces are culled, if WaterCulling is set.
+            View        :   The CameraView to build the landscape for, None to build all of it.
 
-        # Define Vertices
-        vertices = []
-                    
-        # Define Faces
-        polygonConnects = []
+            - Returns the MeshBuffers and the full 2D array of pixel heights.
+        """
+        # Heights read from the image, indexed [x, y] like the vertices
+        if(Pixels is None):
+            Pixels = SourceImage.Pixels()
+        heights = Heights if Heights is not None else self.ImageHeights(Pixels, Height, Filters)
+
+        # Coarser levels resample the grid, keeping its extent
+        gridHeights = self.ResampleGrid(heights, LODLevel)
+        width, depth = gridHeights.shape
 
         # Calculate X and Y scale 
-        XStep = XScale/XSubdiv
-        YStep = YScale/YSubdiv
+        XStep = (XScale/XSubdiv) * (SourceImage.width - 1) / max(width - 1, 1)
+        YStep = (YScale/YSubdiv) * (SourceImage.height - 1) / max(depth - 1, 1)
 
         XHalf = XScale / 2
         YHalf = YScale / 2
 
-        # Loop for each vertex in landscape, adding vertices & defining faces
-        for x in range(0, SourceImage.width):
-            for y in range(0, SourceImage.height):
-                # Generate point
-                VertHeight = (SourceImage.GetPixel(x, y)[2] / 255) * Height 
-                vertices.append(om.MPoint((x * XStep) - XHalf, VertHeight, (y * YStep) - YHalf))
-                if(x > 0 and y > 0):
-                    # Define a face if not on first edge
-                    polygonConnects.append((x-1) * SourceImage.height + (y-1))
-                    polygonConnects.append((x-1) * SourceImage.height + y)
-                    polygonConnects.append(x * SourceImage.height + y)
-                    polygonConnects.append(x * SourceImage.height + (y-1))
+        # One vertex per grid point, at index x * depth + y
+        gridX, gridY = np.meshgrid(np.arange(width), np.arange(depth), indexing="ij")
+        vertices = np.stack(((gridX * XStep) - XHalf, gridHeights, (gridY * YStep) - YHalf), axis=-1).reshape(-1, 3)
+
+        # One quad per grid point not on the first edge, joining it to the points before it
+        corner = (gridX[1:, 1:] - 1) * depth + (gridY[1:, 1:] - 1)
+        quads = np.stack((corner, corner + 1, corner + depth + 1, corner + depth), axis=-1)
+        polygonConnects = quads.ravel()
 
         # Number of vertices in object
-        polyFaces = [4] * ((SourceImage.width-1) * (SourceImage.height-1))
-
-        # Create Mesh
-        landscapeMesh.create(vertices, polyFaces, polygonConnects)
-
-        # Create Water Plane
-        if(WaterPlane):
-            self.WaterPlane = cmds.polyPlane(n="Water Plane", w=XScale, h=YScale)
-            cmds.move(self.WaterPlane, y=(Height/2))
-
-        # Colour
-        # create plane colour shaders
-        self.WaterBlinn = cmds.shadingNode('blinn', asShader=True)
-        cmds.setAttr(self.WaterBlinn + '.color', 0.3, 0.5, 1)   
-        self.GroundBlinn = cmds.shadingNode('blinn', asShader=True)
-        cmds.setAttr(self.GroundBlinn + '.color', 1, 1, 0.5)
-        
-        # assign plane colour shaders
-        cmds.select(self.WaterPlane)
-        #cmds.hyperShade(assign=self.WaterBlinn)
-        #cmds.select(landscapeMesh.name())
-        #landscapeMesh.setName("LandMesh")
-        #landscapeMesh.createColorSet("LandscapeColour")
-        #landscapeMesh.setColor(om.MColor(10,10,20), "LandscapeColour")
-        #cmds.hyperShade(assign=self.GroundBlinn)
+        polyFaces = np.full((width-1) * (depth-1), 4)
+
+        # One UV per vertex, spread over the unit square, so the UV ids are the vertex ids
+        uValues = (gridX / max(width - 1, 1)).ravel()
+        vValues = (gridY / max(depth - 1, 1)).ravel()
+
+        normals = self.GridNormals(gridHeights, XStep, YStep).reshape(-1, 3)
+
+        # Vertex colours, as one array for a single bulk set
+        colours = None
+        if(VertexColours == "HeightRamp"):
+            colours = self.HeightRampColours(gridHeights.ravel(), normals)
+        elif(VertexColours == "Image"):
+            colours = self.ResampleGrid(Pixels[:, :, :3] / 255, LODLevel).reshape(-1, 3)
+
+        # Keep only the tiles the camera sees, each on a grid just fine enough for its size on screen, 
+        # with skirts hanging from the edges between tiles of different grids to hide the cracks (a landscape wholly out of view is kept whole)
+        keptQuads = quads
+        if(View is not None):
+            viewQuads, skirtSources, skirtDrops = self.CameraQuads(vertices.reshape(width, depth, 3), View)
+            if(len(viewQuads) > 0):
+                keptQuads = viewQuads
+                vertices = np.concatenate((vertices, vertices[skirtSources] - np.outer(skirtDrops, (0, 1, 0))))
+                uValues, vValues, normals = [np.concatenate((Values, Values[skirtSources])) for Values in (uValues, vValues, normals)]
+                if(colours is not None):
+                    colours = np.concatenate((colours, colours[skirtSources]))
+
+        # Cull the faces hidden under the water plane (a landscape wholly under water is kept whole)
+        if(WaterCulling):
+            if(keptQuads is quads):
+                culledQuads = self.CullUnderwater(quads, gridHeights, WaterLevel, WaterCulling)
+            else:
+                # The camera tiles are no longer one grid, so each face is tested on its own
+                culledQuads = keptQuads[(vertices[keptQuads, 1] >= WaterLevel).any(axis=1)]
+            if(len(culledQuads) > 0):
+                keptQuads = culledQuads
+
+        # Drop the vertices only the removed faces used
+        if(keptQuads is not quads):
+            polygonConnects, vertices, uValues, vValues, normals, colours = self.CompactVertices(keptQuads.ravel(), vertices, uValues, vValues, normals, colours)
+            polyFaces = np.full(len(keptQuads), 4)
+
+        return MeshBuffers(vertices, polyFaces, polygonConnects, uValues=uValues, vValues=vValues, uvIds=polygonConnects, normals=normals, colours=colours), heights
+
+    def GridNormals(self, GridHeights, XStep, YStep):
+        """ Work out the vertex normals of a height grid from its gradient, (-dh/dx, 1, -dh/dz) normalised.
+
+            - Returns the (width, depth, 3) array of unit normals.
+        """
+        if(GridHeights.shape[0] > 1 and GridHeights.shape[1] > 1):
+            GradientX, GradientY = np.gradient(GridHeights, XStep, YStep)
+        else:
+            GradientX = GradientY = np.zeros_like(GridHeights)
+        normals = np.stack((-GradientX, np.ones_like(GridHeights), -GradientY), axis=-1)
+        return normals / np.linalg.norm(normals, axis=-1)[..., np.newaxis]
+
+    def CullUnderwater(self, Quads, GridHeights, WaterLevel, Mode="Drop", BlockSize=8):
+        """ Remove the grid cells that lie wholly below the water plane.
+
+            Quads       :   Array of shape (width - 1, depth - 1, 4) of the vertex ids of each grid cell.
+            GridHeights :   2D array of the grid vertex heights, indexed [x, y].
+            WaterLevel  :   The height below which a vertex is hidden.
+            Mode        :   "Drop" to remove the hidden cells, or "Coarse" to also cover each whole BlockSize square of hidden cells with a single quad, 
+                            so the bed of a large lake stays closed.
+            BlockSize   :   The number of cells along each side of a coarse quad.
+
+            - Returns the array of shape (n, 4) of the kept quads.
+        """
+        # A cell is hidden when all four of its corners are
+        below = GridHeights < WaterLevel
+        hidden = below[:-1, :-1] & below[1:, :-1] & below[:-1, 1:] & below[1:, 1:]
+        kept = Quads[~hidden]
+        if(Mode != "Coarse"):
+            return kept
+
+        # Blocks of cells that are hidden all the way through, from the whole blocks that fit in the grid
+        blocksX, blocksY = hidden.shape[0] // BlockSize, hidden.shape[1] // BlockSize
+        blocks = hidden[:blocksX * BlockSize, :blocksY * BlockSize].reshape(blocksX, BlockSize, blocksY, BlockSize).all(axis=(1, 3))
+        x0, y0 = [index * BlockSize for index in np.nonzero(blocks)]
+        x1, y1 = x0 + BlockSize, y0 + BlockSize
+        depth = GridHeights.shape[1]
+        coarse = np.stack((x0 * depth + y0, x0 * depth + y1, x1 * depth + y1, x1 * depth + y0), axis=-1)
+        return np.concatenate((kept, coarse))
+
+    def CameraQuads(self, GridVertices, View):
+        """ Choose the grid cells of a landscape to build for a camera view, over square tiles of CameraTileSize cells. 
+            Tiles outside the view are left out, and each tile left is built on every 1, 2, 4 ... grid point along each axis, 
+            the coarsest spacing at which its cells still cover no more than View.PixelsPerCell pixels on screen.
+
+            GridVertices :  Array of shape (width, depth, 3) of the landscape grid vertices, where vertex x * depth + y is GridVertices[x, y].
+            View        :   The CameraView to build for.
+
+            - Returns the array of shape (n, 4) of the quads to build, as vertex ids, 
+              then the ids of the vertices to copy for the skirts and how far below them each copy goes (the copies are numbered on from the last grid vertex).
+        """
+        width, depth = GridVertices.shape[:2]
+        tileSize = self.CameraTileSize
+        # Grid points at the tile corners, the last tile along each axis taking what is left
+        xEdges = np.append(np.arange(0, width - 1, tileSize), width - 1)
+        yEdges = np.append(np.arange(0, depth - 1, tileSize), depth - 1)
+        tilesX, tilesY = len(xEdges) - 1, len(yEdges) - 1
+
+        # Bounding box of each tile, over its own heights
+        corners = np.empty((tilesX, tilesY, 8, 3))
+        lows = np.empty((tilesX, tilesY))
+        highs = np.empty((tilesX, tilesY))
+        for tx in range(tilesX):
+            for ty in range(tilesY):
+                tileHeights = GridVertices[xEdges[tx] : xEdges[tx + 1] + 1, yEdges[ty] : yEdges[ty + 1] + 1, 1]
+                lows[tx, ty], highs[tx, ty] = tileHeights.min(), tileHeights.max()
+                x0, x1 = GridVertices[xEdges[tx], 0, 0], GridVertices[xEdges[tx + 1], 0, 0]
+                z0, z1 = GridVertices[0, yEdges[ty], 2], GridVertices[0, yEdges[ty + 1], 2]
+                corners[tx, ty] = [(x, y, z) for x in (x0, x1) for y in (lows[tx, ty], highs[tx, ty]) for z in (z0, z1)]
+        visible = View.Visible(corners)
+
+        # Coarsest power of two spacing that keeps the cells within PixelsPerCell, up to a single cell per tile
+        cells = np.maximum(np.diff(xEdges)[:, np.newaxis], np.diff(yEdges)[np.newaxis, :])
+        with np.errstate(divide="ignore"):
+            levels = np.floor(np.log2(View.PixelsPerCell * cells / View.PixelSize(corners)))
+        steps = 2 ** np.clip(levels, 0, int(np.log2(tileSize))).astype(int)
+        cellSize = min(abs(GridVertices[min(1, width - 1), 0, 0] - GridVertices[0, 0, 0]), abs(GridVertices[0, min(1, depth - 1), 2] - GridVertices[0, 0, 2]))
+
+        quads = []
+        skirtSources = []
+        skirtDrops = []
+        nextSkirt = width * depth
+        for tx, ty in zip(*np.nonzero(visible)):
+            step = steps[tx, ty]
+            xs = np.append(np.arange(xEdges[tx], xEdges[tx + 1], step), xEdges[tx + 1])
+            ys = np.append(np.arange(yEdges[ty], yEdges[ty + 1], step), yEdges[ty + 1])
+            ids = xs[:, np.newaxis] * depth + ys[np.newaxis, :]
+            quads.append(np.stack((ids[:-1, :-1], ids[:-1, 1:], ids[1:, 1:], ids[1:, :-1]), axis=-1).reshape(-1, 4))
+
+            # Skirts along the edges shared with a built tile on a different grid, facing out of the tile, as deep as the tile's heights vary
+            drop = highs[tx, ty] - lows[tx, ty] + step * cellSize
+            for nx, ny, edge, outward in ((tx - 1, ty, ids[0, :], False), (tx + 1, ty, ids[-1, :], True), (tx, ty - 1, ids[:, 0], True), (tx, ty + 1, ids[:, -1], False)):
+                if(not (0 <= nx < tilesX and 0 <= ny < tilesY) or not visible[nx, ny] or steps[nx, ny] == step):
+                    continue
+                lowered = np.arange(nextSkirt, nextSkirt + len(edge))
+                nextSkirt += len(edge)
+                skirtSources.append(edge)
+                skirtDrops.append(np.full(len(edge), drop))
+                if(outward):
+                    quads.append(np.stack((edge[:-1], edge[1:], lowered[1:], lowered[:-1]), axis=-1))
+                else:
+                    quads.append(np.stack((edge[:-1], lowered[:-1], lowered[1:], edge[1:]), axis=-1))
+
+        if(not quads):
+            return np.empty((0, 4), dtype=int), np.empty(0, dtype=int), np.empty(0)
+        return np.concatenate(quads), np.concatenate(skirtSources) if skirtSources else np.empty(0, dtype=int), np.concatenate(skirtDrops) if skirtDrops else np.empty(0)
+
+    def QueryCameraView(self, Camera, Margin=0.1, PixelsPerCell=4.0):
+        """ Read the view of a maya camera, for building a landscape to it, see CameraView for the parameters.
+
+            Camera      :   The name of the camera's transform or shape.
+
+            - Returns the CameraView, using the render resolution of the scene, or None if there is no such camera.
+        """
+        if(not cmds.objExists(Camera)):
+            print("ABORT: There is no camera called %s." % Camera)
+            return None
+        shapes = [Camera] if cmds.nodeType(Camera) == "camera" else (cmds.listRelatives(Camera, shapes=True, type="camera", fullPath=True) or [])
+        if(not shapes):
+            print("ABORT: %s is not a camera." % Camera)
+            return None
+
+        selection = om.MSelectionList()
+        selection.add(shapes[0])
+        dagPath = selection.getDagPath(0)
+        worldInverse = dagPath.inclusiveMatrixInverse()
+        projection = om.MFnCamera(dagPath).projectionMatrix()
+        # Maya matrices are for row vectors, so world to clip space is the world inverse followed by the projection
+        matrix = np.array([[worldInverse.getElement(row, column) for column in range(4)] for row in range(4)]) @ np.array([[projection.getElement(row, column) for column in range(4)] for row in range(4)])
+        return CameraView(matrix, cmds.getAttr("defaultResolution.width"), cmds.getAttr("defaultResolution.height"), Margin, PixelsPerCell)
+
+    def CompactVertices(self, PolygonConnects, *VertexArrays):
+        """ Drop the vertices no face uses, renumbering the faces to match.
+
+            PolygonConnects :   The vertex indices of each face.
+            VertexArrays    :   Arrays with one entry per vertex (None is passed through).
+
+            - Returns the renumbered polygonConnects, followed by each of the vertex arrays without the unused vertices.
+        """
+        used = np.zeros(len(VertexArrays[0]), dtype=bool)
+        used[PolygonConnects] = True
+        newIds = np.cumsum(used) - 1
+        return (newIds[PolygonConnects],) + tuple(None if Values is None else Values[used] for Values in VertexArrays)
+
+    def ImageHeights(self, Pixels, Height, Filters=None):
+        """ Work out the landscape heights from the pixels of a height map, filtered from 0 to 1 before they are scaled by Height.
+
+            - Returns the 2D array of heights, indexed [x, y] like the vertices.
+        """
+        heights = Pixels[:, :, 2] / 255
+        if(Filters):
+            heights = HeightFilter(Filters, Progress=self.ReportProgress).Apply(heights)
+        return heights * Height
+
+    def ResampleGrid(self, Values, Level):
+        """ Bilinearly resample a grid of per-vertex values (indexed [x, y], with any trailing channels) for a level of detail, 
+            halving the cells along each axis per level while keeping the corners in place.
+
+            - Returns the resampled grid, or Values itself at level 0.
+        """
+        if(Level == 0):
+            return Values
+        width, depth = Values.shape[:2]
+        gridX, gridY = np.meshgrid(np.linspace(0, width - 1, max((width - 1) >> Level, 1) + 1), np.linspace(0, depth - 1, max((depth - 1) >> Level, 1) + 1), indexing="ij")
+        channels = Values.reshape(width, depth, -1)
+        resampled = np.stack([HeightField(channels[:, :, channel], 1, 1, 0, 0).GetHeight(gridX, gridY) for channel in range(channels.shape[2])], axis=-1)
+        return resampled.reshape(gridX.shape + Values.shape[2:])
+
+    def HeightRampColours(self, Heights, Normals, Bounds=None):
+        """ Colour vertices from the HeightRamp over their normalised height, blended towards RockColour on steep slopes.
+
+            Heights     :   Array of vertex heights.
+            Normals     :   Array of (x, y, z) unit vertex normals.
+            Bounds      :   The (lowest, highest) heights the ramp spans, defaults to those of Heights (given when colouring part of a landscape).
+
+            - Returns an array of (r, g, b) colours, one per vertex.
+        """
+        Lowest, Highest = Bounds if Bounds is not None else (Heights.min(), Heights.max())
+        Range = Highest - Lowest
+        Levels = (Heights - Lowest) / Range if Range > 0 else np.zeros_like(Heights)
+        Stops = [Stop for Stop, Colour in self.HeightRamp]
+        Colours = np.stack([np.interp(Levels, Stops, [Colour[Channel] for Stop, Colour in self.HeightRamp]) for Channel in range(3)], axis=-1)
+
+        Slopes = np.degrees(np.arccos(np.clip(Normals[:, 1], -1, 1)))
+        Rock = np.clip((Slopes - self.RockSlopes[0]) / (self.RockSlopes[1] - self.RockSlopes[0]), 0, 1)[:, np.newaxis]
+        return Colours * (1 - Rock) + np.asarray(self.RockColour) * Rock
+
+    def CreateMesh(self, Buffers):
+        """ Commit generated MeshBuffers to a new maya mesh. 
+
+            - Returns the name of the new mesh transform.
+        """
+        # Information on how to create a mesh from user defined verts using openmaya MFnMesh ::
+        # https://forums.autodesk.com/t5/maya-programming/create-mesh-from-list/td-p/7575371
+        landscapeMesh = om.MFnMesh()
+        Points = om.MPointArray(Buffers.Vertices.tolist())
+        PolyFaces = Buffers.PolyFaces.tolist()
+        if(Buffers.UVIds is not None):
+            # UVs and normals come with the buffers, so maya does not need its own UV or normal passes
+            landscapeObject = landscapeMesh.create(Points, PolyFaces, Buffers.PolygonConnects.tolist(), Buffers.UValues.tolist(), Buffers.VValues.tolist())
+            landscapeMesh.assignUVs(PolyFaces, Buffers.UVIds.tolist())
+        else:
+            landscapeObject = landscapeMesh.create(Points, PolyFaces, Buffers.PolygonConnects.tolist())
+        if(Buffers.Normals is not None):
+            # Unlocked once set, so later edits to the mesh still reshade it
+            VertexIds = list(range(len(Buffers.Normals)))
+            landscapeMesh.setVertexNormals(om.MVectorArray(Buffers.Normals.tolist()), VertexIds)
+            landscapeMesh.unlockVertexNormals(VertexIds)
+        landName = om.MFnDagNode(landscapeObject).fullPathName()
+        if(Buffers.Colours is not None):
+            # Every vertex coloured in one call, and shown in the viewport
+            landscapeMesh.createColorSet("LandscapeColour", False)
+            landscapeMesh.setCurrentColorSetName("LandscapeColour")
+            landscapeMesh.setVertexColors(om.MColorArray(Buffers.Colours.tolist()), list(range(len(Buffers.Colours))))
+            cmds.setAttr(landName + ".displayColors", 1)
+        return landName
+
+    def SimulateBallsOnLandscape(self, StartPositions, StartVelocities=(0, 0, 0), Field=None, BallRadius=0.1, StartFrame=1, EndFrame=250, Gravity=9.8, Restitution=0.6, Friction=0.3, RollingFriction=0.02, StepsPerFrame=8):
+        """ Simulates balls bouncing and rolling over a generated landscape and bakes every ball's trajectory to keys.
+
+            StartPositions  :   Array of (x, y, z) start positions, one per ball.
+            StartVelocities :   Array of (x, y, z) start velocities, one per ball (a single velocity is shared by every ball).
+            Field           :   The HeightField to simulate over, defaults to the last generated landscape.
+            BallRadius      :   The radius of the balls.
+            StartFrame      :   The first frame to key.
+            EndFrame        :   The last frame to key.
+            Gravity         :   The acceleration due to gravity, in maya units per second squared.
+            Restitution     :   The fraction of the impact speed kept when a ball bounces.
+            Friction        :   The sliding friction coefficient on impact.
+            RollingFriction :   The rolling resistance coefficient.
+            StepsPerFrame   :   The number of fixed integration steps taken each frame.
+
+            - Returns a list of the animated ball names, or -1 if there is no landscape.
+        """
+        if(Field is None):
+            Field = getattr(self, "LandscapeHeightField", None)
+        if(Field is None):
+            print("ABORT: No landscape has been generated to simulate on.")
+            return -1
+
+        baker = AnimationBaker()
+        simulator = TerrainSimulator(Field, BallRadius=BallRadius, Gravity=Gravity, Restitution=Restitution, Friction=Friction, RollingFriction=RollingFriction, StepsPerFrame=StepsPerFrame)
+        frames = np.arange(StartFrame, EndFrame + 1, dtype=np.float64)
+        positions, rotations = simulator.Simulate(StartPositions, StartVelocities, len(frames), FPS=baker.FramesPerSecond())
+
+        ballNames = []
+        for ball in range(positions.shape[1]):
+            ballName = cmds.polySphere(n="Ball", r=BallRadius)[0]
+            baker.BakeAttributes(ballName, frames, {"translateX" : positions[:, ball, 0], "translateY" : positions[:, ball, 1], "translateZ" : positions[:, ball, 2], 
+                                                    "rotateX" : rotations[:, ball, 0], "rotateY" : rotations[:, ball, 1], "rotateZ" : rotations[:, ball, 2]})
+            ballNames.append(ballName)
+        return ballNames
 
 class MainWindow():
     """ Creates and handles the UI elements of the landscape generator program and their associated functions. """
@@ -239,6 +1597,19 @@ class MainWindow():
         self.L_XScale_Val = 10.0
         self.L_YScale_Val = 10.0
         self.L_HeightMultiplier_Val = 0.15
+        self.L_BallNumber_Val = 10
+        self.L_BallRadius_Val = 0.1
+        self.L_DropHeight_Val = 2.0
+        self.L_StartFrame_Val = 1
+        self.L_EndFrame_Val = 250
+        self.L_VertexColours_Val = None
+        self.L_LODLevels_Val = 1
+        self.L_Smoothing_Val = 0.0
+        self.L_Terraces_Val = 0
+        self.L_WaterCulling_Val = None
+        self.W_Columns_Val = 16
+        self.W_Rows_Val = 8
+        self.L_VertexBudget_Val = Generator.VertexBudget
 
         shelf4 = cmds.rowColumnLayout()#"Landscape Generator")
         self.L_TerrainType = cmds.radioButtonGrp(label='Type', labelArray2=['Heightmap','Generated'], numberOfRadioButtons=2, sl=1, cc=self.RadioButtonUpdate_L_TerrainType)
@@ -250,7 +1621,29 @@ class MainWindow():
         self.L_YSubdivisions = cmds.intSliderGrp(label='Y Axis Subdivisions', field=True, min=10, max = 1000, value=self.L_YSubdivisions_Val, step=10, dc=self.SliderUpdate_L_YSubdivisions)
         cmds.separator(style='shelf')
         self.L_HeightMultiplier = cmds.floatSliderGrp(label='Height Multiplier', field=True, min=0.01, max = 1, value=self.L_HeightMultiplier_Val, step=0.01, dc=self.SliderUpdate_L_HeightMultiplier)
+        self.L_Smoothing = cmds.floatSliderGrp(label='Smoothing', field=True, min=0.0, max = 5.0, value=self.L_Smoothing_Val, step=0.1, dc=self.SliderUpdate_L_Smoothing)
+        self.L_Terraces = cmds.intSliderGrp(label='Terraces', field=True, min=0, max = 32, value=self.L_Terraces_Val, step=1, dc=self.SliderUpdate_L_Terraces)
+        self.L_VertexColours = cmds.radioButtonGrp(label='Vertex Colours', labelArray3=['None','Height Ramp','Image'], numberOfRadioButtons=3, sl=1, cc=self.RadioButtonUpdate_L_VertexColours)
+        self.L_WaterCulling = cmds.radioButtonGrp(label='Underwater Faces', labelArray3=['Keep','Drop','Coarse'], numberOfRadioButtons=3, sl=1, cc=self.RadioButtonUpdate_L_WaterCulling)
+        self.L_BakeMaps = cmds.checkBoxGrp(label='Baked Detail', label1='Normal & AO Maps', numberOfCheckBoxes=1, value1=False)
+        self.L_Watch = cmds.checkBoxGrp(label='Watch File', label1='Update On Save', numberOfCheckBoxes=1, value1=False)
+        self.L_Camera = cmds.textFieldGrp(label='Render Camera', text='', annotation='The camera to build only the visible terrain for, empty to build all of it')
+        self.L_LODLevels = cmds.intSliderGrp(label='LOD Levels', field=True, min=1, max = 4, value=self.L_LODLevels_Val, step=1, cc=self.SliderUpdate_L_LODLevels)
+        self.L_VertexBudget = cmds.intFieldGrp(label='Vertex Budget', numberOfFields=1, value1=self.L_VertexBudget_Val, cc=self.FieldUpdate_L_VertexBudget)
+        self.L_OverBudget = cmds.radioButtonGrp(label='Over Budget', labelArray2=['Refuse','Downscale'], numberOfRadioButtons=2, sl=1, cc=self.RadioButtonUpdate_L_OverBudget)
+        self.L_Estimate = cmds.text(label='Estimate: No height map', align='left')
         cmds.button(label='Build Landscape', c=self.BuildLandscape, width=200)
+        cmds.separator(style='shelf')
+        self.L_BallNumber = cmds.intSliderGrp(label='No of Balls', field=True, min=1, max = 500, value=self.L_BallNumber_Val, step=1, dc=self.SliderUpdate_L_BallNumber)
+        self.L_BallRadius = cmds.floatSliderGrp(label='Ball Radius', field=True, min=0.01, max = 5.0, value=self.L_BallRadius_Val, step=0.01, dc=self.SliderUpdate_L_BallRadius)
+        self.L_DropHeight = cmds.floatSliderGrp(label='Drop Height', field=True, min=0.0, max = 50.0, value=self.L_DropHeight_Val, step=0.1, dc=self.SliderUpdate_L_DropHeight)
+        self.L_FrameRange = cmds.intFieldGrp(label='Frame Range', numberOfFields=2, value1=self.L_StartFrame_Val, value2=self.L_EndFrame_Val, cc=self.FieldUpdate_L_FrameRange)
+        cmds.button(label='Drop Balls On Landscape', c=self.DropBalls, width=200)
+        cmds.separator(style='shelf')
+        self.W_Columns = cmds.intSliderGrp(label='Wall Columns', field=True, min=1, max = 128, value=self.W_Columns_Val, step=1, dc=self.SliderUpdate_W_Columns)
+        self.W_Rows = cmds.intSliderGrp(label='Wall Rows', field=True, min=1, max = 128, value=self.W_Rows_Val, step=1, dc=self.SliderUpdate_W_Rows)
+        self.W_Mode = cmds.radioButtonGrp(label='Wall Mode', labelArray3=['Instanced','Baked','By Distance'], numberOfRadioButtons=3, sl=3)
+        cmds.button(label='Build Wall Decor', c=self.BuildWallDecor, width=200)
         # Cancel Button
         cmds.button(label='cancel', command="cmds.deleteUI('%s')" % self.Window, width=200)
  
@@ -284,7 +1677,7 @@ class MainWindow():
         # File dialogue return is different on each system...
         # https://stackoverflow.com/questions/8220108/how-do-i-check-the-operating-system-in-python
         ## START REFERENCED CODE
-        from sys import platform
+        platform = sys.platform
         if platform == "linux" or platform == "linux2":
             # linux
             print("Linux")
@@ -301,7 +1694,6 @@ class MainWindow():
 
         print(self.L_fileLocal)
 
-        import os.path
         if(os.path.isfile(self.L_fileLocal)):
             self.L_SourceImage = Imager(self.L_fileLocal)
             print("Imported Image")
@@ -309,6 +1701,7 @@ class MainWindow():
             self.SliderUpdate_L_XSubdivisions()
             cmds.intSliderGrp(self.L_YSubdivisions, e=True, v=self.L_SourceImage.height)
             self.SliderUpdate_L_XSubdivisions()
+            self.UpdateEstimate()
 
         cmds.textFieldButtonGrp(self.L_PicFileLoadButton, tx=str(self.L_fileLocal), e=True)
 
@@ -332,6 +1725,103 @@ class MainWindow():
         """ Updates the landscape Height Multiplier variable with the value from the associated slider. """
         self.L_HeightMultiplier_Val = cmds.floatSliderGrp(self.L_HeightMultiplier, q=True, v=True)
 
+    def SliderUpdate_L_Smoothing(self, *_):
+        """ Updates the landscape Smoothing variable, the gaussian blur of the heights in pixels, with the value from the associated slider. """
+        self.L_Smoothing_Val = cmds.floatSliderGrp(self.L_Smoothing, q=True, v=True)
+
+    def SliderUpdate_L_Terraces(self, *_):
+        """ Updates the landscape Terraces variable, the number of height steps (0 for none), with the value from the associated slider. """
+        self.L_Terraces_Val = cmds.intSliderGrp(self.L_Terraces, q=True, v=True)
+
+    def RadioButtonUpdate_L_VertexColours(self, *_):
+        """ Updates the L_VertexColours_Val variable with the selected colouring mode. """
+        self.L_VertexColours_Val = [None, "HeightRamp", "Image"][cmds.radioButtonGrp(self.L_VertexColours, q=True, sl=True) - 1]
+        self.UpdateEstimate()
+
+    def RadioButtonUpdate_L_WaterCulling(self, *_):
+        """ Updates the L_WaterCulling_Val variable with the selected culling mode for faces under the water plane. """
+        self.L_WaterCulling_Val = [None, "Drop", "Coarse"][cmds.radioButtonGrp(self.L_WaterCulling, q=True, sl=True) - 1]
+
+    def SliderUpdate_L_LODLevels(self, *_):
+        """ Updates the landscape LOD Levels variable with the value from the associated slider. """
+        self.L_LODLevels_Val = cmds.intSliderGrp(self.L_LODLevels, q=True, v=True)
+        self.UpdateEstimate()
+
+    def FieldUpdate_L_VertexBudget(self, *_):
+        """ Updates the generator vertex budget with the value from the associated field. """
+        self.L_VertexBudget_Val = cmds.intFieldGrp(self.L_VertexBudget, q=True, value1=True)
+        self.NewGenerator.VertexBudget = self.L_VertexBudget_Val
+        self.UpdateEstimate()
+
+    def RadioButtonUpdate_L_OverBudget(self, *_):
+        """ Updates whether the generator refuses or downscales a build over budget, from the associated radio buttons. """
+        self.NewGenerator.BudgetAction = "Refuse" if cmds.radioButtonGrp(self.L_OverBudget, q=True, sl=True) == 1 else "Downscale"
+        self.UpdateEstimate()
+
+    def UpdateEstimate(self, *_):
+        """ Shows the predicted size, memory and build time of the landscape from the loaded height map, without reading it. """
+        SourceImage = getattr(self, "L_SourceImage", None)
+        if(SourceImage is None):
+            cmds.text(self.L_Estimate, e=True, label="Estimate: No height map")
+            return
+        estimate = self.NewGenerator.EstimateCost(SourceImage.width, SourceImage.height, self.L_VertexColours_Val, LODLevels=self.L_LODLevels_Val)
+        overBudget = "" if self.NewGenerator.WithinBudget(estimate) else " (over budget)"
+        cmds.text(self.L_Estimate, e=True, label="Estimate: " + estimate.Summary() + overBudget)
+
+    def SliderUpdate_L_BallNumber(self, *_):
+        """ Updates the Number of Balls variable with the value from the associated slider. """
+        self.L_BallNumber_Val = cmds.intSliderGrp(self.L_BallNumber, q=True, v=True)
+
+    def SliderUpdate_L_BallRadius(self, *_):
+        """ Updates the Ball Radius variable with the value from the associated slider. """
+        self.L_BallRadius_Val = cmds.floatSliderGrp(self.L_BallRadius, q=True, v=True)
+
+    def SliderUpdate_L_DropHeight(self, *_):
+        """ Updates the ball Drop Height variable with the value from the associated slider. """
+        self.L_DropHeight_Val = cmds.floatSliderGrp(self.L_DropHeight, q=True, v=True)
+
+    def FieldUpdate_L_FrameRange(self, *_):
+        """ Updates the animation Start and End Frame variables with the values from the associated fields. """
+        self.L_StartFrame_Val = cmds.intFieldGrp(self.L_FrameRange, q=True, value1=True)
+        self.L_EndFrame_Val = cmds.intFieldGrp(self.L_FrameRange, q=True, value2=True)
+
+    def DropBalls(self, *_):
+        """ Drops balls at random points above the last built landscape and simulates them bouncing across it. 
+
+            - no parameters, returns -1 if there is no landscape.
+        """
+        self.SliderUpdate_L_BallNumber()
+        self.SliderUpdate_L_BallRadius()
+        self.SliderUpdate_L_DropHeight()
+        self.FieldUpdate_L_FrameRange()
+
+        field = getattr(self.NewGenerator, "LandscapeHeightField", None)
+        if(field is None):
+            print("ABORT: Build a landscape before dropping balls.")
+            return -1
+
+        # Random start points over the landscape, all dropped from the same height above its highest point
+        random = np.random.default_rng()
+        x = random.uniform(-field.XHalf, (field.Width() - 1) * field.XStep - field.XHalf, self.L_BallNumber_Val)
+        z = random.uniform(-field.YHalf, (field.Depth() - 1) * field.YStep - field.YHalf, self.L_BallNumber_Val)
+        y = np.full(self.L_BallNumber_Val, field.Heights.max() + self.L_DropHeight_Val + self.L_BallRadius_Val)
+        self.NewGenerator.SimulateBallsOnLandscape(np.stack((x, y, z), axis=1), BallRadius=self.L_BallRadius_Val, StartFrame=self.L_StartFrame_Val, EndFrame=self.L_EndFrame_Val)
+
+    def SliderUpdate_W_Columns(self, *_):
+        """ Updates the wall decor Columns variable with the value from the associated slider. """
+        self.W_Columns_Val = cmds.intSliderGrp(self.W_Columns, q=True, v=True)
+
+    def SliderUpdate_W_Rows(self, *_):
+        """ Updates the wall decor Rows variable with the value from the associated slider. """
+        self.W_Rows_Val = cmds.intSliderGrp(self.W_Rows, q=True, v=True)
+
+    def BuildWallDecor(self, *_):
+        """ Builds the chequered wall decor, instanced, baked, or both under a LOD group switching by camera distance. """
+        self.SliderUpdate_W_Columns()
+        self.SliderUpdate_W_Rows()
+        Mode = ["Instanced", "Baked", "LOD"][cmds.radioButtonGrp(self.W_Mode, q=True, sl=True) - 1]
+        self.NewGenerator.GenerateSquareWallDecor(Columns=self.W_Columns_Val, Rows=self.W_Rows_Val, Mode=Mode)
+
     def BuildLandscape(self, *_):
         """ Setup and then call the generator build function for the Landscape.
 
@@ -345,15 +1835,28 @@ class MainWindow():
         self.SliderUpdate_L_XSubdivisions()
         self.SliderUpdate_L_YSubdivisions()
         self.SliderUpdate_L_HeightMultiplier()
+        self.SliderUpdate_L_Smoothing()
+        self.SliderUpdate_L_Terraces()
+        self.RadioButtonUpdate_L_VertexColours()
+        self.RadioButtonUpdate_L_WaterCulling()
+        self.SliderUpdate_L_LODLevels()
+        self.FieldUpdate_L_VertexBudget()
+        self.RadioButtonUpdate_L_OverBudget()
+
+        # Smooth out the 8 bit steps of the height map, then cut the terraces
+        filters = []
+        if(self.L_Smoothing_Val > 0):
+            filters.append(("gaussian", self.L_Smoothing_Val))
+        if(self.L_Terraces_Val > 0):
+            filters.append(("terrace", self.L_Terraces_Val, 0.2))
 
         # Switch on terrain type, from heightmap or generated
         if(cmds.radioButtonGrp(self.L_TerrainType, q=True, sl=True) == 1):
-            import os.path
             if(os.path.isfile(self.L_fileLocal)):
                 self.L_SourceImage = Imager(self.L_fileLocal)
                 #self.SourceImage.Resize(self.XSubdivisions_Val, self.YSubdivisions_Val) =P
                 #print(self.XScale_Val, self.YScale_Val)
-                self.NewGenerator.GenerateLandscapeFromImage(self.L_SourceImage, XScale=self.L_XScale_Val, YScale=self.L_YScale_Val, XSubdiv=self.L_XSubdivisions_Val, YSubdiv=self.L_YSubdivisions_Val, Height=self.L_HeightMultiplier_Val)
+                self.NewGenerator.GenerateLandscapeFromImage(self.L_SourceImage, XScale=self.L_XScale_Val, YScale=self.L_YScale_Val, XSubdiv=self.L_XSubdivisions_Val, YSubdiv=self.L_YSubdivisions_Val, Height=self.L_HeightMultiplier_Val, VertexColours=self.L_VertexColours_Val, LODLevels=self.L_LODLevels_Val, Filters=filters, WaterCulling=self.L_WaterCulling_Val, BakeMaps=cmds.checkBoxGrp(self.L_BakeMaps, q=True, value1=True), Camera=cmds.textFieldGrp(self.L_Camera, q=True, text=True) or None, Watch=cmds.checkBoxGrp(self.L_Watch, q=True, value1=True), Background=True)
             else:
                 return -1
         else:
@@ -361,7 +1864,14 @@ class MainWindow():
             return -1
 
 
+def main():
+    """ Opens the Landscape Generator window, the entry point when the script is run in maya (importing the module does not open it). 
+
+        - Returns the MainWindow.
+    """
+    return MainWindow()
+
 # start the main program
 if __name__=="__main__":
-    main = MainWindow()
+    mainWindow = main()
     
\ No newline at end of file
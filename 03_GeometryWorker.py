@@ -0,0 +1,471 @@
+"""
+    A persistent local worker that builds wire track and landscape geometry for batch jobs.
+
+    Starting mayapy for every batch build costs far more than generating the geometry, so this script keeps one process running with
+    both generators loaded, their geometry caches and the decoded height maps warm, and maya started once if a height map needs it.
+    Build requests are JSON specs, one per line, over a local TCP socket, answered with the mesh buffers inline or with the paths of .npz files holding them.
+
+    Run the worker (from a terminal):
+        mayapy 03_GeometryWorker.py serve [port]
+    Build a single request in a process of its own, the one process per job baseline:
+        mayapy 03_GeometryWorker.py build '{"generator" : "CircularWireTrack", "arguments" : {"circleRadius" : 15}}'
+    Compare the throughput of the two:
+        mayapy 03_GeometryWorker.py benchmark [jobs]
+
+    From maya or another script, connect with GeometryWorkerClient, e.g.
+        levels = GeometryWorkerClient().Build("CircularWireTrack", {"circleRadius" : 15, "degreesToGenerate" : 360})
+    and commit the returned arrays with the generator's own MeshBuffers(**arrays) and CreateMesh (or CommitLevels).
+
+    A request is a dictionary of
+        "command"       :    "build" (the default), "ping", "stats" or "shutdown".
+        "generator"     :    "CircularWireTrack", "StraightWireTrack", "TrackLayout" or "Landscape".
+        "arguments"     :    The arguments of the generator's Build...Buffers function (BuildLandscapeLevels for landscapes, with "image" the path of the height map,
+                             and "View" an optional CameraView description).
+        "targetFaces", "maxError", "lodLevels", "useCache"  :  As the generators' Generate functions take them.
+        "output"        :    "file" (the default) for the paths of .npz files, one per level of detail, or "inline" for the arrays as lists.
+"""
+
+import numpy as np
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+# The shared core, which loads the generator scripts, is imported by its file name (which starts with digits, so no import statement can name it), from the folder of this script or the python path
+scriptFolder = os.path.dirname(os.path.abspath(__file__)) if "__file__" in globals() else os.getcwd()
+if(scriptFolder not in sys.path):
+    sys.path.append(scriptFolder)
+core = importlib.import_module("00_GeometryCore")
+
+
+class DecodedImage():
+    """ A height map decoded once and kept in memory, standing in for the landscape Imager while its file is unchanged. """
+    def __init__(self, fileName, imagerClass):
+        """ Decodes the height map.
+
+            fileName        :    The path of the height map, decoded with maya's MImage, or loaded as is if it is a .npy array of (width, height, 4) pixels.
+            imagerClass     :    The landscape script's Imager class.
+        """
+        self.fileName = fileName
+        self.Modified = os.path.getmtime(fileName)
+        if(fileName.lower().endswith(".npy")):
+            self.PixelArray = np.load(fileName)
+        else:
+            self.PixelArray = imagerClass(fileName).Pixels()
+        self.width, self.height = self.PixelArray.shape[:2]
+
+        fileHash = hashlib.sha1()
+        with open(fileName, "rb") as imageFile:
+            for chunk in iter(lambda: imageFile.read(1024 * 1024), b""):
+                fileHash.update(chunk)
+        self.FileDigest = fileHash.hexdigest()
+
+    def Pixels(self, Progress=None):
+        """ Return the decoded (width, height, 4) array of pixels. """
+        return self.PixelArray
+
+    def Digest(self):
+        """ Return the hash of the height map file, as Imager.Digest does. """
+        return self.FileDigest
+
+
+class GeometryWorker():
+    """ Builds mesh buffers for JSON requests, keeping the generators, their caches and the decoded height maps from one request to the next.
+        Each connection is served on a thread of its own, but requests are handled one at a time under Lock, as the generators (and maya) are not thread safe.
+    """
+    Host = "127.0.0.1"
+    Port = 50807
+
+    # Seconds a connection may sit without sending a request before it is closed, so idle clients do not hold their threads for ever
+    ConnectionTimeout = 300.0
+    # The size the folder of "file" reply .npz files is trimmed back to after each reply, deleting the oldest first
+    MaxOutputBytes = 1024 * 1024 * 1024
+
+    # Wire track generator names, and the functions that build their buffers
+    WireBuilders = {"CircularWireTrack" : "BuildCircularWireTrackBuffers", "StraightWireTrack" : "BuildStraightWireTrackBuffers", "TrackLayout" : "BuildTrackLayoutBuffers"}
+
+    def __init__(self, outputDirectory=None, cacheDirectory=None):
+        """ Loads both generators.
+
+            outputDirectory :    The folder the .npz files of "file" replies are written to, defaults to a folder in the system temp directory.
+            cacheDirectory  :    The folder of the generators' geometry caches, defaults to their own.
+        """
+        self.Wire = core.LoadScript("01_WireTrackGenerator.py")
+        self.Landscape = core.LoadScript("02_LandscapeGenerator.py")
+        self.WireGenerator = self.Wire.Generator()
+        self.LandscapeGenerator = self.Landscape.Generator()
+        if(cacheDirectory is not None):
+            self.WireGenerator.Cache = self.Wire.GeometryCache(directory=cacheDirectory)
+            self.LandscapeGenerator.Cache = self.Landscape.GeometryCache(directory=cacheDirectory)
+        self.OutputDirectory = outputDirectory if outputDirectory is not None else os.path.join(tempfile.gettempdir(), "BallAnimationTools_WorkerOutput")
+
+        self.Images = {}
+        self.MayaStarted = False
+        self.Lock = threading.Lock()
+        self.Running = False
+        self.Address = None
+        self.Served = 0
+        self.BusySeconds = 0.0
+        self.Started = time.time()
+
+    def Handle(self, request):
+        """ Answer one request, see the script docstring for its fields.
+
+            - Returns the reply dictionary, with "ok" False and an "error" message if the request failed.
+        """
+        start = time.perf_counter()
+        try:
+            command = request.get("command", "build")
+            if(command == "ping"):
+                reply = {"ok" : True}
+            elif(command == "stats"):
+                reply = {"ok" : True, "served" : self.Served, "busySeconds" : self.BusySeconds, "upSeconds" : time.time() - self.Started, "images" : sorted(self.Images)}
+            elif(command == "shutdown"):
+                self.Running = False
+                reply = {"ok" : True}
+            elif(command == "build"):
+                reply = self.Build(request)
+            else:
+                reply = {"ok" : False, "error" : "Command %s not recognised." % command}
+        except Exception as exception:
+            reply = {"ok" : False, "error" : "%s: %s" % (type(exception).__name__, exception)}
+        self.Served += 1
+        self.BusySeconds += time.perf_counter() - start
+        reply["seconds"] = time.perf_counter() - start
+        return reply
+
+    def Build(self, request):
+        """ Build the buffers of every level of detail of one request.
+
+            - Returns the reply, see Reply.
+        """
+        generator = request.get("generator")
+        arguments = dict(request.get("arguments", {}))
+        targetFaces = request.get("targetFaces")
+        maxError = request.get("maxError")
+        lodLevels = request.get("lodLevels", 1)
+        useCache = request.get("useCache", True)
+
+        if(generator in self.WireBuilders):
+            buildFunction = getattr(self.WireGenerator, self.WireBuilders[generator])
+            # The budget and the cache key need every argument, so those the request leaves out take the builder's defaults
+            for name, parameter in inspect.signature(buildFunction).parameters.items():
+                if(name not in arguments and parameter.default is not inspect.Parameter.empty):
+                    arguments[name] = parameter.default
+            arguments = self.WireGenerator.BudgetArguments(generator, arguments, targetFaces, lodLevels)
+            if(arguments == -1):
+                return {"ok" : False, "error" : "%s is over budget." % generator}
+            levels = self.WireGenerator.BuildLevels(generator, buildFunction, arguments, useCache, targetFaces, maxError, lodLevels)
+            if(levels == -1):
+                return {"ok" : False, "error" : "The %s parameters are not valid." % generator}
+            return self.Reply(request, [buffers.ToArrays() for buffers in levels])
+
+        if(generator == "Landscape"):
+            image = self.Image(arguments.pop("image"))
+            if("View" in arguments):
+                arguments["View"] = self.Landscape.CameraView(**arguments["View"])
+            if(arguments.get("Filters") and not self.Landscape.HeightFilter(arguments["Filters"]).Recognised()):
+                return {"ok" : False, "error" : "A height filter is not recognised."}
+            baseLevel = self.LandscapeGenerator.BudgetLevel(image.width, image.height, arguments.get("VertexColours"), targetFaces, lodLevels)
+            if(baseLevel == -1):
+                return {"ok" : False, "error" : "The landscape is over budget."}
+            levels, heights = self.LandscapeGenerator.BuildLandscapeLevels(image, UseCache=useCache, TargetFaces=targetFaces, MaxError=maxError, LODLevels=lodLevels, BaseLevel=baseLevel, **arguments)
+            arrays = [buffers.ToArrays() for buffers in levels]
+            # The full height grid goes with the most detailed level, for the landscape's HeightField
+            arrays[0]["heights"] = heights
+            return self.Reply(request, arrays)
+
+        return {"ok" : False, "error" : "Generator %s not recognised." % generator}
+
+    def Reply(self, request, levels):
+        """ Package the arrays of each level of detail for the reply, inline or written to .npz files named after the request.
+
+            - Returns the reply, with "levels" the list of dictionaries of arrays as lists, or "files" the list of .npz paths.
+        """
+        if(request.get("output", "file") == "inline"):
+            return {"ok" : True, "levels" : [{name : values.tolist() for name, values in arrays.items()} for arrays in levels]}
+
+        os.makedirs(self.OutputDirectory, exist_ok=True)
+        key = hashlib.sha1(json.dumps(request, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        files = []
+        for level, arrays in enumerate(levels):
+            path = os.path.join(self.OutputDirectory, "%s_%d.npz" % (key, level))
+            # Written to a temporary file first, so a client still reading an earlier reply to the same request never sees half a file.
+            # Uncompressed, as the files are read straight back by the client on the same machine
+            handle, temporaryPath = tempfile.mkstemp(suffix=".tmp.npz", dir=self.OutputDirectory)
+            try:
+                with os.fdopen(handle, "wb") as temporaryFile:
+                    np.savez(temporaryFile, **arrays)
+                os.replace(temporaryPath, path)
+            except BaseException:
+                # A failed remove must not hide the error that stopped the write
+                try:
+                    os.remove(temporaryPath)
+                except OSError:
+                    pass
+                raise
+            files.append(path)
+        self.TrimOutput(files)
+        return {"ok" : True, "files" : files}
+
+    def TrimOutput(self, keep=()):
+        """ Delete the oldest reply files until the output folder is under MaxOutputBytes, never deleting those of the reply being sent.
+
+            keep            :    The paths of the files of the current reply.
+
+            - no return
+        """
+        entries = []
+        for name in os.listdir(self.OutputDirectory):
+            path = os.path.join(self.OutputDirectory, name)
+            if(name.endswith(".npz") and not name.endswith(".tmp.npz")):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        totalBytes = sum(entry[1] for entry in entries)
+        for modified, size, path in entries:
+            if(totalBytes <= self.MaxOutputBytes):
+                break
+            if(path in keep):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            totalBytes -= size
+
+    def Image(self, fileName):
+        """ Return the decoded height map of a file, decoding it again only if the file has changed since it was last used. """
+        fileName = os.path.abspath(fileName)
+        image = self.Images.get(fileName)
+        if(image is None or image.Modified != os.path.getmtime(fileName)):
+            if(not fileName.lower().endswith(".npy")):
+                self.StartMaya()
+            image = DecodedImage(fileName, self.Landscape.Imager)
+            self.Images[fileName] = image
+        return image
+
+    def StartMaya(self):
+        """ Start maya standalone the first time a height map has to be decoded with MImage, so its start up is only paid once (mayapy only). """
+        if(not self.MayaStarted):
+            import maya.standalone
+            maya.standalone.initialize(name="python")
+            self.MayaStarted = True
+
+    def Serve(self, port=None):
+        """ Answer requests on the local socket until a shutdown request, one JSON request and reply per line, any number per connection.
+            Each connection gets a thread of its own and is closed after ConnectionTimeout seconds without a request.
+
+            port            :    The port to listen on, defaults to Port (0 picks a free port, see Address).
+
+            - no return
+        """
+        worker = self
+        class Handler(socketserver.StreamRequestHandler):
+            timeout = worker.ConnectionTimeout
+
+            def handle(self):
+                try:
+                    for line in self.rfile:
+                        if(not line.strip()):
+                            continue
+                        try:
+                            request = json.loads(line)
+                        except ValueError as exception:
+                            reply = {"ok" : False, "error" : "Request is not valid JSON: %s" % exception}
+                        else:
+                            with worker.Lock:
+                                reply = worker.Handle(request)
+                        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+                        if(not worker.Running):
+                            # serve_forever runs on another thread, so this returns once it has stopped
+                            self.server.shutdown()
+                            break
+                except (socket.timeout, ConnectionError):
+                    # Idle for too long, or the client went away
+                    pass
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            # Connections still open at shutdown are not waited on
+            daemon_threads = True
+
+        with Server((self.Host, port if port is not None else self.Port), Handler) as server:
+            self.Address = server.server_address
+            print("Geometry worker listening on %s:%d" % server.server_address)
+            sys.stdout.flush()
+            self.Running = True
+            server.serve_forever()
+
+
+class GeometryWorkerClient():
+    """ A thin client for a running GeometryWorker, usable from inside maya or any python script, as it only needs the standard library and numpy.
+        The connection is kept open between requests.
+    """
+    def __init__(self, host=GeometryWorker.Host, port=GeometryWorker.Port, timeout=600.0):
+        """ Initialises the client (does not connect until the first request).
+
+            host            :    The address of the worker.
+            port            :    The port of the worker.
+            timeout         :    The seconds to wait for a reply before giving up.
+        """
+        self.Host = host
+        self.Port = port
+        self.Timeout = timeout
+        self.Connection = None
+        self.Stream = None
+
+    def Request(self, request):
+        """ Send one request dictionary to the worker and wait for its reply.
+
+            - Returns the reply dictionary.
+        """
+        if(self.Connection is None):
+            self.Connection = socket.create_connection((self.Host, self.Port), timeout=self.Timeout)
+            self.Stream = self.Connection.makefile("rwb")
+        self.Stream.write((json.dumps(request) + "\n").encode("utf-8"))
+        self.Stream.flush()
+        line = self.Stream.readline()
+        if(not line):
+            self.Close()
+            raise ConnectionError("The geometry worker closed the connection.")
+        return json.loads(line)
+
+    def Build(self, generator, arguments, targetFaces=None, maxError=None, lodLevels=1, useCache=True, output="file"):
+        """ Have the worker build a generator's buffers, see the script docstring for the request fields.
+
+            - Returns the list of dictionaries of arrays, one per level of detail from the most detailed (ready for MeshBuffers(**arrays), less any "heights"),
+              or -1 if the build failed.
+        """
+        reply = self.Request({"command" : "build", "generator" : generator, "arguments" : arguments, "targetFaces" : targetFaces, "maxError" : maxError,
+                              "lodLevels" : lodLevels, "useCache" : useCache, "output" : output})
+        if(not reply["ok"]):
+            print("ABORT: %s" % reply["error"])
+            return -1
+        if("levels" in reply):
+            return [{name : np.asarray(values) for name, values in arrays.items()} for arrays in reply["levels"]]
+        levels = []
+        for path in reply["files"]:
+            with np.load(path) as data:
+                levels.append({name : data[name] for name in data.files})
+        return levels
+
+    def Ping(self):
+        """ Return whether the worker is running and answering. """
+        try:
+            return self.Request({"command" : "ping"})["ok"]
+        except OSError:
+            self.Close()
+            return False
+
+    def Stats(self):
+        """ Return the worker's counts of requests served, busy and up seconds, and the height maps it holds decoded. """
+        return self.Request({"command" : "stats"})
+
+    def Shutdown(self):
+        """ Ask the worker to stop, then close the connection. """
+        self.Request({"command" : "shutdown"})
+        self.Close()
+
+    def Close(self):
+        """ Close the connection to the worker. """
+        if(self.Connection is not None):
+            self.Stream.close()
+            self.Connection.close()
+        self.Connection = None
+        self.Stream = None
+
+
+def BuildOnce(requestText):
+    """ Answer a single JSON request in this process and print the reply, the one process per job baseline the worker is measured against. """
+    print(json.dumps(GeometryWorker().Handle(json.loads(requestText))))
+
+
+def BenchmarkRequests(imageFile):
+    """ Return the list of requests the benchmark builds, a mix of tracks and a landscape from imageFile, with the geometry caches off so every job really builds. """
+    return [{"generator" : "CircularWireTrack", "arguments" : {"circleRadius" : 15, "circleSubdivisions" : 72, "degreesToGenerate" : 360, "connectorNumber" : 24}, "useCache" : False},
+            {"generator" : "StraightWireTrack", "arguments" : {"length" : 30, "lengthSubdivisions" : 60}, "useCache" : False},
+            {"generator" : "TrackLayout", "arguments" : {"segments" : [["straight", 10], ["arc", 8, 90], ["loop", 6, 3]]}, "useCache" : False},
+            {"generator" : "Landscape", "arguments" : {"image" : imageFile, "XSubdiv" : 255, "YSubdiv" : 255, "VertexColours" : "HeightRamp"}, "useCache" : False}]
+
+
+def Benchmark(jobs=20, port=None):
+    """ Time the same jobs through a running worker and with one process per job, printing the throughput of each.
+
+        jobs            :    The number of jobs to run each way, cycling through BenchmarkRequests.
+        port            :    The port to run the benchmark worker on, defaults to one past GeometryWorker.Port.
+
+        - Returns the jobs per second of the worker and of the one process per job baseline.
+    """
+    port = port if port is not None else GeometryWorker.Port + 1
+    script = os.path.abspath(__file__)
+
+    # A synthetic height map, saved as decoded pixels so the benchmark runs without maya
+    imageFile = os.path.join(tempfile.gettempdir(), "BallAnimationTools_BenchmarkHeights.npy")
+    x, y = np.meshgrid(np.arange(256), np.arange(256), indexing="ij")
+    pixels = np.zeros((256, 256, 4), dtype=np.uint8)
+    pixels[:, :, 2] = (127 + 120 * np.sin(x / 17.0) * np.cos(y / 23.0)).astype(np.uint8)
+    np.save(imageFile, pixels)
+    requests = BenchmarkRequests(imageFile)
+
+    server = subprocess.Popen([sys.executable, script, "serve", str(port)], stdout=subprocess.DEVNULL)
+    try:
+        client = GeometryWorkerClient(port=port)
+        startWaiting = time.perf_counter()
+        while(not client.Ping()):
+            if(time.perf_counter() - startWaiting > 60 or server.poll() is not None):
+                raise RuntimeError("The benchmark worker did not start.")
+            time.sleep(0.1)
+
+        start = time.perf_counter()
+        for job in range(jobs):
+            request = requests[job % len(requests)]
+            if(client.Build(request["generator"], request["arguments"], useCache=False) == -1):
+                raise RuntimeError("Job %d failed on the worker." % job)
+        workerSeconds = time.perf_counter() - start
+        client.Shutdown()
+    finally:
+        if(server.poll() is None):
+            server.terminate()
+        server.wait(timeout=60)
+
+    start = time.perf_counter()
+    for job in range(jobs):
+        result = subprocess.run([sys.executable, script, "build", json.dumps(requests[job % len(requests)])], capture_output=True, text=True)
+        if(result.returncode != 0 or not json.loads(result.stdout.strip().splitlines()[-1])["ok"]):
+            raise RuntimeError("Job %d failed in its own process: %s" % (job, result.stderr))
+    processSeconds = time.perf_counter() - start
+
+    print("Worker:              %d jobs in %.2f s, %.1f jobs/s" % (jobs, workerSeconds, jobs / workerSeconds))
+    print("Process per job:     %d jobs in %.2f s, %.1f jobs/s" % (jobs, processSeconds, jobs / processSeconds))
+    print("Speed up:            %.1fx" % (processSeconds / workerSeconds))
+    return jobs / workerSeconds, jobs / processSeconds
+
+
+def main(arguments):
+    """ Run the command line: serve [port], build <request json>, or benchmark [jobs]. """
+    if(len(arguments) >= 1 and arguments[0] == "serve"):
+        GeometryWorker().Serve(int(arguments[1]) if len(arguments) > 1 else None)
+    elif(len(arguments) == 2 and arguments[0] == "build"):
+        BuildOnce(arguments[1])
+    elif(len(arguments) >= 1 and arguments[0] == "benchmark"):
+        Benchmark(int(arguments[1]) if len(arguments) > 1 else 20)
+    else:
+        print(__doc__)
+
+# Run from a terminal; in maya's script editor only the client and worker classes are defined
+if __name__=="__main__" and "maya.cmds" not in sys.modules:
+    main(sys.argv[1:])
@@ -0,0 +1,34 @@
+"""
+    Loads the scripts through the core's LoadScript, as the geometry worker does, so the tests run without maya (which the scripts only import when they first call into it).
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+Root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if(Root not in sys.path):
+    sys.path.append(Root)
+GeometryCore = importlib.import_module("00_GeometryCore")
+
+
+@pytest.fixture(scope="session")
+def core():
+    return GeometryCore
+
+
+@pytest.fixture(scope="session")
+def wire():
+    return GeometryCore.LoadScript("01_WireTrackGenerator.py")
+
+
+@pytest.fixture(scope="session")
+def landscape():
+    return GeometryCore.LoadScript("02_LandscapeGenerator.py")
+
+
+@pytest.fixture(scope="session")
+def worker():
+    return GeometryCore.LoadScript("03_GeometryWorker.py")
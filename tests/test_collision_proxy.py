@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def BruteForce(proxy, points):
+    """ The surface distance from every point to every capsule, working out each (point, capsule, 3) offset in full. """
+    axes = proxy.Ends - proxy.Starts
+    t = np.clip(np.einsum("pcj,cj->pc", points[:, np.newaxis] - proxy.Starts, axes) / np.einsum("ij,ij->i", axes, axes), 0, 1)
+    closest = proxy.Starts + t[..., np.newaxis] * axes
+    return np.linalg.norm(points[:, np.newaxis] - closest, axis=2) - proxy.Radii
+
+
+def test_closest_points_match_brute_force(wire):
+    random = np.random.default_rng(4)
+    starts = random.uniform(-5, 5, (60, 3))
+    proxy = wire.CollisionProxy(starts, starts + random.uniform(-2, 2, (60, 3)), random.uniform(0.1, 0.6, 60))
+    points = random.uniform(-6, 6, (500, 3))
+
+    # A small chunk so the points are worked on in several batches
+    distances, surfacePoints, normals, nearest = proxy.ClosestPoints(points, radius=0.25, chunkElements=1000)
+
+    expected = BruteForce(proxy, points)
+    assert np.array_equal(nearest, np.argmin(expected, axis=1))
+    assert np.allclose(distances, expected.min(axis=1) - 0.25)
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+    # The surface point lies on its capsule, and the ball centre is out along the normal from it
+    assert np.allclose(BruteForce(proxy, surfacePoints)[np.arange(len(points)), nearest], 0, atol=1e-9)
+    assert np.allclose(surfacePoints + normals * (distances + 0.25)[:, np.newaxis], points)
+
+
+def test_point_on_a_capsule_axis_gets_a_normal(wire):
+    proxy = wire.CollisionProxy([(0, 0, 0)], [(0, 0, 4)], 0.5)
+
+    distances, surfacePoints, normals, nearest = proxy.ClosestPoints([(0, 0, 2), (0, 3, 6)])
+
+    assert np.allclose(distances, [-0.5, np.hypot(3, 2) - 0.5])
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+    assert np.isclose(normals[0, 2], 0)
+
+
+def test_track_proxy_stays_close_to_the_mesh(wire):
+    generator = wire.Generator()
+    arguments = {"circleRadius" : 10, "circleSubdivisions" : 36, "degreesToGenerate" : 90, "wireRadius" : 0.5, "wireSubdivisions" : 8, "trackRadius" : 3.0, "trackDegrees" : 180, 
+                 "wireNumber" : 4, "connectorNumber" : 6, "connectorSubdivisions" : 12, "wireCaps" : True, "weldTolerance" : 1e-4}
+    buffers = generator.BuildCircularWireTrackBuffers(**arguments)
+
+    proxy = generator.BuildCollisionProxy("CircularWireTrack", arguments)
+
+    # Every mesh vertex is on the surface of the track, so close to the surface of some capsule
+    assert np.abs(proxy.ClosestPoints(buffers.Vertices)[0]).max() < 0.1
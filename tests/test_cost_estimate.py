@@ -0,0 +1,77 @@
+import inspect
+import types
+
+import numpy as np
+import pytest
+
+
+def Bytes(buffers):
+    return sum(values.nbytes for values in buffers.ToArrays().values())
+
+
+def Arguments(function, **arguments):
+    """ Every argument of a builder, the defaults filled in for those not given. """
+    for name, parameter in inspect.signature(function).parameters.items():
+        if(name not in arguments and parameter.default is not inspect.Parameter.empty):
+            arguments[name] = parameter.default
+    return arguments
+
+
+@pytest.mark.parametrize("generatorName, builder, arguments", [
+    ("StraightWireTrack", "BuildStraightWireTrackBuffers", {}), 
+    ("StraightWireTrack", "BuildStraightWireTrackBuffers", {"wireCaps" : False, "trackDegrees" : 360, "wireNumber" : 6}), 
+    ("CircularWireTrack", "BuildCircularWireTrackBuffers", {"degreesToGenerate" : 360}), 
+    ("CircularWireTrack", "BuildCircularWireTrackBuffers", {"degreesToGenerate" : 120, "circleSubdivisions" : 50}), 
+    ("TrackLayout", "BuildTrackLayoutBuffers", {"segments" : [("straight", 6), ("arc", 5, 90), ("helix", 4, -180, 3), ("loop", 3, 1.5)]})])
+def test_wire_estimate_matches_the_built_buffers(wire, generatorName, builder, arguments):
+    generator = wire.Generator()
+    arguments = Arguments(getattr(generator, builder), weldTolerance=0, **arguments)
+
+    estimate = generator.EstimateCost(generatorName, arguments)
+    buffers = getattr(generator, builder)(**arguments)
+
+    assert (estimate.Vertices, estimate.Faces, estimate.FaceVertices, estimate.UVs) == (len(buffers.Vertices), len(buffers.PolyFaces), len(buffers.PolygonConnects), len(buffers.UValues))
+    assert estimate.Bytes() == Bytes(buffers)
+    assert estimate.Seconds > 0
+
+
+def test_wire_estimate_sums_the_levels_of_detail(wire):
+    generator = wire.Generator()
+    arguments = Arguments(generator.BuildCircularWireTrackBuffers, weldTolerance=0)
+
+    estimate = generator.EstimateCost("CircularWireTrack", arguments, lodLevels=3)
+
+    levels = [generator.BuildCircularWireTrackBuffers(**generator.LevelArguments(arguments, level)) for level in range(3)]
+    assert estimate.Vertices == sum(len(buffers.Vertices) for buffers in levels)
+    assert estimate.Bytes() == sum(Bytes(buffers) for buffers in levels)
+
+
+@pytest.mark.parametrize("width, depth, vertexColours", [(65, 49, None), (100, 37, "HeightRamp"), (64, 64, "Image")])
+def test_landscape_estimate_matches_the_built_buffers(landscape, width, depth, vertexColours):
+    generator = landscape.Generator()
+    pixels = np.random.default_rng(5).integers(0, 256, (width, depth, 4)).astype(np.uint8)
+    image = types.SimpleNamespace(width=width, height=depth)
+
+    estimate = generator.EstimateCost(width, depth, vertexColours, LODLevels=3)
+
+    levels = [generator.BuildLandscapeBuffers(image, VertexColours=vertexColours, LODLevel=level, Pixels=pixels)[0] for level in range(3)]
+    assert estimate.Vertices == sum(len(buffers.Vertices) for buffers in levels)
+    assert estimate.Faces == sum(len(buffers.PolyFaces) for buffers in levels)
+    assert estimate.Bytes() == sum(Bytes(buffers) for buffers in levels)
+
+
+def test_budget_downscales_or_refuses(wire, landscape):
+    generator = landscape.Generator()
+    generator.VertexBudget = 2000
+    assert generator.BudgetLevel(201, 201) == -1
+    generator.BudgetAction = "Downscale"
+    assert generator.BudgetLevel(201, 201) == 3
+    assert generator.EstimateCost(201, 201, BaseLevel=3).Vertices <= 2000 < generator.EstimateCost(201, 201, BaseLevel=2).Vertices
+
+    generator = wire.Generator()
+    arguments = Arguments(generator.BuildStraightWireTrackBuffers)
+    generator.VertexBudget = 1000
+    assert generator.BudgetArguments("StraightWireTrack", arguments) == -1
+    generator.BudgetAction = "Downscale"
+    downscaled = generator.BudgetArguments("StraightWireTrack", arguments)
+    assert generator.EstimateCost("StraightWireTrack", downscaled).Vertices <= 1000
@@ -0,0 +1,131 @@
+import inspect
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def geometryWorker(worker, tmp_path):
+    return worker.GeometryWorker(outputDirectory=str(tmp_path / "output"), cacheDirectory=str(tmp_path / "cache"))
+
+
+def RoundTrip(geometryWorker, request):
+    """ Send a request and its reply through JSON, as the socket does. """
+    return json.loads(json.dumps(geometryWorker.Handle(json.loads(json.dumps(request)))))
+
+
+def ReplyLevels(reply):
+    """ The dictionaries of arrays of each level of a reply, inline or from its files. """
+    if("levels" in reply):
+        return [{name : np.asarray(values) for name, values in arrays.items()} for arrays in reply["levels"]]
+    return [dict(np.load(path)) for path in reply["files"]]
+
+
+@pytest.mark.parametrize("output", ["inline", "file"])
+def test_wire_build_round_trip(wire, geometryWorker, output):
+    arguments = {"circleRadius" : 12, "degreesToGenerate" : 90, "connectorNumber" : 5}
+
+    reply = RoundTrip(geometryWorker, {"generator" : "CircularWireTrack", "arguments" : arguments, "lodLevels" : 2, "output" : output})
+
+    assert reply["ok"], reply
+    levels = ReplyLevels(reply)
+    generator = wire.Generator()
+    for name, parameter in inspect.signature(generator.BuildCircularWireTrackBuffers).parameters.items():
+        arguments.setdefault(name, parameter.default)
+    assert len(levels) == 2
+    for level, arrays in enumerate(levels):
+        expected = generator.BuildCircularWireTrackBuffers(**generator.LevelArguments(arguments, level)).ToArrays()
+        assert sorted(arrays) == sorted(expected)
+        for name, values in expected.items():
+            assert np.allclose(arrays[name], values), name
+        # The arrays go straight back into the generator's own buffers
+        assert len(wire.MeshBuffers(**arrays).PolyFaces) == len(expected["polyFaces"])
+
+
+def test_landscape_build_round_trip(landscape, geometryWorker, tmp_path):
+    # A height map saved as its decoded pixels, so no maya is needed to read it
+    pixels = np.random.default_rng(6).integers(0, 256, (40, 30, 4)).astype(np.uint8)
+    np.save(str(tmp_path / "height.npy"), pixels)
+    request = {"generator" : "Landscape", "arguments" : {"image" : str(tmp_path / "height.npy"), "VertexColours" : "HeightRamp", "Filters" : [["gaussian", 1.0]]}, "lodLevels" : 2}
+
+    first = RoundTrip(geometryWorker, request)
+    again = RoundTrip(geometryWorker, request)
+
+    assert first["ok"] and again["ok"], (first, again)
+    levels = ReplyLevels(again)
+    generator = landscape.Generator()
+    heights = generator.ImageHeights(pixels, 5, [["gaussian", 1.0]])
+    assert np.allclose(levels[0]["heights"], heights)
+    image = geometryWorker.Image(str(tmp_path / "height.npy"))
+    for level, arrays in enumerate(levels):
+        expected = generator.BuildLandscapeBuffers(image, VertexColours="HeightRamp", LODLevel=level, Pixels=pixels, Heights=heights)[0].ToArrays()
+        for name, values in expected.items():
+            assert np.allclose(arrays[name], values), name
+    # The levels were stored in the geometry cache for the second request, and the height map decoded only once
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
+    assert RoundTrip(geometryWorker, {"command" : "stats"})["images"] == [str(tmp_path / "height.npy")]
+
+
+@pytest.mark.parametrize("request_, error", [({"generator" : "Teapot"}, "not recognised"), ({"command" : "dance"}, "not recognised"),
+                                             ({"generator" : "CircularWireTrack", "arguments" : {"wireSubdivisions" : 1}}, "not valid"),
+                                             ({"generator" : "Landscape", "arguments" : {"image" : "missing.npy"}}, "missing.npy")])
+def test_failed_requests_reply_with_an_error(geometryWorker, request_, error):
+    reply = RoundTrip(geometryWorker, request_)
+
+    assert not reply["ok"]
+    assert error in reply["error"]
+
+
+def test_commands(geometryWorker):
+    assert RoundTrip(geometryWorker, {"command" : "ping"})["ok"]
+    assert RoundTrip(geometryWorker, {"command" : "stats"})["served"] == 1
+    assert geometryWorker.Handle({"command" : "shutdown"})["ok"] and not geometryWorker.Running
+
+
+def test_idle_connection_does_not_block_others(worker, geometryWorker):
+    geometryWorker.ConnectionTimeout = 1.0
+    server = threading.Thread(target=geometryWorker.Serve, args=(0,), daemon=True)
+    server.start()
+    while(geometryWorker.Address is None or not geometryWorker.Running):
+        time.sleep(0.01)
+    host, port = geometryWorker.Address
+
+    # A client that connects and never sends anything
+    idle = socket.create_connection((host, port), timeout=10)
+    client = worker.GeometryWorkerClient(host, port, timeout=10)
+    start = time.perf_counter()
+    assert client.Ping()
+    assert len(client.Build("StraightWireTrack", {"length" : 5}, output="inline")) == 1
+    assert time.perf_counter() - start < 5
+    client.Close()
+
+    # The idle connection is closed once it has sat for ConnectionTimeout
+    assert idle.recv(1) == b""
+    idle.close()
+
+    worker.GeometryWorkerClient(host, port, timeout=10).Shutdown()
+    server.join(10)
+    assert not server.is_alive()
+
+
+def test_reply_files_are_trimmed_to_the_cap(geometryWorker, tmp_path):
+    requests = [{"generator" : "StraightWireTrack", "arguments" : {"length" : length}} for length in (5, 6, 7, 8)]
+    first = geometryWorker.Handle(requests[0])
+    geometryWorker.MaxOutputBytes = 2.5 * os.path.getsize(first["files"][0])
+
+    replies = []
+    for request in requests[1:]:
+        time.sleep(0.01)
+        replies.append(geometryWorker.Handle(request))
+
+    kept = sorted(str(path) for path in (tmp_path / "output").glob("*.npz"))
+    assert len(kept) == 2
+    # The newest replies are kept, and their files can still be read
+    assert kept == sorted(reply["files"][0] for reply in replies[-2:])
+    assert not os.path.exists(first["files"][0])
+    assert not list((tmp_path / "output").glob("*.tmp.npz"))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("filters", [[("gaussian", 2.0)], [("median", 2)], [("bilateral", 1.5, 0.1)], [("gaussian", 1.0), ("terrace", 4, 0.3), ("median", 1)]])
+def test_tiled_filters_match_a_single_tile(landscape, filters):
+    # Tiles padded with their neighbours must give the same heights as filtering the whole grid at once
+    heights = np.random.default_rng(1).random((90, 70))
+    whole = landscape.HeightFilter(filters)
+    tiled = landscape.HeightFilter(filters)
+    tiled.TileSize = 16
+
+    assert np.allclose(tiled.Apply(heights), whole.Apply(heights))
+
+
+def test_reach_covers_the_changed_heights(landscape):
+    filters = [("gaussian", 1.5), ("median", 2)]
+    heights = np.random.default_rng(2).random((60, 60))
+    changed = heights.copy()
+    changed[30, 30] += 1.0
+
+    difference = np.abs(landscape.HeightFilter(filters).Apply(changed) - landscape.HeightFilter(filters).Apply(heights)) > 1e-12
+    xs, ys = np.nonzero(difference)
+    reach = landscape.HeightFilter(filters).Reach()
+    assert np.abs(xs - 30).max() <= reach and np.abs(ys - 30).max() <= reach
+
+
+def test_unknown_filter_is_not_recognised(landscape):
+    assert landscape.HeightFilter([("gaussian", 1.0)]).Recognised()
+    assert not landscape.HeightFilter([("sharpen", 1.0)]).Recognised()
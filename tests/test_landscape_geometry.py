@@ -0,0 +1,136 @@
+import types
+
+import numpy as np
+import pytest
+
+
+def Grid(landscape, width=65, depth=49, step=1.0):
+    """ A landscape grid of rolling heights, as its (width, depth, 3) vertices, heights and (width - 1, depth - 1, 4) quads. """
+    generator = landscape.Generator()
+    x, y = np.meshgrid(np.arange(width) * step, np.arange(depth) * step, indexing="ij")
+    heights = 2 * np.sin(x / 7) * np.cos(y / 9)
+    corner = np.arange(width - 1)[:, np.newaxis] * depth + np.arange(depth - 1)
+    quads = np.stack((corner, corner + 1, corner + depth + 1, corner + depth), axis=-1)
+    return generator, np.stack((x, heights, y), axis=-1), heights, quads
+
+
+def LookAt(eye, target, fieldOfView=50.0, width=640, height=480, near=0.1, far=1000.0):
+    """ The world to clip space matrix of a perspective camera, for row vectors as CameraView takes it. """
+    eye = np.asarray(eye, dtype=np.float64)
+    back = eye - np.asarray(target, dtype=np.float64)
+    back /= np.linalg.norm(back)
+    right = np.cross((0.0, 1.0, 0.0), back)
+    right /= np.linalg.norm(right)
+    up = np.cross(back, right)
+    view = np.eye(4)
+    view[:3, :3] = np.stack((right, up, back), axis=1)
+    view[3, :3] = -eye @ view[:3, :3]
+    focal = 1 / np.tan(np.radians(fieldOfView) / 2)
+    projection = np.zeros((4, 4))
+    projection[0, 0] = focal * height / width
+    projection[1, 1] = focal
+    projection[2, 2] = (far + near) / (near - far)
+    projection[3, 2] = 2 * far * near / (near - far)
+    projection[2, 3] = -1
+    return view @ projection
+
+
+def Area(vertices, quads):
+    """ The area of quads projected down onto the ground plane. """
+    x, z = vertices[quads, 0], vertices[quads, 2]
+    return np.abs(0.5 * np.sum(x * np.roll(z, -1, axis=1) - np.roll(x, -1, axis=1) * z, axis=1)).sum()
+
+
+@pytest.mark.parametrize("waterLevel", [-1.0, 0.0, 5.0])
+def test_cull_underwater_drops_only_hidden_cells(landscape, waterLevel):
+    generator, vertices, heights, quads = Grid(landscape)
+
+    kept = generator.CullUnderwater(quads, heights, waterLevel)
+
+    assert len(kept) == sum(np.any(heights.ravel()[quad] >= waterLevel) for quad in quads.reshape(-1, 4))
+    assert (heights.ravel()[kept] >= waterLevel).any(axis=1).all()
+
+
+def test_coarse_culling_covers_whole_hidden_blocks(landscape):
+    generator, vertices, heights, quads = Grid(landscape)
+    points = vertices.reshape(-1, 3)
+    blockSize = 4
+
+    dropped = generator.CullUnderwater(quads, heights, 0.5)
+    coarse = generator.CullUnderwater(quads, heights, 0.5, "Coarse", blockSize)
+
+    below = heights < 0.5
+    hidden = below[:-1, :-1] & below[1:, :-1] & below[:-1, 1:] & below[1:, 1:]
+    blocks = hidden[:16 * blockSize, :12 * blockSize].reshape(16, blockSize, 12, blockSize).all(axis=(1, 3))
+    assert len(coarse) == len(dropped) + blocks.sum()
+    # The coarse quads fill the holes the hidden cells left, without overlapping the kept ones
+    assert np.isclose(Area(points, coarse), Area(points, dropped) + blocks.sum() * blockSize * blockSize)
+
+
+def test_compact_vertices_drops_unused_vertices(landscape):
+    generator = landscape.Generator()
+    vertices = np.arange(18, dtype=np.float64).reshape(6, 3)
+    colours = np.arange(6)
+
+    connects, compactVertices, compactColours, missing = generator.CompactVertices(np.array([5, 1, 3, 1]), vertices, colours, None)
+
+    assert compactVertices.tolist() == vertices[[1, 3, 5]].tolist()
+    assert compactColours.tolist() == [1, 3, 5]
+    assert missing is None
+    assert compactVertices[connects].tolist() == vertices[[5, 1, 3, 1]].tolist()
+
+
+def test_distant_camera_view_covers_the_grid_coarsely(landscape):
+    generator, vertices, heights, quads = Grid(landscape, 129, 97)
+    view = landscape.CameraView(LookAt((64, 400, 300), (64, 0, 48)), 640, 480, PixelsPerCell=4.0)
+
+    viewQuads, skirtSources, skirtDrops = generator.CameraQuads(vertices, view)
+
+    assert 0 < len(viewQuads) < quads.size // 4
+    # Skirts hang straight down, so the quads on the grid cover it exactly once
+    assert np.isclose(Area(vertices.reshape(-1, 3), viewQuads[(viewQuads < 129 * 97).all(axis=1)]), 128 * 96)
+
+
+def test_close_camera_view_leaves_out_hidden_tiles_and_joins_the_rest(landscape):
+    generator, vertices, heights, quads = Grid(landscape, 129, 129)
+    generator.CameraTileSize = 16
+    view = landscape.CameraView(LookAt((20, 6, -4), (40, 0, 30)), 640, 480, Margin=0.0, PixelsPerCell=16.0)
+
+    viewQuads, skirtSources, skirtDrops = generator.CameraQuads(vertices, view)
+
+    points = vertices.reshape(-1, 3)
+    gridQuads = viewQuads[(viewQuads < len(points)).all(axis=1)]
+    assert Area(points, gridQuads) < 0.9 * 128 * 128
+    # Tiles of different grids meet along skirts, numbered on from the grid vertices
+    assert len(skirtSources) > 0 and len(skirtSources) == len(skirtDrops)
+    assert (skirtDrops > 0).all()
+    assert viewQuads.max() == len(points) + len(skirtSources) - 1
+    # Every grid point the camera sees is inside a kept quad's tile
+    clip = view.Clip(points)
+    seen = (clip[:, 3] > 0) & (np.abs(clip[:, 0]) < clip[:, 3]) & (np.abs(clip[:, 1]) < clip[:, 3])
+    covered = np.zeros((128 // 16, 128 // 16), dtype=bool)
+    tiles = (points[gridQuads.ravel(), 0] // 16).astype(int).clip(0, 7), (points[gridQuads.ravel(), 2] // 16).astype(int).clip(0, 7)
+    covered[tiles] = True
+    assert covered[(points[seen, 0] // 16).astype(int).clip(0, 7), (points[seen, 2] // 16).astype(int).clip(0, 7)].all()
+
+
+def test_camera_looking_away_builds_nothing(landscape):
+    generator, vertices, heights, quads = Grid(landscape)
+    view = landscape.CameraView(LookAt((32, 5, -10), (32, 5, -100)), 640, 480)
+
+    assert len(generator.CameraQuads(vertices, view)[0]) == 0
+
+
+def test_camera_looking_away_still_culls_the_water(landscape):
+    generator = landscape.Generator()
+    pixels = np.random.default_rng(7).integers(0, 256, (40, 30, 4)).astype(np.uint8)
+    image = types.SimpleNamespace(width=40, height=30)
+    view = landscape.CameraView(LookAt((0, 1, -1), (0, 1, -100)), 640, 480)
+
+    # Nothing is in view, so the whole landscape is built, less the cells under the water
+    buffers = generator.BuildLandscapeBuffers(image, Pixels=pixels, WaterCulling="Drop", WaterLevel=2.5, View=view)[0]
+    expected = generator.BuildLandscapeBuffers(image, Pixels=pixels, WaterCulling="Drop", WaterLevel=2.5)[0]
+
+    assert 0 < len(buffers.PolyFaces) < 39 * 29
+    for name, values in expected.ToArrays().items():
+        assert np.allclose(buffers.ToArrays()[name], values), name
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+
+def RandomPixels(size=(48, 40), seed=3):
+    return np.random.default_rng(seed).integers(0, 256, size + (4,)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("filters, vertexColours", [(None, None), ([("gaussian", 1.0)], "HeightRamp"), ([("median", 1), ("terrace", 3, 0.5)], "Image")])
+def test_diff_matches_a_full_rebuild(landscape, tmp_path, filters, vertexColours):
+    generator = landscape.Generator()
+    heightMap = tmp_path / "height.png"
+    heightMap.write_bytes(b"")
+    xStep, yStep, height = 0.2, 0.25, 5.0
+    pixels = RandomPixels()
+    watcher = landscape.LandscapeWatcher(generator, str(heightMap), "Landscape", generator.ImageHeights(pixels, height, filters), xStep, yStep, height, filters, vertexColours, pixels)
+
+    # Paint a patch, then move it, as successive saves of the height map
+    for x, y in ((10, 12), (30, 5)):
+        painted = watcher.Pixels.copy()
+        painted[x : x + 4, y : y + 3] = 255 - painted[x : x + 4, y : y + 3]
+        oldNormals = watcher.Normals.reshape(-1, 3).copy()
+        heightIds, heights, shadeIds, normals, colours = watcher.Diff(painted)
+
+        fullHeights = generator.ImageHeights(painted, height, filters)
+        fullNormals = generator.GridNormals(fullHeights, xStep, yStep).reshape(-1, 3)
+        assert np.allclose(watcher.Heights, fullHeights)
+        assert np.allclose(heights, fullHeights.ravel()[heightIds])
+        assert np.allclose(normals, fullNormals[shadeIds])
+        # Every vertex whose normal changed is reshaded
+        assert np.isin(np.flatnonzero(np.any(fullNormals != oldNormals, axis=1)), shadeIds).all()
+        if(vertexColours == "HeightRamp"):
+            assert np.allclose(colours, generator.HeightRampColours(fullHeights.ravel(), fullNormals)[shadeIds])
+        elif(vertexColours == "Image"):
+            assert np.allclose(colours, (painted[:, :, :3] / 255).reshape(-1, 3)[shadeIds])
+        else:
+            assert colours is None
+
+
+def test_diff_ignores_unchanged_and_resized_images(landscape, tmp_path):
+    generator = landscape.Generator()
+    heightMap = tmp_path / "height.png"
+    heightMap.write_bytes(b"")
+    pixels = RandomPixels()
+    watcher = landscape.LandscapeWatcher(generator, str(heightMap), "Landscape", generator.ImageHeights(pixels, 1.0), 1.0, 1.0, 1.0, Pixels=pixels)
+
+    assert watcher.Diff(pixels.copy()) is None
+    assert watcher.Diff(RandomPixels((20, 20))) is None
@@ -0,0 +1,32 @@
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize("script", ["core", "wire", "landscape"])
+def test_loading_a_script_does_not_import_maya(request, script):
+    module = request.getfixturevalue(script)
+
+    assert not any(name == "maya" or name.startswith("maya.") for name in sys.modules)
+    assert isinstance(module.cmds, module.LazyModule)
+    assert module.cmds.__dict__["Module"] is None
+
+
+def test_lazy_module_imports_on_first_use(core):
+    proxy = core.LazyModule("colorsys")
+
+    assert proxy.__dict__["Module"] is None
+    assert proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert proxy.__dict__["Module"] is sys.modules["colorsys"]
+
+
+def test_missing_module_fails_when_used(core):
+    proxy = core.LazyModule("no_such_module_here")
+
+    with pytest.raises(ImportError):
+        proxy.anything
+
+
+def test_scripts_share_one_core(core, wire, landscape, worker):
+    assert wire.core is core and landscape.core is core and worker.core is core
+    assert landscape.MeshBuffers is core.MeshBuffers and issubclass(wire.MeshBuffers, core.MeshBuffers)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+
+def HeightGrid(landscape, size=65):
+    """ A grid of quads over rolling heights with no slope steeper than about 43 degrees, as landscape MeshBuffers. """
+    x, y = np.meshgrid(np.arange(size, dtype=np.float64), np.arange(size, dtype=np.float64), indexing="ij")
+    heights = 3 * np.sin(x / 6) * np.cos(y / 5) + 0.5 * np.sin((x + 2 * y) / 3)
+    corners = (x[:-1, :-1] * size + y[:-1, :-1]).astype(np.int64).ravel()
+    quads = np.stack((corners, corners + 1, corners + size + 1, corners + size), axis=1)
+    return landscape.MeshBuffers(np.stack((x.ravel(), heights.ravel(), y.ravel()), axis=1), np.full(len(quads), 4), quads.ravel())
+
+
+def TriangleNormals(buffers):
+    triangles = buffers.PolygonConnects.reshape(-1, 3)
+    points = buffers.Vertices
+    normals = np.cross(points[triangles[:, 1]] - points[triangles[:, 0]], points[triangles[:, 2]] - points[triangles[:, 0]])
+    return normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+
+@pytest.mark.parametrize("targetFaces", [2000, 1000, 400])
+def test_height_grid_does_not_fold(core, landscape, targetFaces):
+    # Every input triangle faces up, so any triangle facing sideways or down after decimating is a fold
+    grid = HeightGrid(landscape)
+    assert TriangleNormals(landscape.MeshBuffers(grid.Vertices, [3] * 8192, core.MeshDecimator().Triangulate(grid)[0].ravel()))[:, 1].min() > 0.7
+
+    decimated = core.MeshDecimator(targetFaces).Decimate(grid)
+
+    assert len(decimated.PolyFaces) == targetFaces
+    assert TriangleNormals(decimated)[:, 1].min() > 0
+
+
+def DirectedEdges(buffers):
+    triangles = buffers.PolygonConnects.reshape(-1, 3)
+    return np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+
+
+def SignedVolume(vertices, triangles):
+    points = vertices[triangles.reshape(-1, 3)]
+    return np.einsum("ij,ij->i", points[:, 0], np.cross(points[:, 1], points[:, 2])).sum() / 6
+
+
+@pytest.mark.parametrize("targetFaces", [600, 200])
+def test_closed_tube_stays_manifold_and_oriented(core, wire, targetFaces):
+    generator = wire.Generator()
+    phi = np.linspace(0, 2 * np.pi, 48, endpoint=False)
+    centres = np.stack((6 * np.cos(phi), np.zeros_like(phi), 6 * np.sin(phi)), axis=1)
+    tangents = np.stack((-np.sin(phi), np.zeros_like(phi), np.cos(phi)), axis=1)
+    tube = generator.SweepTube(centres, tangents, np.tile((0.0, 1.0, 0.0), (48, 1)), 1.0, 10, closed=True)
+
+    decimated = core.MeshDecimator(targetFaces).Decimate(tube)
+
+    assert len(decimated.PolyFaces) == targetFaces
+    assert (decimated.PolyFaces == 3).all()
+    # Every directed edge appears once and its reverse once, so the surface is closed, manifold and consistently wound
+    edges = DirectedEdges(decimated)
+    assert len(np.unique(edges, axis=0)) == len(edges)
+    assert len(np.unique(np.concatenate((edges, edges[:, ::-1])), axis=0)) == len(edges)
+    # Still wound the same way round, enclosing most of the volume
+    assert SignedVolume(decimated.Vertices, decimated.PolygonConnects) / SignedVolume(tube.Vertices, core.MeshDecimator().Triangulate(tube)[0]) > 0.8
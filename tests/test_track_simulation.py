@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+
+def Circle(radius=4.0, count=200):
+    phi = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    return np.stack((radius * np.cos(phi), np.zeros_like(phi), radius * np.sin(phi)), axis=1)
+
+
+def test_closed_path_samples_the_circle(wire):
+    path = wire.TrackPath(Circle(), closed=True)
+    distances = np.linspace(0, path.Length, 37)
+
+    positions, tangents, ups = path.Sample(distances)
+
+    assert np.isclose(path.Length, 2 * np.pi * 4.0, rtol=1e-3)
+    assert np.allclose(np.linalg.norm(positions, axis=1), 4.0, atol=1e-3)
+    assert np.allclose(np.einsum("ij,ij->i", tangents, positions), 0, atol=1e-2)
+    assert np.allclose(np.linalg.norm(path.SampleCurvature(distances), axis=1), 1 / 4.0, rtol=1e-2)
+    # Distances wrap around a closed path
+    assert np.allclose(path.Sample(distances + path.Length)[0], positions)
+    assert np.allclose(path.Sample(-distances)[0], path.Sample(path.Length - distances)[0])
+
+
+def test_open_path_clamps_to_its_ends(wire):
+    path = wire.TrackPath([(0, 0, 0), (0, 0, 5), (0, 0, 10)])
+
+    positions = path.Sample([-3.0, 2.5, 13.0])[0]
+
+    assert np.isclose(path.Length, 10)
+    assert np.allclose(positions, [(0, 0, 0), (0, 0, 2.5), (0, 0, 10)])
+
+
+def test_ball_rolls_down_a_slope_with_constant_acceleration(wire):
+    # A frictionless incline 30 degrees down, so a rolling solid ball accelerates at 5/7 g sin(30)
+    direction = np.array((0.0, -np.sin(np.radians(30)), np.cos(np.radians(30))))
+    path = wire.TrackPath(np.outer(np.linspace(0, 100, 11), direction))
+    simulator = wire.TrackSimulator(path, ballRadius=0.5, rollingFriction=0.0, stepsPerFrame=16)
+
+    positions, rolls, headings, detachFrames = simulator.Simulate([0.0], [0.0], 48, fps=24.0)
+
+    times = np.arange(48) / 24.0
+    travelled = np.linalg.norm(positions[:, 0] - positions[0, 0], axis=1)
+    assert np.allclose(travelled, 0.5 * (5.0 / 7.0) * 9.8 * 0.5 * times ** 2, atol=0.05)
+    assert np.allclose(rolls[:, 0], travelled / 0.5, atol=0.1)
+    assert detachFrames[0] == -1
+
+
+def test_ball_keeps_its_speed_round_a_flat_loop(wire):
+    path = wire.TrackPath(Circle(10.0, 400), closed=True)
+    simulator = wire.TrackSimulator(path, ballRadius=0.5, rollingFriction=0.0)
+
+    positions, rolls, headings, detachFrames = simulator.Simulate([0.0, 5.0], [3.0, -2.0], 100, fps=25.0)
+
+    speeds = np.linalg.norm(np.diff(positions, axis=0), axis=2) * 25.0
+    assert np.allclose(speeds[:, 0], 3.0, rtol=1e-2)
+    assert np.allclose(speeds[:, 1], 2.0, rtol=1e-2)
+    # Heading is unwrapped, turning once round the loop every lap
+    assert np.isclose(abs(headings[-1, 0] - headings[0, 0]), 3.0 * 99 / 25.0 / 10.0, rtol=2e-2)
+    assert (detachFrames == -1).all()
+
+
+def test_ball_too_slow_for_a_vertical_loop_falls_off(wire):
+    generator = wire.Generator()
+    centres, tangents, ups, closed = generator.LayoutCentreline([("straight", 5), ("loop", 4.0, 1.0), ("straight", 5)], 0.1)
+    path = wire.TrackPath(centres, ups, closed=closed, supportRadius=0.5)
+
+    # Rolling up to 5.8 above the start, past the middle of the loop but well short of the 8 to the top, the ball drops away
+    slow = wire.TrackSimulator(path, ballRadius=0.5).Simulate([0.0], [9.0], 96)[3]
+    positions, rolls, headings, fast = wire.TrackSimulator(path, ballRadius=0.5).Simulate([0.0], [14.0], 96)
+
+    assert slow[0] > 0
+    # Fast enough to hold on over the top, it only leaves where the track ends
+    assert fast[0] == -1 or np.linalg.norm(positions[fast[0], 0] - path.Points[-1]) < 1.0
+
+
+def Channels(positions, rolls, headings, ball=0):
+    return np.concatenate((positions[:, ball], rolls[:, ball, np.newaxis], headings[:, ball, np.newaxis]), axis=1)
+
+
+@pytest.mark.parametrize("lapFrames", [150.79, 201.05, 143.99])
+def test_fractional_lap_period_is_found(wire, lapFrames):
+    path = wire.TrackPath(Circle(10.0, 400), closed=True)
+    simulator = wire.TrackSimulator(path, ballRadius=0.5, rollingFriction=0.0)
+    positions, rolls, headings, detachFrames = simulator.Simulate([0.0], [path.Length / lapFrames * 24.0], 250, fps=24.0)
+    baker = wire.AnimationBaker()
+
+    # Fewer than two laps fit in the shot, and no whole number of frames makes one
+    assert baker.DetectPeriod(Channels(positions, rolls, headings)) is None
+    period = baker.DetectPeriod(Channels(positions, rolls, headings), distances=rolls[:, 0] * 0.5, lapLength=path.Length)
+
+    assert period == pytest.approx(lapFrames, abs=1e-3)
+    # Keyed as AnimateBallLoop keys a lap, the last key lands back on the first
+    cycleFrames = np.append(np.arange(0.0, period - 1e-6), period)
+    cycle = baker.Resample(Channels(positions, rolls, headings), cycleFrames)
+    assert cycleFrames[-1] - cycleFrames[0] == period
+    assert np.allclose(cycle[-1, :3], cycle[0, :3], atol=1e-3)
+    assert np.isclose(cycle[-1, 3] - cycle[0, 3], path.Length / 0.5, rtol=1e-4)
+
+
+def test_varying_speed_and_rocking_periods_are_found(wire):
+    phi = np.linspace(0, 2 * np.pi, 800, endpoint=False)
+    hills = wire.TrackPath(np.stack((10 * np.cos(phi), 1.5 * np.sin(2 * phi), 10 * np.sin(phi)), axis=1), closed=True)
+    baker = wire.AnimationBaker()
+
+    # Fast enough to clear the hills, the ball laps the track, otherwise it rocks back and forth between them
+    for speed, laps in ((9.0, True), (4.0, False)):
+        positions, rolls, headings, detachFrames = wire.TrackSimulator(hills, ballRadius=0.5, rollingFriction=0.0).Simulate([0.0], [speed], 600)
+        period = baker.DetectPeriod(Channels(positions, rolls, headings), distances=rolls[:, 0] * 0.5, lapLength=hills.Length)
+
+        assert period is not None and period != int(period)
+        assert np.isclose(abs(baker.Resample(rolls[:, 0], [period])[0]) * 0.5, hills.Length if laps else 0, atol=1e-3)
+
+
+def test_ball_slowed_by_friction_has_no_period(wire):
+    path = wire.TrackPath(Circle(10.0, 400), closed=True)
+    positions, rolls, headings, detachFrames = wire.TrackSimulator(path, ballRadius=0.5, rollingFriction=0.05).Simulate([0.0], [20.0], 250)
+
+    assert wire.AnimationBaker().DetectPeriod(Channels(positions, rolls, headings), distances=rolls[:, 0] * 0.5, lapLength=path.Length) is None
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+
+def EdgeCounts(buffers):
+    """ Count the faces using each undirected edge. """
+    counts = buffers.PolyFaces.astype(np.int64)
+    starts = np.cumsum(counts) - counts
+    following = np.arange(len(buffers.PolygonConnects)) + 1
+    following[starts + counts - 1] = starts
+    edges = np.sort(np.stack((buffers.PolygonConnects, buffers.PolygonConnects[following]), axis=1), axis=1)
+    return np.unique(edges, axis=0, return_counts=True)[1]
+
+
+def Ring(count, radius=5.0):
+    """ The centreline, tangents and normals of a flat circle of count points, the last repeating the first. """
+    phi = np.linspace(0, 2 * np.pi, count + 1)
+    centres = np.stack((radius * np.cos(phi), np.zeros_like(phi), radius * np.sin(phi)), axis=1)
+    tangents = np.stack((-np.sin(phi), np.zeros_like(phi), np.cos(phi)), axis=1)
+    normals = np.tile((0.0, 1.0, 0.0), (count + 1, 1))
+    return centres, tangents, normals
+
+
+def test_welded_seam_matches_a_closed_tube(wire):
+    generator = wire.Generator()
+    centres, tangents, normals = Ring(40)
+    open_ = generator.SweepTube(centres, tangents, normals, 0.5, 8, closed=False, caps=False)
+    closed = generator.SweepTube(centres[:-1], tangents[:-1], normals[:-1], 0.5, 8, closed=True)
+
+    welded = generator.WeldVertices(open_, 1e-4)
+
+    assert len(welded.Vertices) == len(closed.Vertices)
+    assert len(welded.PolyFaces) == len(closed.PolyFaces)
+    assert (EdgeCounts(welded) == 2).all()
+    # UVs keep their seam, so the texture does not wrap backwards across it
+    assert len(welded.UValues) == len(open_.UValues)
+
+
+@pytest.mark.parametrize("builder, arguments", [("BuildCircularWireTrackBuffers", {"degreesToGenerate" : 360}), 
+                                                  ("BuildTrackLayoutBuffers", {"segments" : [("straight", 4)] + [("arc", 5, 90)] * 2 + [("straight", 4)] + [("arc", 5, 90)] * 2})])
+def test_closed_track_only_has_shared_edges(wire, builder, arguments):
+    generator = wire.Generator()
+    raw = getattr(generator, builder)(weldTolerance=0, **arguments)
+    welded = getattr(generator, builder)(weldTolerance=1e-4, **arguments)
+
+    # The closed rails have no seam left to weld, and welding must not open or merge anything else
+    assert len(welded.Vertices) == len(raw.Vertices)
+    assert (EdgeCounts(raw) == 2).all()
+    assert (EdgeCounts(welded) == 2).all()
+    assert len(welded.PolyFaces) == len(welded.FaceMaterials)
+
+
+def test_pinched_face_is_split(wire):
+    generator = wire.Generator()
+    # A hexagon whose first and fourth corners land on the same point, pinching it into two triangles
+    vertices = [(0, 0, 0), (1, 0, 1), (-1, 0, 1), (0, 0, 1e-6), (-1, 0, -1), (1, 0, -1)]
+    buffers = wire.MeshBuffers(vertices, [6], [0, 1, 2, 3, 4, 5], [wire.MeshBuffers.Connectors], uValues=np.arange(6), vValues=np.zeros(6), uvIds=np.arange(6))
+
+    welded = generator.WeldVertices(buffers, 1e-4)
+
+    assert len(welded.Vertices) == 5
+    assert welded.PolyFaces.tolist() == [3, 3]
+    assert welded.FaceMaterials.tolist() == [wire.MeshBuffers.Connectors] * 2
+    assert len(welded.UVIds) == len(welded.PolygonConnects) == 6
+    for face in welded.PolygonConnects.reshape(2, 3):
+        assert len(set(face.tolist())) == 3
+
+
+def test_weld_does_not_collapse_chains(wire):
+    generator = wire.Generator()
+    # Points a little under the tolerance apart along a line, each merged into the last point kept before it rather than along the whole chain
+    chain = np.stack((np.arange(6) * 0.9e-4, np.zeros(6), np.zeros(6)), axis=1)
+    vertices = np.vstack((chain, [(1, 0, 0), (0, 1, 0)]))
+    buffers = wire.MeshBuffers(vertices, [3, 3], [0, 6, 7, 5, 7, 6])
+
+    welded = generator.WeldVertices(buffers, 1e-4)
+
+    assert np.allclose(welded.Vertices[:3], chain[[0, 2, 4]])
+    assert len(welded.Vertices) == 5
+    assert welded.PolygonConnects.tolist() == [0, 3, 4, 2, 4, 3]
+    # No vertex moves further than the tolerance
+    moved = np.linalg.norm(welded.Vertices[welded.PolygonConnects] - vertices[buffers.PolygonConnects], axis=1)
+    assert (moved <= 1e-4).all()